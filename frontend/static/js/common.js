@@ -6,10 +6,16 @@ function bookmarkNote(note_pk) {
         bookmarkIcons.push(bookmarkButtons[i].firstElementChild.firstElementChild);
     }
     const url = bookmarkButtons[0].getAttribute('url');
+    // Send the desired state, so a double click doesn't undo a bookmark.
+    const bookmarked = bookmarkIcons[0].getAttribute('class').includes('fill');
     $.ajax({
-        type: 'GET',
+        type: 'POST',
         url: url,
-        headers: {"X-Requested-With": "XMLHttpRequest"},
+        data: {state: !bookmarked},
+        headers: {
+            "X-Requested-With": "XMLHttpRequest",
+            "X-CSRFToken": getCookie("csrftoken"),
+        },
         success: (res) => {
             if (res.bookmarked) {
                 for (let i = 0; i < bookmarkIcons.length; i++) {
@@ -84,4 +90,40 @@ setTimeout(() => {
     for (var i = 0; i < alerts.length; i++) {
         alerts.item(i).style.display = "none";
     }
- }, 3000);
\ No newline at end of file
+ }, 3000);
+
+// Infinite scroll: load the next page of a note list when its end is shown.
+const noteListObserver = new IntersectionObserver((entries) => {
+    entries.forEach((entry) => {
+        if (entry.isIntersecting) {
+            loadNextNotes(entry.target);
+        }
+    });
+});
+
+function loadNextNotes(more) {
+    noteListObserver.unobserve(more);
+    $.ajax({
+        type: 'GET',
+        url: more.getAttribute('data-url'),
+        headers: {"X-Requested-With": "XMLHttpRequest"},
+        success: (res) => {
+            more.outerHTML = res.html;
+            observeNoteLists();
+        },
+        error: (res) => {
+            console.log('Bad Request: unable to load notes.');
+            more.remove();
+        },
+        timeout: 10000
+    });
+}
+
+function observeNoteLists() {
+    const moreBlocks = document.getElementsByClassName('note-list-more');
+    for (let i = 0; i < moreBlocks.length; i++) {
+        noteListObserver.observe(moreBlocks[i]);
+    }
+}
+
+observeNoteLists();
@@ -62,19 +62,24 @@ const likeIcon = likeButton.firstElementChild.firstElementChild;
 const likeCount = likeButton.firstElementChild.lastElementChild;
 likeButton.onclick = (event) => {
     if (likeButton.getAttribute('is-user-auth') == 'True') {
+        // Send the desired state, so a double click doesn't undo a like.
+        const liked = likeIcon.getAttribute('class').includes('fill');
         $.ajax({
-            type: 'GET',
+            type: 'POST',
             url: document.getElementById('like-note-url').innerText,
-            headers: {"X-Requested-With": "XMLHttpRequest"},
+            data: {state: !liked},
+            headers: {
+                "X-Requested-With": "XMLHttpRequest",
+                "X-CSRFToken": getCookie("csrftoken"),
+            },
             success: (res) => {
                 if (res.liked) {
                     likeIcon.setAttribute('class', 'bi bi-heart-fill');
-                    likeCount.innerText = Number(likeCount.innerText) + 1;
                 }
                 if (!res.liked) {
                     likeIcon.setAttribute('class', 'bi bi-heart');
-                    likeCount.innerText = Number(likeCount.innerText) - 1;
                 }
+                likeCount.innerText = res.likes_count;
             },
             error: (res) => {
                 console.log('Bad Request: unable to like.');
@@ -93,10 +98,15 @@ const bookmarkIcon1 = bookmarkButton1.firstElementChild;
 const bookmarkIcon2 = bookmarkButton2.firstElementChild;
 // callback
 function toggleBookmark() {
+    const bookmarked = bookmarkIcon1.getAttribute('class').includes('fill');
     $.ajax({
-        type: 'GET',
+        type: 'POST',
         url: document.getElementById('bookmark-note-url').innerText,
-        headers: {"X-Requested-With": "XMLHttpRequest"},
+        data: {state: !bookmarked},
+        headers: {
+            "X-Requested-With": "XMLHttpRequest",
+            "X-CSRFToken": getCookie("csrftoken"),
+        },
         success: (res) => {
             if (res.bookmarked) {
                 bookmarkIcon1.setAttribute('class', 'bi bi-bookmark-plus-fill link-h ps-2 color-grey');
@@ -141,4 +151,50 @@ function addFullScreenBtnsToCodeBlock() {
 
 document.addEventListener('DOMContentLoaded', function(){
     addFullScreenBtnsToCodeBlock();
-});
\ No newline at end of file
+});
+
+// Download a PDF export: it is prepared by a task, poll the task status
+// and download the file when it is ready.
+const downloadPdfButton = document.getElementById('download-pdf');
+const exportStatusUrl = document.getElementById('task-status-url').innerText;
+
+function pollExport(taskID) {
+    $.ajax({
+        type: 'GET',
+        url: exportStatusUrl,
+        data: {'task_id': taskID},
+        headers: {"X-Requested-With": "XMLHttpRequest"},
+        success: (res) => {
+            if (res.task_status === 'SUCCESS' && res.task_result) {
+                downloadPdfButton.lastElementChild.innerText = 'PDF';
+                window.location = downloadPdfButton.href;
+                return;
+            }
+            setTimeout(() => pollExport(taskID), 1000);
+        },
+        error: (res) => {
+            downloadPdfButton.lastElementChild.innerText = 'PDF';
+            console.log('Bad Request: unable to export.');
+        }
+    });
+}
+
+downloadPdfButton.onclick = (event) => {
+    event.preventDefault();
+    $.ajax({
+        type: 'GET',
+        url: downloadPdfButton.href,
+        headers: {"X-Requested-With": "XMLHttpRequest"},
+        success: (res) => {
+            if (res.msg === 'preparing') {
+                downloadPdfButton.lastElementChild.innerText = gettext('Preparing...');
+                pollExport(res.task_id);
+            } else {
+                window.location = downloadPdfButton.href;
+            }
+        },
+        error: (res) => {
+            console.log('Bad Request: unable to export.');
+        }
+    });
+}
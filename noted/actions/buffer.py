@@ -0,0 +1,144 @@
+"""The module buffers actions and writes them to the database in batches.
+
+`ActionManager.create_action` pushes an action to a buffer instead of
+inserting a row, the buffer is flushed by `flush_actions_task` (a periodic
+task) with `bulk_create`.
+
+The buffer backend is set by the `ACTION_BUFFER` setting (a dotted path
+to a :class:`ActionBuffer` subclass).
+
+**Classes**
+    ActionBuffer: a base class for action buffers.
+    LocalActionBuffer: buffers actions in a process memory.
+    RedisActionBuffer: buffers actions in a Redis list.
+
+**Functions**
+    get_action_buffer: returns the buffer set in the settings.
+    flush_actions: moves buffered actions to the database.
+"""
+
+import functools
+import json
+import threading
+import time
+from typing import List
+
+from django_redis import get_redis_connection
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+
+class ActionBuffer:
+    """A base class for buffers of actions.
+
+    An action is a dict of `Action` field values (`actor_ct_id`,
+    `actor_id`, `verb`, `target_ct_id`, `target_id`, `created`).
+    """
+
+    def push(self, action: dict):
+        """Add an action to the buffer."""
+        raise NotImplementedError
+
+    def pop(self, number: int) -> List[dict]:
+        """Remove and return up to `number` oldest actions."""
+        raise NotImplementedError
+
+    def needs_inline_flush(self) -> bool:
+        """Return True if the buffer is flushed by the process itself."""
+        return False
+
+
+class LocalActionBuffer(ActionBuffer):
+    """Buffers actions in a process memory (for development and tests).
+
+    A periodic task can't reach the memory of web processes, so actions
+    are flushed by the process that buffers them: on every push by default,
+    or every `ACTION_BUFFER_FLUSH_INTERVAL` seconds if it is set (actions
+    pushed after the last flush are lost when the process exits).
+    """
+
+    def __init__(self):
+        self._actions: List[dict] = []
+        self._lock = threading.Lock()
+        self._popped = time.monotonic()
+
+    def push(self, action: dict):
+        with self._lock:
+            self._actions.append(action)
+
+    def pop(self, number: int) -> List[dict]:
+        with self._lock:
+            actions = self._actions[:number]
+            del self._actions[:number]
+            self._popped = time.monotonic()
+        return actions
+
+    def needs_inline_flush(self) -> bool:
+        interval = settings.ACTION_BUFFER_FLUSH_INTERVAL
+        return not interval or time.monotonic() - self._popped >= interval
+
+
+class RedisActionBuffer(ActionBuffer):
+    """Buffers actions in a Redis list of the default cache (`RPUSH`)."""
+
+    @property
+    def key(self) -> str:
+        return cache.make_key("actions")
+
+    @property
+    def redis(self):
+        return get_redis_connection("default")
+
+    def push(self, action: dict):
+        self.redis.rpush(self.key, json.dumps(action, cls=DjangoJSONEncoder))
+
+    def pop(self, number: int) -> List[dict]:
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.lrange(self.key, 0, number - 1)
+        pipeline.ltrim(self.key, number, -1)
+        actions, _ = pipeline.execute()
+        actions = [json.loads(action) for action in actions]
+        for action in actions:
+            action["created"] = parse_datetime(action["created"])
+        return actions
+
+
+@functools.lru_cache(maxsize=None)
+def _load_action_buffer(path: str) -> ActionBuffer:
+    return import_string(path)()
+
+
+def get_action_buffer() -> ActionBuffer:
+    """Return an instance of the buffer set in `ACTION_BUFFER`."""
+    return _load_action_buffer(settings.ACTION_BUFFER)
+
+
+def flush_actions(batch_size: int = 1000) -> int:
+    """Insert buffered actions into the database by batches.
+
+    Actions are returned to the buffer if an insert is failed.
+
+    Returns:
+        A number of inserted actions.
+    """
+    Action = apps.get_model("actions", "Action")
+    buffer = get_action_buffer()
+    inserted = 0
+    while True:
+        actions = buffer.pop(batch_size)
+        if not actions:
+            return inserted
+        try:
+            Action.objects.bulk_create(
+                [Action(**action) for action in actions]
+            )
+        except Exception:
+            for action in actions:
+                buffer.push(action)
+            raise
+        inserted += len(actions)
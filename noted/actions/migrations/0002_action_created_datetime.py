@@ -0,0 +1,35 @@
+# Generated by Django 4.1.13 on 2026-10-18 20:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("actions", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="action",
+            name="created",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="action",
+            index=models.Index(
+                fields=[
+                    "actor_ct",
+                    "actor_id",
+                    "verb",
+                    "target_ct",
+                    "target_id",
+                    "-created",
+                ],
+                name="action_dedup",
+            ),
+        ),
+    ]
@@ -3,21 +3,32 @@ import datetime
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from .base import BOOKMARK, CREATE, DOWNLOAD, FOLLOW, LIKE, NEW
+from .buffer import flush_actions, get_action_buffer
 from .notifications import create_notification
 
 
+# A cache key of a window in which similar actions aren't created.
+ACTION_DEDUP_KEY = (
+    "action:{actor_ct_id}:{actor_id}:{verb}:{target_ct_id}:{target_id}"
+)
+
+
 class ActionManager(models.Manager):
     def create_action(
         self, actor, verb: str, target=None, notify: bool = False
     ) -> bool:
         """A create instance shortcut function for :model:`Action`.
 
-        Doesn't create similar actions within a minute.
+        Doesn't create similar actions within `ACTION_DEDUP_WINDOW` seconds:
+        a window is held by a cache key (`SET NX EX` on Redis) and checked
+        by the `action_dedup` index. An action is written to the database
+        by `flush_actions_task` (see `actions.buffer`).
 
         Args:
             actor: Initiactor of the action.
@@ -30,27 +41,40 @@ class ActionManager(models.Manager):
         """
         if settings.TEST_MODE:
             return False
-        # Check for any similar action made in the last minutes
-        last_minute = timezone.now() - datetime.timedelta(seconds=60)
-        actor_ct = ContentType.objects.get_for_model(actor)
+        window = settings.ACTION_DEDUP_WINDOW
+        action = {
+            "actor_ct_id": ContentType.objects.get_for_model(actor).pk,
+            "actor_id": actor.pk,
+            "verb": verb,
+            "target_ct_id": None,
+            "target_id": None,
+            "created": timezone.now(),
+        }
+        if target is not None:
+            action["target_ct_id"] = ContentType.objects.get_for_model(
+                target
+            ).pk
+            action["target_id"] = target.pk
+        if not cache.add(ACTION_DEDUP_KEY.format(**action), 1, window):
+            return False
         similar_actions = self.filter(
+            actor_ct_id=action["actor_ct_id"],
+            actor_id=action["actor_id"],
             verb=verb,
-            created__gte=last_minute,
-            actor_ct=actor_ct,
-            actor_id=actor.id,
+            target_ct_id=action["target_ct_id"],
+            target_id=action["target_id"],
+            created__gte=action["created"]
+            - datetime.timedelta(seconds=window),
         )
-        if target:
-            target_ct = ContentType.objects.get_for_model(target)
-            similar_actions = similar_actions.filter(
-                target_ct=target_ct, target_id=target.id
-            )
-        if not similar_actions:
-            action = Action(actor=actor, verb=verb, target=target)
-            action.save()
-            if notify:
-                create_notification(actor, verb, target)
-            return True
-        return False
+        if similar_actions.exists():
+            return False
+        buffer = get_action_buffer()
+        buffer.push(action)
+        if buffer.needs_inline_flush():
+            flush_actions()
+        if notify:
+            create_notification(actor, verb, target)
+        return True
 
 
 class Action(models.Model):
@@ -89,7 +113,7 @@ class Action(models.Model):
     )
     actor = GenericForeignKey("actor_ct", "actor_id")
     verb = models.CharField(max_length=255, choices=ACTIONS)
-    created = models.DateField(auto_now_add=True, db_index=True)
+    created = models.DateTimeField(default=timezone.now, db_index=True)
     target_ct = models.ForeignKey(
         ContentType,
         blank=True,
@@ -105,3 +129,16 @@ class Action(models.Model):
 
     class Meta:
         ordering = ("-created",)
+        indexes = [
+            models.Index(
+                fields=[
+                    "actor_ct",
+                    "actor_id",
+                    "verb",
+                    "target_ct",
+                    "target_id",
+                    "-created",
+                ],
+                name="action_dedup",
+            )
+        ]
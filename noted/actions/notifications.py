@@ -1,14 +1,21 @@
 from typing import List, Union
 
+from notifications.models import Notification
 from notifications.signals import notify
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.utils import timezone
 from django.utils.functional import SimpleLazyObject
 
 from content.models import Note
-from tags.models import UnicodeTag, get_tag_followers
+from tags.models import UnicodeTag, UnicodeTaggedItem
 from users.models import Following
 from users.models import User as UserType
+from users.models import UserProfile
 
 from .base import CREATE, FOLLOW, LIKE
 
@@ -18,11 +25,6 @@ User = get_user_model()
 RECIPIENTS_GETTERS = {
     (User, FOLLOW, User): lambda _, followed_user: followed_user,
     (User, LIKE, Note): lambda _, note: note.author,
-    # TODO: Exclude AUTHOR of Tag
-    (UnicodeTag, CREATE, Note): lambda tag, _: get_tag_followers(tag),
-    (User, CREATE, Note): lambda author, _: Following.objects.get_follower(
-        author
-    ),
 }
 
 
@@ -72,3 +74,91 @@ def create_notification(actor, verb: str, target) -> None:
         recipient=get_recipients(actor, verb, target),
         target=target,
     )
+
+
+def notify_note_followers(note_id: int) -> int:
+    """Notify followers of the author and of tags of a note about it.
+
+    Recipients are queried by one query, a user who follows the author and
+    tags is notified once (by the author), users who have been notified
+    about the note are skipped, so the function can be called again when
+    tags are added. Notifications are inserted by chunks.
+
+    Args:
+        note_id: A primary key of a new note.
+
+    Returns:
+        A number of created notifications.
+    """
+    with transaction.atomic():
+        note = (
+            Note.objects.select_for_update()
+            .only("pk", "author_id")
+            .filter(pk=note_id)
+            .first()
+        )
+        if note is None:
+            return 0
+        note_ct = ContentType.objects.get_for_model(Note)
+        profile_ct = ContentType.objects.get_for_model(UserProfile)
+        author_followers = Following.objects.filter(followed=note.author_id)
+        tagged = UnicodeTaggedItem.objects.filter(
+            content_type=profile_ct,
+            tag__in=UnicodeTaggedItem.objects.filter(
+                content_type=note_ct, object_id=note.pk
+            ).values("tag"),
+        )
+        notified = Notification.objects.filter(
+            verb=CREATE,
+            target_content_type=note_ct,
+            target_object_id=str(note.pk),
+        ).values("recipient")
+        recipients = (
+            User.objects.filter(
+                Q(pk__in=author_followers.values("follower"))
+                | Q(profile__in=tagged.values("object_id"))
+            )
+            .exclude(pk=note.author_id)
+            .exclude(pk__in=notified)
+            .annotate(
+                follows_author=Exists(
+                    author_followers.filter(follower=OuterRef("pk"))
+                ),
+                tag_id=Subquery(
+                    tagged.filter(object_id=OuterRef("profile"))
+                    .order_by("tag")
+                    .values("tag")[:1]
+                ),
+            )
+            .values_list("pk", "follows_author", "tag_id")
+        )
+        user_ct = ContentType.objects.get_for_model(User)
+        tag_ct = ContentType.objects.get_for_model(UnicodeTag)
+        batch_size = settings.NOTIFICATION_BATCH_SIZE
+        now = timezone.now()
+        created = 0
+        batch = []
+        for user_id, follows_author, tag_id in recipients.iterator(
+            chunk_size=batch_size
+        ):
+            if follows_author:
+                actor_ct, actor_id = user_ct, note.author_id
+            else:
+                actor_ct, actor_id = tag_ct, tag_id
+            batch.append(
+                Notification(
+                    recipient_id=user_id,
+                    actor_content_type=actor_ct,
+                    actor_object_id=str(actor_id),
+                    verb=CREATE,
+                    target_content_type=note_ct,
+                    target_object_id=str(note.pk),
+                    timestamp=now,
+                )
+            )
+            if len(batch) == batch_size:
+                created += len(Notification.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(Notification.objects.bulk_create(batch))
+    return created
@@ -0,0 +1,24 @@
+from celery import shared_task
+
+from .buffer import flush_actions
+from .notifications import notify_note_followers
+
+
+@shared_task()
+def notify_note_followers_task(note_id: int) -> int:
+    """Notify followers of the author and of tags of a note about it.
+
+    Returns:
+        A number of created notifications.
+    """
+    return notify_note_followers(note_id)
+
+
+@shared_task()
+def flush_actions_task() -> int:
+    """Insert buffered actions into the database (a periodic task).
+
+    Returns:
+        A number of inserted actions.
+    """
+    return flush_actions()
@@ -0,0 +1,136 @@
+from notifications.models import Notification
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from content.models import Note
+from tags.models import UnicodeTag
+from users.models import Following, User
+
+from .base import CREATE, LIKE
+from .buffer import _load_action_buffer, flush_actions
+from .models import Action
+from .notifications import notify_note_followers
+
+
+class NoteNotificationsTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(
+            email="author@email.qq", full_name="Some Author"
+        )
+        self.follower = User.objects.create(
+            email="follower@email.qq", full_name="Follower"
+        )
+        self.tag_follower = User.objects.create(
+            email="tags@email.qq", full_name="Tag Follower"
+        )
+        Following.objects.create(follower=self.follower, followed=self.author)
+        self.follower.profile.tags.add("python")
+        self.tag_follower.profile.tags.add("python", "django")
+        self.author.profile.tags.add("python")
+
+    def create_note(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            note = Note.objects.create(
+                title="Note", author=self.author, **kwargs
+            )
+            note.tags.add("python", "django")
+        return note
+
+    def notifications(self, note):
+        return {
+            (n.recipient, n.actor)
+            for n in Notification.objects.filter(
+                verb=CREATE, target_object_id=str(note.pk)
+            )
+        }
+
+    def test_followers_notified_once(self):
+        note = self.create_note()
+        tag = UnicodeTag.objects.get(name="python")
+        self.assertEqual(
+            self.notifications(note),
+            {(self.follower, self.author), (self.tag_follower, tag)},
+        )
+
+    def test_notify_again_skips_notified(self):
+        note = self.create_note()
+        self.assertEqual(notify_note_followers(note.pk), 0)
+        reader = User.objects.create(email="reader@email.qq")
+        Following.objects.create(follower=reader, followed=self.author)
+        self.assertEqual(notify_note_followers(note.pk), 1)
+        self.assertEqual(len(self.notifications(note)), 3)
+
+    @override_settings(NOTIFICATION_BATCH_SIZE=1)
+    def test_notifications_in_batches(self):
+        note = Note.objects.create(title="Note", author=self.author)
+        note.tags.add("python")
+        Notification.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(notify_note_followers(note.pk), 2)
+        inserts = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "notifications')
+        ]
+        self.assertEqual(len(inserts), 2)
+
+
+@override_settings(
+    TEST_MODE=False,
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    },
+    ACTION_BUFFER="actions.buffer.LocalActionBuffer",
+    ACTION_BUFFER_FLUSH_INTERVAL=3600,
+)
+class CreateActionTest(TestCase):
+    def setUp(self):
+        _load_action_buffer.cache_clear()
+        self.user = User.objects.create(email="user@email.qq")
+        self.note = Note.objects.create(title="Note", author=self.user)
+        flush_actions()
+        Action.objects.all().delete()
+        cache.clear()
+
+    def tearDown(self):
+        _load_action_buffer.cache_clear()
+
+    def test_action_buffered(self):
+        self.assertTrue(
+            Action.objects.create_action(self.user, LIKE, self.note)
+        )
+        self.assertFalse(Action.objects.exists())
+        self.assertEqual(flush_actions(), 1)
+        action = Action.objects.get()
+        self.assertEqual(action.actor, self.user)
+        self.assertEqual(action.target, self.note)
+        self.assertEqual(action.verb, LIKE)
+
+    @override_settings(ACTION_BUFFER_FLUSH_INTERVAL=0)
+    def test_action_flushed_on_push(self):
+        self.assertTrue(
+            Action.objects.create_action(self.user, LIKE, self.note)
+        )
+        self.assertEqual(Action.objects.get().verb, LIKE)
+        self.assertEqual(flush_actions(), 0)
+
+    def test_similar_action_skipped(self):
+        self.assertTrue(
+            Action.objects.create_action(self.user, LIKE, self.note)
+        )
+        self.assertFalse(
+            Action.objects.create_action(self.user, LIKE, self.note)
+        )
+        self.assertTrue(
+            Action.objects.create_action(self.user, CREATE, self.note)
+        )
+        self.assertEqual(flush_actions(batch_size=1), 2)
+
+    def test_similar_action_in_database_skipped(self):
+        Action.objects.create(actor=self.user, verb=LIKE, target=self.note)
+        self.assertFalse(
+            Action.objects.create_action(self.user, LIKE, self.note)
+        )
@@ -5,3 +5,8 @@ from django.utils.translation import gettext_lazy as _
 class CommonConfig(AppConfig):
     name = "common"
     verbose_name = _("Common Functionality")
+
+    def ready(self):
+        import common.signals  # noqa: F401
+
+        return super().ready()
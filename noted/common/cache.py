@@ -1,8 +1,20 @@
 import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Type, Union
 
 from django.core.cache import cache
 from django.core.cache.backends.dummy import DummyCache
+from django.db import models
 from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+
+
+# A key of a generation of a model, entries that depend on the model are
+# stored with its generation.
+GENERATION_KEY = "cache_generation:{}"
 
 
 class RedisDummyCache(DummyCache):
@@ -10,24 +22,147 @@ class RedisDummyCache(DummyCache):
         pass
 
 
-def cache_queryset(time: int) -> QuerySet:
-    """A decorator for caching function result by a function name as a key.
+class LRUCache:
+    """A thread-safe in-process cache with the least recently used eviction.
+
+    Args:
+        maxsize: Maximum number of stored items.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a value by `key` and mark it as recently used."""
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evict the least recently used one if full."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def model_label(model: Union[str, Type[models.Model]]) -> str:
+    """Return a lowercased label (`app_label.model_name`) of a model."""
+    if isinstance(model, str):
+        return model.lower()
+    return model._meta.label_lower
+
+
+def get_generations(*labels: str) -> list:
+    """Return current generations of models by their labels.
+
+    A missing generation is initialized with the current time, so entries
+    built on an evicted generation are not reused.
+    """
+    keys = [GENERATION_KEY.format(label) for label in labels]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key, 0)
+    return [generations[key] for key in keys]
+
+
+def invalidate(*models: Union[str, Type[models.Model]]) -> None:
+    """Invalidate cached entries that depend on `models`."""
+    for label in map(model_label, models):
+        key = GENERATION_KEY.format(label)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def invalidate_sender(sender, **kwargs):
+    """A receiver of model signals that invalidates the sender model."""
+    invalidate(sender)
+
+
+def make_cache_key(fn: Callable, args, kwargs) -> str:
+    """Build a cache key of a call of `fn` by its arguments."""
+    call = repr((args, sorted(kwargs.items())))
+    digest = hashlib.md5(call.encode()).hexdigest()
+    return f"cached:{fn.__module__}.{fn.__qualname__}:{digest}"
+
+
+def cached(
+    timeout: int,
+    depends_on: Iterable = (),
+    stale_timeout: int = 0,
+    lock_timeout: int = 60,
+) -> Callable:
+    """A decorator for caching function results by arguments.
+
+    A queryset result is evaluated into a list before caching, an empty
+    result is cached as well. An entry is stored with generations of
+    models from `depends_on`, saving or deleting an instance of a model
+    increments its generation and makes the entry stale.
 
-    Caches result a function by a function name.
+    A stale entry (expired by `timeout` or built on old generations) is
+    served for `stale_timeout` more seconds while one worker, holding a
+    lock, recomputes it. Without `stale_timeout` a stale entry is
+    recomputed by every worker that reads it.
 
     Args:
-        time: Time in seconds for caching result.
+        timeout: Time in seconds the result is fresh.
+        depends_on: Models (classes or `app_label.ModelName` labels)
+            the result is built from.
+        stale_timeout: Time in seconds a stale result is served.
+        lock_timeout: Maximum time in seconds of a recomputation.
     """
+    labels = [model_label(model) for model in depends_on]
+    for model in depends_on:
+        for signal in (post_save, post_delete):
+            signal.connect(
+                invalidate_sender,
+                sender=model,
+                dispatch_uid=f"cache_invalidate_{model_label(model)}",
+            )
 
     def decorator(fn):
         @functools.wraps(fn)
         def wrapper(*args, **kwargs):
-            key = fn.__name__
-            queryset = cache.get(key)
-            if not queryset:
-                queryset = fn(*args, **kwargs)
-                cache.set(key, queryset, time)
-            return queryset
+            key = make_cache_key(fn, args, kwargs)
+            generations = get_generations(*labels)
+            entry = cache.get(key)
+            locked = False
+            if entry is not None:
+                entry_generations, fresh_until, result = entry
+                if entry_generations == generations:
+                    if time.time() < fresh_until:
+                        return result
+                if stale_timeout:
+                    locked = cache.add(f"{key}:lock", 1, lock_timeout)
+                    if not locked:
+                        return result
+            try:
+                result = fn(*args, **kwargs)
+                if isinstance(result, QuerySet):
+                    result = list(result)
+                entry = (generations, time.time() + timeout, result)
+                cache.set(key, entry, timeout + stale_timeout)
+            finally:
+                if locked:
+                    cache.delete(f"{key}:lock")
+            return result
 
         return wrapper
 
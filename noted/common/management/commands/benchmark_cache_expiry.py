@@ -0,0 +1,92 @@
+import statistics
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from common.cache import cached
+
+
+class Command(BaseCommand):
+    """Load test expiration of a cached slow computation.
+
+    Workers (threads) read a cached function that sleeps `--compute` ms,
+    the entry expires every `--timeout` seconds. Latency, number of
+    computations and of slow reads (longer than a half of a computation)
+    are compared with and without `stale_timeout`. The
+    configured cache is used, run it with a shared cache (Redis).
+
+    Usage in the terminal:
+        > python manage.py benchmark_cache_expiry --workers 20 --duration 5
+    """
+
+    help = "Load test expiration of cached computations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=20)
+        parser.add_argument(
+            "--duration", type=float, default=5, help="Seconds of a run."
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=1, help="Fresh time, seconds."
+        )
+        parser.add_argument(
+            "--compute", type=float, default=200, help="Computation, ms."
+        )
+
+    def run(self, stale_timeout: int, options) -> tuple:
+        computations = []
+
+        def compute():
+            computations.append(1)
+            time.sleep(options["compute"] / 1000)
+            return time.time()
+
+        compute.__qualname__ += f".{stale_timeout}.{time.time()}"
+        read = cached(options["timeout"], stale_timeout=stale_timeout)(compute)
+        read()
+        timings = []
+        stop = time.perf_counter() + options["duration"]
+
+        def worker():
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                read()
+                timings.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.005)
+
+        threads = [
+            threading.Thread(target=worker) for _ in range(options["workers"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        timings.sort()
+        slow = sum(1 for ms in timings if ms > options["compute"] / 2)
+        return (
+            len(computations) - 1,
+            slow,
+            statistics.median(timings),
+            timings[-1],
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            "Cache: {}, workers: {}".format(
+                type(caches["default"]).__name__, options["workers"]
+            )
+        )
+        self.stdout.write(
+            "{:<8} {:>12} {:>10} {:>9} {:>9}".format(
+                "stale", "computations", "slow reads", "p50, ms", "max, ms"
+            )
+        )
+        for stale_timeout in (0, 60):
+            computations, slow, p50, slowest = self.run(stale_timeout, options)
+            self.stdout.write(
+                "{:<8} {:>12} {:>10} {:>9.2f} {:>9.2f}".format(
+                    stale_timeout, computations, slow, p50, slowest
+                )
+            )
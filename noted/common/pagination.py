@@ -0,0 +1,155 @@
+"""The module provides keyset (cursor) pagination of querysets.
+
+A page is selected by a cursor (values of the ordering fields of the last
+object of the previous page) instead of `OFFSET`, and pages are not
+counted, so a deep page costs the same as the first one.
+
+**Classes**
+    InvalidCursor: an error of a malformed cursor.
+    CursorEncoder: a JSON encoder of values of a cursor.
+    KeysetPage: a page of objects with a cursor of the next page.
+    KeysetPaginator: paginates a queryset by a cursor.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+from typing import List, Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+
+
+class InvalidCursor(ValueError):
+    """A cursor can't be decoded or doesn't match the ordering."""
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Encodes datetimes with microseconds (`DjangoJSONEncoder` cuts them
+    to milliseconds, a cursor would skip objects of the same millisecond).
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    """A page of objects.
+
+    Args:
+        object_list: Objects of the page.
+        next_cursor: A cursor of the next page (None for the last page).
+    """
+
+    def __init__(self, object_list: list, next_cursor: Optional[str]):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+class KeysetPaginator:
+    """Paginates a queryset by a cursor built from the ordering fields.
+
+    The primary key is added to the ordering to make it unique. Ordering
+    fields must be non-nullable fields of the model itself.
+
+    Args:
+        queryset: An ordered queryset.
+        per_page: Number of objects on a page.
+    """
+
+    def __init__(self, queryset: QuerySet, per_page: int):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = self.get_ordering(queryset)
+
+    @staticmethod
+    def get_ordering(queryset: QuerySet) -> List[Tuple[str, bool]]:
+        """Return pairs of a field name and a descending flag."""
+        opts = queryset.model._meta
+        ordering = queryset.query.order_by or opts.ordering
+        keys = []
+        for name in ordering:
+            if not isinstance(name, str):
+                raise ValueError(f"Unsupported ordering: {name!r}.")
+            descending = name.startswith("-")
+            name = name.lstrip("-")
+            if name == "pk":
+                name = opts.pk.name
+            keys.append((name, descending))
+        if opts.pk.name not in (name for name, _ in keys):
+            keys.append((opts.pk.name, keys[-1][1] if keys else False))
+        return keys
+
+    def encode_cursor(self, obj) -> str:
+        """Build a cursor of the page that follows `obj`."""
+        values = [getattr(obj, name) for name, _ in self.ordering]
+        data = json.dumps(values, cls=CursorEncoder).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> list:
+        """Return values of the ordering fields from `cursor`."""
+        try:
+            data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(data)
+        except (binascii.Error, ValueError):
+            raise InvalidCursor(cursor)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        opts = self.queryset.model._meta
+        try:
+            return [
+                opts.get_field(name).to_python(value)
+                for (name, _), value in zip(self.ordering, values)
+            ]
+        except (FieldDoesNotExist, ValidationError):
+            raise InvalidCursor(cursor)
+
+    def after(self, values: list) -> Q:
+        """Build a condition of objects that follow `values` in the ordering.
+
+        `(a, b) < (x, y)` is expanded to `a <= x AND (a < x OR a = x AND
+        b < y)`, the first part lets an index on `a` limit the scan.
+        """
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self.ordering, values):
+            lookup = "lt" if descending else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        name, descending = self.ordering[0]
+        lookup = "lte" if descending else "gte"
+        return Q(**{f"{name}__{lookup}": values[0]}) & condition
+
+    def page(self, cursor: Optional[str] = None) -> KeysetPage:
+        """Return the page that starts after `cursor` (the first one if
+        `cursor` is empty).
+
+        Raises:
+            InvalidCursor: `cursor` is malformed.
+        """
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor)))
+        queryset = queryset.order_by(
+            *(("-" if desc else "") + name for name, desc in self.ordering)
+        )
+        objects = list(queryset[: self.per_page + 1])
+        next_cursor = None
+        if len(objects) > self.per_page:
+            objects = objects[: self.per_page]
+            next_cursor = self.encode_cursor(objects[-1])
+        return KeysetPage(objects, next_cursor)
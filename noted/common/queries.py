@@ -0,0 +1,148 @@
+"""The module records SQL queries of requests and checks query budgets.
+
+`QueryBudgetMiddleware` counts queries of a request, their total time and
+duplicated queries (the same statement with different parameters, the
+signature of an N+1 problem). A request that exceeds the budget of its view
+(`QUERY_BUDGETS` by a view name, `QUERY_BUDGET` by default) or repeats a
+statement `QUERY_DUPLICATES_THRESHOLD` times is logged to the
+`django.db.backends` handlers (`logs/debug/sql.log`). With `DEBUG` a
+response has a `Server-Timing` header.
+
+**Classes**
+    QueryReport: records queries of a connection.
+    QueryBudgetMiddleware: records queries of requests.
+    QueryBudgetMixin: a test case mixin to declare budgets of views.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger("django.db.backends.budget")
+
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+NUMBER = re.compile(r"\b\d+\b")
+
+
+def fingerprint(sql: str) -> str:
+    """Return a statement without values (lists in `IN` and numbers)."""
+    return NUMBER.sub("?", IN_LIST.sub("IN (...)", sql))
+
+
+class QueryReport:
+    """Records queries of a connection (an execute wrapper).
+
+    Usage:
+        >>> report = QueryReport("content:note")
+        >>> with connection.execute_wrapper(report):
+        ...     do_queries()
+        >>> report.count, report.duration, report.duplicates()
+
+    Args:
+        view_name: A name of a view which makes the queries.
+    """
+
+    def __init__(self, view_name: Optional[str] = None):
+        self.view_name = view_name
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self, threshold: int = 2) -> List[Tuple[str, int]]:
+        """Statements executed `threshold` times or more (most repeated
+        first).
+
+        Returns:
+            A list of (fingerprint, times) pairs.
+        """
+        fingerprints = Counter()
+        for sql, times in self.statements.items():
+            fingerprints[fingerprint(sql)] += times
+        return [
+            (sql, times)
+            for sql, times in fingerprints.most_common()
+            if times >= threshold
+        ]
+
+    def __str__(self) -> str:
+        lines = [
+            f"{self.view_name}: {self.count} queries in "
+            f"{self.duration * 1000:.2f} ms"
+        ]
+        lines.extend(f"  {times} x {sql}" for sql, times in self.duplicates())
+        return "\n".join(lines)
+
+
+def get_query_budget(view_name: str) -> int:
+    """Return the maximum number of queries of a view."""
+    return settings.QUERY_BUDGETS.get(view_name, settings.QUERY_BUDGET)
+
+
+class QueryBudgetMiddleware:
+    """Records queries of a request and logs views over the budget.
+
+    The report is available as `response.query_report`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        report = QueryReport()
+        with connection.execute_wrapper(report):
+            response = self.get_response(request)
+        match = getattr(request, "resolver_match", None)
+        report.view_name = match.view_name if match else request.path
+        response.query_report = report
+        if settings.DEBUG:
+            response["Server-Timing"] = (
+                f"sql;dur={report.duration * 1000:.2f};"
+                f'desc="{report.count} queries"'
+            )
+        duplicates = report.duplicates(settings.QUERY_DUPLICATES_THRESHOLD)
+        if report.count > get_query_budget(report.view_name) or duplicates:
+            logger.warning(str(report))
+        return response
+
+
+class QueryBudgetMixin:
+    """A test case mixin to check numbers of queries of views.
+
+    Budgets are declared by view names in `query_budgets`, views that
+    aren't declared have budgets from the settings.
+
+    Usage:
+        >>> class NoteUrlsTest(QueryBudgetMixin, TestCase):
+        ...     query_budgets = {"content:note": 20}
+        ...
+        ...     def test_note(self):
+        ...         response = self.client.get(note.get_absolute_url())
+        ...         self.assertQueryBudget(response)
+    """
+
+    query_budgets: Dict[str, int] = {}
+
+    def assertQueryBudget(self, response, budget: Optional[int] = None):
+        """Fail if a view of the response made more queries than budget."""
+        report = response.query_report
+        if budget is None:
+            budget = self.query_budgets.get(
+                report.view_name, get_query_budget(report.view_name)
+            )
+        if report.count > budget:
+            self.fail(f"Query budget {budget} is exceeded by {report}")
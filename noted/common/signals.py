@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def set_similarity_threshold(sender, connection, **kwargs):
+    """Set the threshold of the trigram `%` operator for a new connection.
+
+    The `trigram_similar` lookup uses the `%` operator (backed by trigram
+    indexes), it matches strings with similarity above the threshold.
+    """
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SET pg_trgm.similarity_threshold = %s",
+            [settings.TRIGRAM_SIMILARITY_THRESHOLD],
+        )
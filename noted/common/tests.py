@@ -1,11 +1,21 @@
+import datetime
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
 from django.core.exceptions import FieldDoesNotExist
-from django.http import HttpRequest, HttpResponseBadRequest
-from django.test import TestCase
+from django.db import connection
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
 
-from content.models import Source
+from content.models import Note, Source
 from users.models import User
 
+from .cache import LRUCache, cached, invalidate, make_cache_key
 from .decorators import ajax_required
+from .pagination import InvalidCursor, KeysetPaginator
+from .queries import QueryBudgetMiddleware, QueryReport
 from .text import generate_unique_slug, is_latin, transcript_ru2en
 
 
@@ -73,3 +83,142 @@ class Tests(TestCase):
 
     def test_is_latin_with_empty_word(self):
         self.assertTrue(is_latin(""))
+
+    def test_lru_cache(self):
+        lru = LRUCache(maxsize=2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        self.assertEqual(lru.get("a"), 1)
+        lru.set("c", 3)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("a"), 1)
+        self.assertEqual(lru.get("c"), 3)
+        self.assertEqual(len(lru), 2)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            }
+        }
+    )
+    def test_cached(self):
+        calls = []
+
+        @cached(60, depends_on=(Source,))
+        def get_sources(number):
+            calls.append(number)
+            return Source.objects.order_by("pk")[:number]
+
+        self.assertEqual(get_sources(1), [])
+        self.assertEqual(get_sources(1), [])
+        self.assertEqual(calls, [1])
+        source = Source.objects.create(title="Dune", type=Source.BOOK)
+        self.assertEqual(get_sources(1), [source])
+        self.assertEqual(get_sources(2), [source])
+        self.assertEqual(get_sources(1), [source])
+        self.assertEqual(calls, [1, 1, 2])
+        invalidate("content.Source")
+        get_sources(1)
+        self.assertEqual(calls, [1, 1, 2, 1])
+        source.delete()
+        self.assertEqual(get_sources(1), [])
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            }
+        }
+    )
+    def test_cached_stale_while_revalidate(self):
+        calls = []
+
+        @cached(60, depends_on=(Source,), stale_timeout=60)
+        def count_sources():
+            calls.append(1)
+            return Source.objects.count()
+
+        key = make_cache_key(count_sources.__wrapped__, (), {})
+        self.assertEqual(count_sources(), 0)
+        Source.objects.create(title="Dune", type=Source.BOOK)
+        cache.add(f"{key}:lock", 1)
+        self.assertEqual(count_sources(), 0)
+        self.assertEqual(len(calls), 1)
+        cache.delete(f"{key}:lock")
+        self.assertEqual(count_sources(), 1)
+        self.assertEqual(len(calls), 2)
+        with patch("common.cache.time.time", return_value=time.time() + 61):
+            cache.add(f"{key}:lock", 1)
+            self.assertEqual(count_sources(), 1)
+            self.assertEqual(len(calls), 2)
+            cache.delete(f"{key}:lock")
+            count_sources()
+            self.assertEqual(len(calls), 3)
+            self.assertFalse(cache.get(f"{key}:lock"))
+
+    def test_keyset_paginator(self):
+        for title in ("b", "a", "b", "c", "a", "b", "d"):
+            Source.objects.create(title=title)
+        queryset = Source.objects.order_by("-title")
+        paginator = KeysetPaginator(queryset, per_page=3)
+        self.assertEqual(paginator.ordering, [("title", True), ("id", True)])
+        sources, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            sources.extend(page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(sources, list(queryset.order_by("-title", "-id")))
+
+    def test_keyset_paginator_same_millisecond(self):
+        created = timezone.now().replace(microsecond=123000)
+        for number in range(5):
+            note = Note.objects.create(title=f"Note {number}")
+            Note.objects.filter(pk=note.pk).update(
+                created=created + datetime.timedelta(microseconds=number)
+            )
+        queryset = Note.objects.order_by("-created")
+        paginator = KeysetPaginator(queryset, per_page=2)
+        notes, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            notes.extend(page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(notes, list(queryset.order_by("-created", "-id")))
+
+    def test_keyset_paginator_invalid_cursor(self):
+        paginator = KeysetPaginator(Source.objects.order_by("title"), 3)
+        for cursor in ("bad", "WzFd", "WyJhIiwgImIiXQ"):
+            with self.assertRaises(InvalidCursor):
+                paginator.page(cursor)
+
+    def test_query_report(self):
+        report = QueryReport("sources")
+        with connection.execute_wrapper(report):
+            for pk in range(3):
+                list(Source.objects.filter(pk=pk))
+            list(Source.objects.filter(pk__in=[1, 2]))
+            list(Source.objects.filter(pk__in=[1, 2, 3]))
+        self.assertEqual(report.count, 5)
+        self.assertEqual([times for _, times in report.duplicates()], [3, 2])
+        self.assertIn("IN (...)", report.duplicates()[1][0])
+
+    @override_settings(
+        DEBUG=True, QUERY_BUDGET=2, QUERY_DUPLICATES_THRESHOLD=10
+    )
+    def test_query_budget_middleware(self):
+        def view(request):
+            for pk in range(3):
+                Source.objects.filter(pk=pk).exists()
+            return HttpResponse()
+
+        middleware = QueryBudgetMiddleware(view)
+        with self.assertLogs("django.db.backends.budget") as logs:
+            response = middleware(RequestFactory().get("/sources/"))
+        self.assertEqual(response.query_report.count, 3)
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+        self.assertIn("3 x SELECT", logs.output[0])
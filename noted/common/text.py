@@ -1,5 +1,6 @@
 import unicodedata as ud
 import uuid
+from typing import List
 
 from django.core.exceptions import FieldDoesNotExist
 from django.utils.text import slugify
@@ -71,6 +72,43 @@ def generate_unique_slug(
     return slug
 
 
+def generate_unique_slugs(
+    model, values: List[str], for_field: str = "slug", latin: bool = False
+) -> List[str]:
+    """Generate unique slugs for many new instances by one query.
+
+    The bulk version of `generate_unique_slug`: a slug taken in the
+    database or by a previous value gets random symbols at the end.
+
+    Args:
+        model: A model with the slug field.
+        values: Values to generate slugs from.
+        for_field: A name of the slug field.
+        latin: If True translates Russian letters to Latin.
+
+    Returns:
+        Slugs in the order of `values`.
+    """
+    max_length = model._meta.get_field(for_field).max_length - 9
+    slugs = []
+    for value in values:
+        if latin:
+            value = transcript_ru2en(value)
+        slugs.append(slugify(value, allow_unicode=True)[:max_length])
+    taken = set(
+        model.objects.filter(**{f"{for_field}__in": slugs}).values_list(
+            for_field, flat=True
+        )
+    )
+    unique = []
+    for slug in slugs:
+        if slug in taken or not slug:
+            slug = slug + "-" + uuid.uuid4().hex[:8]
+        taken.add(slug)
+        unique.append(slug)
+    return unique
+
+
 def is_latin(word: str) -> bool:
     """Checks if a word is written in Latin script.
 
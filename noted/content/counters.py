@@ -0,0 +1,176 @@
+"""The module buffers note views and flushes them to the database.
+
+A view of a note increments a counter in a buffer instead of updating
+the note row, the buffer is flushed by `flush_note_views_task` (a
+periodic task) with one bulk UPDATE per batch of notes.
+
+The buffer backend is set by the `VIEW_COUNTER` setting (a dotted path
+to a :class:`ViewCounter` subclass).
+
+**Classes**
+    ViewCounter: a base class for view buffers.
+    LocalViewCounter: buffers views in a process memory.
+    RedisViewCounter: buffers views in a Redis hash.
+
+**Functions**
+    get_view_counter: returns the buffer set in the settings.
+    count_view: counts a view of a note by a request.
+    flush_views: moves buffered views to the database.
+"""
+
+import functools
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+from django_redis import get_redis_connection
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+from .models import Note
+
+
+# The session key of IDs of notes viewed in a session.
+VIEWED_NOTES_SESSION_KEY = "viewed_notes"
+# Number of note IDs kept in a session for de-duplication.
+MAX_VIEWED_NOTES = 200
+
+FLUSH_VIEWS_SQL = """
+UPDATE {table} SET views = {table}.views + buffered.views
+FROM (VALUES {values}) AS buffered (id, views)
+WHERE {table}.id = buffered.id
+"""
+
+
+class ViewCounter:
+    """A base class for buffers of note views."""
+
+    def incr(self, note_id: int, amount: int = 1):
+        """Add `amount` views of a note to the buffer."""
+        raise NotImplementedError
+
+    def pop(self) -> Dict[int, int]:
+        """Return buffered views ({note id: views}) and empty the buffer."""
+        raise NotImplementedError
+
+    def needs_inline_flush(self) -> bool:
+        """Return True if the buffer is flushed by the process itself."""
+        return False
+
+
+class LocalViewCounter(ViewCounter):
+    """Buffers views in a process memory (for development and tests).
+
+    A periodic task can't reach the memory of web processes, so views are
+    flushed by the process that counts them every
+    `VIEW_COUNTER_FLUSH_INTERVAL` seconds.
+    """
+
+    def __init__(self):
+        self._views: Counter = Counter()
+        self._lock = threading.Lock()
+        self._popped = time.monotonic()
+
+    def incr(self, note_id: int, amount: int = 1):
+        with self._lock:
+            self._views[note_id] += amount
+
+    def pop(self) -> Dict[int, int]:
+        with self._lock:
+            views, self._views = dict(self._views), Counter()
+            self._popped = time.monotonic()
+        return views
+
+    def needs_inline_flush(self) -> bool:
+        elapsed = time.monotonic() - self._popped
+        return elapsed >= settings.VIEW_COUNTER_FLUSH_INTERVAL
+
+
+class RedisViewCounter(ViewCounter):
+    """Buffers views in a Redis hash of the default cache (`HINCRBY`)."""
+
+    @property
+    def key(self) -> str:
+        return cache.make_key("note_views")
+
+    @property
+    def redis(self):
+        return get_redis_connection("default")
+
+    def incr(self, note_id: int, amount: int = 1):
+        self.redis.hincrby(self.key, note_id, amount)
+
+    def pop(self) -> Dict[int, int]:
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.hgetall(self.key)
+        pipeline.delete(self.key)
+        views, _ = pipeline.execute()
+        return {int(note_id): int(count) for note_id, count in views.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def _load_view_counter(path: str) -> ViewCounter:
+    return import_string(path)()
+
+
+def get_view_counter() -> ViewCounter:
+    """Return an instance of the buffer set in `VIEW_COUNTER`."""
+    return _load_view_counter(settings.VIEW_COUNTER)
+
+
+def count_view(request, note: Note) -> bool:
+    """Count a view of `note`.
+
+    If `VIEW_COUNTER_SESSION_DEDUP` is set, a note is counted once
+    per session.
+
+    Returns:
+        True if the view was counted.
+    """
+    if settings.VIEW_COUNTER_SESSION_DEDUP:
+        viewed = request.session.get(VIEWED_NOTES_SESSION_KEY, [])
+        if note.pk in viewed:
+            return False
+        viewed.append(note.pk)
+        request.session[VIEWED_NOTES_SESSION_KEY] = viewed[-MAX_VIEWED_NOTES:]
+    counter = get_view_counter()
+    counter.incr(note.pk)
+    if counter.needs_inline_flush():
+        flush_views()
+    return True
+
+
+def flush_views(batch_size: int = 1000) -> int:
+    """Add buffered views to `views` of notes.
+
+    Views are returned to the buffer if the update is failed.
+
+    Returns:
+        A number of updated notes.
+    """
+    counter = get_view_counter()
+    views = list(counter.pop().items())
+    updated = 0
+    table = connection.ops.quote_name(Note._meta.db_table)
+    try:
+        with transaction.atomic():
+            for start in range(0, len(views), batch_size):
+                end = start + batch_size
+                batch = views[start:end]
+                values = ", ".join(["(%s, %s)"] * len(batch))
+                params = [value for row in batch for value in row]
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        FLUSH_VIEWS_SQL.format(table=table, values=values),
+                        params,
+                    )
+                    updated += cursor.rowcount
+    except Exception:
+        for note_id, count in views:
+            counter.incr(note_id, count)
+        raise
+    return updated
@@ -0,0 +1,144 @@
+"""The module deletes and anonymizes notes in bulk (by chunks of IDs).
+
+`QuerySet.delete` sends signals for every note and collects likes,
+bookmarks, tagged items and feed entries of every note. Bulk functions
+delete rows of a chunk by one query per table (`_raw_delete`) and do what
+the signals do for the whole chunk.
+
+**Functions**
+    delete_notes: deletes notes without signals.
+    anonymize_notes: makes notes anonymous.
+    delete_author_notes: deletes or anonymizes notes of a user by chunks.
+"""
+
+from collections import Counter, defaultdict
+from typing import Callable, List, Optional
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from common.cache import invalidate
+from tags.models import UnicodeTaggedItem
+
+from .exports import delete_exports
+from .fragments import expire_note_cards
+from .models import FeedEntry, Note, OrphanCandidate
+from .signals import change_total_likes, count_author_likes
+
+
+def raw_delete(queryset) -> int:
+    """Delete rows of a queryset by one query (without signals)."""
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_notes(note_ids: List[int]) -> int:
+    """Delete notes by one query per related table.
+
+    Counters of parent notes (`forks_count`) and authors (`total_likes`)
+    are decreased, sources and tags of the notes are recorded as orphan
+    candidates, exports are removed after the commit.
+
+    Returns:
+        A number of deleted notes.
+    """
+    notes = Note.objects.filter(pk__in=note_ids)
+    likes = Note.likes.through.objects.filter(note_id__in=note_ids)
+    author_likes = count_author_likes(notes)
+    change_total_likes(
+        {author: -number for author, number in author_likes.items()}
+    )
+    forks = Counter(
+        notes.exclude(fork=None)
+        .exclude(fork_id__in=note_ids)
+        .values_list("fork_id", flat=True)
+    )
+    fork_ids_by_delta = defaultdict(list)
+    for fork_id, number in forks.items():
+        fork_ids_by_delta[number].append(fork_id)
+    for number, fork_ids in fork_ids_by_delta.items():
+        Note.objects.change_counter(fork_ids, "forks_count", -number)
+    Note.objects.filter(fork_id__in=note_ids).update(fork=None)
+    OrphanCandidate.objects.record(
+        OrphanCandidate.SOURCE,
+        notes.exclude(source=None)
+        .values_list("source_id", flat=True)
+        .distinct(),
+    )
+    tagged_items = UnicodeTaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Note),
+        object_id__in=note_ids,
+    )
+    OrphanCandidate.objects.record(
+        OrphanCandidate.TAG,
+        tagged_items.values_list("tag_id", flat=True).distinct(),
+    )
+    for queryset in (
+        tagged_items,
+        likes,
+        Note.bookmarks.through.objects.filter(note_id__in=note_ids),
+        FeedEntry.objects.filter(note_id__in=note_ids),
+    ):
+        raw_delete(queryset)
+    deleted = raw_delete(notes)
+    invalidate(Note, UnicodeTaggedItem)
+    note_ids = list(note_ids)
+    transaction.on_commit(lambda: delete_exports(note_ids))
+    return deleted
+
+
+def anonymize_notes(note_ids: List[int]) -> int:
+    """Make notes anonymous, remove them from feeds of followers of the
+    authors and expire their cached cards. Likes of the notes are
+    subtracted from `total_likes` of the authors.
+
+    Returns:
+        A number of updated notes.
+    """
+    notes = Note.objects.filter(pk__in=note_ids)
+    raw_delete(
+        FeedEntry.objects.filter(
+            note_id__in=note_ids, reason=FeedEntry.FOLLOWING
+        )
+    )
+    expire_note_cards(notes.values_list("pk", "modified"))
+    author_likes = count_author_likes(notes)
+    change_total_likes(
+        {author: -number for author, number in author_likes.items()}
+    )
+    return notes.update(anonymous=True)
+
+
+def delete_author_notes(
+    author_id: int,
+    keep_notes: bool = False,
+    chunk_size: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """Delete (or anonymize) all notes of a user, a chunk per transaction.
+
+    Args:
+        author_id: A primary key of the author.
+        keep_notes: Anonymize notes instead of deleting.
+        chunk_size: A number of notes processed at once
+            (`ACCOUNT_DELETION_CHUNK_SIZE` by default).
+        progress: A callable called with numbers of processed and all
+            notes after every chunk.
+
+    Returns:
+        A number of processed notes.
+    """
+    chunk_size = chunk_size or settings.ACCOUNT_DELETION_CHUNK_SIZE
+    note_ids = list(
+        Note.objects.filter(author_id=author_id)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    process = anonymize_notes if keep_notes else delete_notes
+    for start in range(0, len(note_ids), chunk_size):
+        end = min(start + chunk_size, len(note_ids))
+        with transaction.atomic():
+            process(note_ids[start:end])
+        if progress is not None:
+            progress(end, len(note_ids))
+    return len(note_ids)
@@ -0,0 +1,122 @@
+"""The module stores exported files of notes (md, html, pdf).
+
+An export is generated once for a version of a note (its `modified` time,
+its render status and its source, exports include the source) and saved to
+the default storage as `exports/<note pk>/<version>.<format>`, a new export
+removes exports of older versions of the note. PDF files are
+generated by `export_note_task` (wkhtmltopdf takes seconds), other formats
+are generated on a request.
+
+**Functions**
+    note_version: returns a version of a note.
+    export_name: returns a storage name of an export.
+    export_etag: returns an ETag of an export.
+    get_export: returns a name of an existing export.
+    create_export: generates an export and saves it.
+    start_export: queues generation of an export once.
+    delete_exports: removes exports of notes.
+"""
+
+import hashlib
+import posixpath
+import uuid
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .models import Note
+
+
+EXPORTS_DIR = "exports"
+CONTENT_TYPES = {
+    "md": "text/markdown; charset=UTF-8",
+    "html": "text/html; charset=utf-8",
+    "pdf": "application/pdf",
+}
+# Formats generated by a Celery task.
+ASYNC_FORMATS = {"pdf"}
+# A key of an ID of a task generating an export.
+EXPORT_TASK_KEY = "export_task:{}"
+
+
+def note_version(note: Note) -> str:
+    """Return a version of a note exports are generated for.
+
+    The body HTML is replaced when a rendering note is rendered and
+    a source is changed without the note, so the render status and
+    the source are a part of the version besides `modified`.
+    """
+    state = [note.render_status]
+    if note.source_id:
+        state += [str(note.source_id), note.source.title, note.source.link]
+    digest = hashlib.sha1("\n".join(state).encode("utf-8")).hexdigest()
+    return "{}-{}".format(note.modified.strftime("%Y%m%d%H%M%S%f"), digest[:8])
+
+
+def export_name(note: Note, filetype: str) -> str:
+    """Return a storage name of an export of the note version."""
+    return f"{EXPORTS_DIR}/{note.pk}/{note_version(note)}.{filetype}"
+
+
+def export_etag(note: Note, filetype: str) -> str:
+    return f'"{note.pk}-{note_version(note)}-{filetype}"'
+
+
+def get_export(note: Note, filetype: str) -> Optional[str]:
+    """Return a storage name of the export if it is generated."""
+    name = export_name(note, filetype)
+    return name if default_storage.exists(name) else None
+
+
+def create_export(note: Note, filetype: str) -> str:
+    """Generate an export of a note and save it to the storage.
+
+    Exports of older versions of the note are removed.
+
+    Returns:
+        A storage name of the export.
+    """
+    name = get_export(note, filetype)
+    if name:
+        return name
+    file = note.generate_file(filetype=filetype)
+    name = default_storage.save(
+        export_name(note, filetype), ContentFile(file.read())
+    )
+    directory = posixpath.dirname(name)
+    version = note_version(note)
+    for filename in default_storage.listdir(directory)[1]:
+        if not filename.startswith(version):
+            default_storage.delete(posixpath.join(directory, filename))
+    return name
+
+
+def start_export(note: Note, filetype: str) -> str:
+    """Queue `export_note_task` unless the export is being generated.
+
+    Returns:
+        An ID of the task generating the export.
+    """
+    from .tasks import export_note_task
+
+    key = EXPORT_TASK_KEY.format(export_name(note, filetype))
+    task_id = str(uuid.uuid4())
+    if cache.add(key, task_id, settings.EXPORT_TASK_TIMEOUT):
+        export_note_task.apply_async((note.pk, filetype), task_id=task_id)
+        return task_id
+    return cache.get(key) or task_id
+
+
+def delete_exports(note_ids: Iterable[int]):
+    """Remove all exports of notes."""
+    for note_id in note_ids:
+        directory = f"{EXPORTS_DIR}/{note_id}"
+        try:
+            filenames = default_storage.listdir(directory)[1]
+        except FileNotFoundError:
+            continue
+        for filename in filenames:
+            default_storage.delete(posixpath.join(directory, filename))
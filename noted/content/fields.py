@@ -1,6 +1,6 @@
 from simplemde.fields import SimpleMDEField
 
-from django.db.models import TextField
+from django.db.models import TextField, signals
 
 from .markdown import pick_markdown_to_html
 
@@ -25,6 +25,9 @@ class MarkdownField(SimpleMDEField):
     HTML code generates by custom functions based on the value of this field,
     and then puts HTML code to another specified model's field.
 
+    The field remembers the Markdown text the rendered field was generated
+    from, so saving an instance with unchanged Markdown skips rendering.
+
     """
 
     def __init__(self, *args, rendered_field: str | None = None, **kwargs):
@@ -37,13 +40,49 @@ class MarkdownField(SimpleMDEField):
             kwargs["rendered_field"] = self.rendered_field
         return name, path, args, kwargs
 
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        if self.rendered_field and not cls._meta.abstract:
+            signals.post_init.connect(
+                self.remember_rendered_source, sender=cls
+            )
+
+    @property
+    def rendered_source_attname(self) -> str:
+        return f"_{self.attname}_rendered_source"
+
+    def remember_rendered_source(self, instance, **kwargs):
+        """Store the Markdown text the rendered field was generated from.
+
+        Deferred fields are not loaded, so the next save renders HTML.
+        """
+        raw = instance.__dict__.get(self.attname)
+        html = instance.__dict__.get(self.rendered_field)
+        instance.__dict__[self.rendered_source_attname] = raw if html else None
+
+    def set_rendered(self, instance, html: str):
+        """Put `html` rendered from the current value to the rendered field.
+
+        The next save of the instance doesn't render the value again.
+        """
+        setattr(instance, self.rendered_field, html)
+        setattr(
+            instance,
+            self.rendered_source_attname,
+            getattr(instance, self.attname),
+        )
+
+    def render(self, instance):
+        """Render the value to the rendered field unless it is rendered."""
+        value = getattr(instance, self.attname)
+        source = getattr(instance, self.rendered_source_attname, None)
+        if value != source:
+            self.set_rendered(instance, pick_markdown_to_html(value))
+
     def pre_save(self, model_instance, add):
         value = super().pre_save(model_instance, add)
 
-        if not self.rendered_field:
-            return value
-
-        html = pick_markdown_to_html(value)
-        setattr(model_instance, self.rendered_field, html)
+        if self.rendered_field:
+            self.render(model_instance)
 
         return value
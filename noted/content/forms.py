@@ -1,10 +1,13 @@
+import zipfile
+
 from taggit.forms import TagWidget
 
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
-from .models import Note, Source
+from .models import MAX_NOTE_TAGS, MAX_TAG_LEN, Note, Source
 
 
 class NoteForm(forms.ModelForm):
@@ -93,19 +96,23 @@ class NoteForm(forms.ModelForm):
     def clean_tags(self):
         """Validates the `tags` field.
 
-        Validates the number of tags (less than 4) and tag length
-        (less than 25 symbols).
+        Validates the number of tags (`MAX_NOTE_TAGS` at most) and tag
+        length (`MAX_TAG_LEN` symbols at most).
         """
         tags = self.cleaned_data["tags"]
-        if len(tags) > 3:
-            raise ValidationError(_("You can add only 3 tags."))
+        if len(tags) > MAX_NOTE_TAGS:
+            raise ValidationError(
+                _("You can add only %(number)s tags.")
+                % {"number": MAX_NOTE_TAGS}
+            )
         for i, tag in enumerate(tags):
-            if len(tag) > 25:
+            if len(tag) > MAX_TAG_LEN:
                 raise ValidationError(
                     _(
-                        f"Length of {i+1} tag should be \
-                            less than 25 symbols."
+                        "Length of %(index)s tag should be less than "
+                        "%(length)s symbols."
                     )
+                    % {"index": i + 1, "length": MAX_TAG_LEN}
                 )
         return tags
 
@@ -121,3 +128,18 @@ class NoteForm(forms.ModelForm):
             cleaned_data["source"] = source
             if "source" in self.errors:
                 del self.errors["source"]
+
+
+class NoteImportForm(forms.Form):
+    """A form of a zip archive of Markdown files (see `content.imports`)."""
+
+    archive = forms.FileField(label=_("Archive"))
+
+    def clean_archive(self):
+        archive = self.cleaned_data["archive"]
+        if archive.size > settings.NOTE_IMPORT_MAX_SIZE:
+            raise ValidationError(_("The archive is too large."))
+        if not zipfile.is_zipfile(archive):
+            raise ValidationError(_("Upload a zip archive."))
+        archive.seek(0)
+        return archive
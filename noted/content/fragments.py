@@ -0,0 +1,104 @@
+"""The module caches rendered HTML fragments of notes.
+
+Markup of a note card is the same for all viewers except the like and
+bookmark state and the counters. A card is cached without them (with
+overlay placeholders instead) by the note primary key, `modified` and
+the language, the placeholders are filled for each viewer after the
+cache lookup. All cards of a list are fetched by one `get_many`.
+
+**Functions**
+    note_card_key: builds a cache key of a note card.
+    render_note_cards: renders cards of notes using the cache.
+    expire_note_cards: deletes cached cards of notes.
+    expire_profile_header: deletes a cached profile header of a user.
+"""
+
+from datetime import datetime
+from typing import Iterable, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import render_to_string
+from django.utils.html import conditional_escape
+from django.utils.safestring import SafeString, mark_safe
+from django.utils.translation import get_language
+
+from .models import Note
+
+
+NOTE_CARD_TEMPLATE = "content/note_list_layout.html"
+# Names of cached fragments of `users/profile_sidebar_layout.html`.
+PROFILE_FRAGMENTS = ("profile_header", "profile_about")
+
+# Placeholders of per-viewer values in cached cards. Escaping replaces `<`
+# in user content, so the content can't contain a placeholder.
+OVERLAY = {
+    name: mark_safe(f"<note-overlay {name}>")
+    for name in ("bookmarked", "liked", "likes_count", "views")
+}
+
+
+def note_card_key(note_id: int, modified: datetime, language: str) -> str:
+    """Build a cache key of a note card."""
+    return f"note_card:{language}:{note_id}:{modified.timestamp()}"
+
+
+def apply_overlay(html: str, note: Note) -> str:
+    """Fill overlay placeholders of a cached card with values of `note`."""
+    values = {
+        "bookmarked": "-fill" if getattr(note, "is_bookmarked", False) else "",
+        "liked": "-fill" if getattr(note, "is_liked", False) else "",
+        "likes_count": str(note.likes_count),
+        "views": str(note.views),
+    }
+    for name, placeholder in OVERLAY.items():
+        html = html.replace(placeholder, conditional_escape(values[name]))
+    return html
+
+
+def render_note_cards(notes: Iterable[Note]) -> SafeString:
+    """Render cards of `notes`, missing cards are rendered and cached.
+
+    Notes should be queried by `NoteQuerySet.optimize` and `for_viewer`.
+    """
+    notes = list(notes)
+    language = get_language()
+    keys = [note_card_key(note.pk, note.modified, language) for note in notes]
+    cards = cache.get_many(keys)
+    missing = {}
+    for key, note in zip(keys, notes):
+        if key not in cards:
+            missing[key] = render_to_string(
+                NOTE_CARD_TEMPLATE, {"note": note, "overlay": OVERLAY}
+            )
+    if missing:
+        cache.set_many(missing, settings.FRAGMENT_CACHE_TIMEOUT)
+        cards.update(missing)
+    return mark_safe(
+        "".join(
+            apply_overlay(cards[key], note) for key, note in zip(keys, notes)
+        )
+    )
+
+
+def expire_note_cards(notes: Iterable[Tuple[int, datetime]]):
+    """Delete cached cards of notes by pairs (primary key, `modified`)."""
+    cache.delete_many(
+        [
+            note_card_key(note_id, modified, language)
+            for note_id, modified in notes
+            for language, _ in settings.LANGUAGES
+        ]
+    )
+
+
+def expire_profile_header(user_id: int):
+    """Delete cached fragments of a profile sidebar of a user."""
+    cache.delete_many(
+        [
+            make_template_fragment_key(fragment, [user_id, language])
+            for fragment in PROFILE_FRAGMENTS
+            for language, _ in settings.LANGUAGES
+        ]
+    )
@@ -0,0 +1,385 @@
+"""The module imports notes from zip archives of Markdown files.
+
+Files of an archive are decompressed one by one while the archive is read,
+every `.md` file becomes a note of a user. A file can start with a front
+matter (`title`, `tags`, `source`, `source_type`, `summary`, `draft`):
+
+    ---
+    title: Clean code
+    tags: [python, style]
+    source: Clean Code
+    source_type: book
+    ---
+
+The file name is the default title. Notes are created by batches with
+`bulk_create`: bodies are rendered (with the preview, the language and the
+weight) in a process pool, sources and tags are resolved by maps of names
+to IDs filled by one query per batch, missing ones are created in bulk.
+
+Signals of created notes aren't sent: imported notes don't notify
+followers of the author and aren't put to home feeds.
+
+**Classes**
+    NoteImporter: creates notes of a user from archives.
+
+**Functions**
+    parse_front_matter: splits a Markdown text to a front matter and a body.
+    render_body: computes fields derived from a body (a pool worker).
+"""
+
+import multiprocessing
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import PurePosixPath
+from typing import Callable, Dict, List, Optional, Tuple
+
+from taggit.models import Tag
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import close_caches
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import translation
+
+from common.cache import invalidate
+from common.text import generate_unique_slugs
+from tags.models import UnicodeTaggedItem
+from users.models import User
+
+from .models import MAX_NOTE_TAGS, MAX_TAG_LEN, Note, Source
+
+
+FRONT_MATTER = re.compile(r"\A---[ \t]*\n(.*?)\n---[ \t]*(?:\n|\Z)", re.S)
+LIST_ITEM = re.compile(r"\s*-\s+(.*)")
+TRUE_VALUES = {"true", "yes", "1"}
+# Fields of a note computed by `render_body`.
+RENDERED_FIELDS = (
+    "body_html",
+    "preview_text",
+    "image_url",
+    "lang",
+    "weight",
+    "render_status",
+)
+
+
+def unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    return value
+
+
+def parse_front_matter(text: str) -> Tuple[dict, str]:
+    """Split a Markdown text to a front matter and a body.
+
+    Values are strings, lists (`[a, b]` or `- a` lines) are lists of
+    strings, keys are lowercased.
+
+    Returns:
+        A tuple (front matter, body).
+    """
+    match = FRONT_MATTER.match(text)
+    if not match:
+        return {}, text
+    meta, key = {}, None
+    for line in match.group(1).splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        item = LIST_ITEM.match(line)
+        if item and key is not None:
+            if not isinstance(meta[key], list):
+                meta[key] = []
+            meta[key].append(unquote(item.group(1)))
+            continue
+        name, separator, value = line.partition(":")
+        if not separator:
+            continue
+        key, value = name.strip().lower(), value.strip()
+        if value.startswith("[") and value.endswith("]"):
+            meta[key] = [
+                unquote(item)
+                for item in value[1:-1].split(",")
+                if item.strip()
+            ]
+        else:
+            meta[key] = unquote(value)
+    body_start = match.end()
+    return meta, text[body_start:]
+
+
+def truncate(model, field: str, value: str) -> str:
+    """Cut a value to the maximum length of a field of a model."""
+    return value[: model._meta.get_field(field).max_length]
+
+
+def parse_tags(value) -> List[str]:
+    """Return valid tags (lowercase, without `#` and spaces) of a value."""
+    if isinstance(value, str):
+        value = value.split(",")
+    tags = []
+    for tag in value:
+        tag = tag.strip().lstrip("#").lower().replace(" ", "-")
+        if tag and len(tag) <= MAX_TAG_LEN and tag not in tags:
+            tags.append(tag)
+    return tags[:MAX_NOTE_TAGS]
+
+
+def render_body(fields: dict) -> dict:
+    """Render a body and compute fields derived from it.
+
+    Runs in a worker process of the pool, the database isn't queried.
+
+    Args:
+        fields: Fields of a note the derived fields depend on
+            (`body_raw`, `summary`, `source_id`).
+
+    Returns:
+        Values of `RENDERED_FIELDS`.
+    """
+    note = Note(**fields)
+    note.render()
+    return {name: getattr(note, name) for name in RENDERED_FIELDS}
+
+
+class NoteImporter:
+    """Creates notes of a user from zip archives of Markdown files.
+
+    Usage:
+        >>> importer = NoteImporter(user, processes=4)
+        >>> with open("vault.zip", "rb") as file:
+        ...     importer.import_archive(file)
+
+    Args:
+        author: An author of notes.
+        draft: Make notes drafts unless a front matter sets `draft`.
+        batch_size: A number of notes created at once.
+        processes: A number of processes rendering bodies (bodies are
+            rendered by the current process if it is 1).
+        max_notes: A maximum number of imported files of an archive.
+    """
+
+    def __init__(
+        self,
+        author: User,
+        draft: bool = True,
+        batch_size: int = 500,
+        processes: int = 1,
+        max_notes: Optional[int] = None,
+    ):
+        self.author = author
+        self.draft = draft
+        self.batch_size = batch_size
+        self.processes = processes
+        self.max_notes = max_notes
+        self.sources: Dict[Tuple[str, str], int] = {}
+        self.tags: Dict[str, int] = {}
+        with translation.override("en"):
+            self.source_types = {
+                str(name).lower(): code for code, name in Source.TYPES
+            }
+        self.source_types.update({code: code for code, _ in Source.TYPES})
+
+    def get_members(self, archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+        """Return Markdown files of an archive (hidden files are skipped)."""
+        members = []
+        for info in archive.infolist():
+            path = PurePosixPath(info.filename)
+            if (
+                info.is_dir()
+                or path.suffix.lower() != ".md"
+                or any(part.startswith((".", "__")) for part in path.parts)
+                or info.file_size > settings.NOTE_IMPORT_MAX_FILE_SIZE
+            ):
+                continue
+            members.append(info)
+        if self.max_notes is not None:
+            members = members[: self.max_notes]
+        return members
+
+    def read_member(self, archive, info: zipfile.ZipInfo) -> Optional[dict]:
+        """Decompress and parse a file, return fields of a note."""
+        max_size = settings.NOTE_IMPORT_MAX_FILE_SIZE
+        with archive.open(info) as file:
+            data = file.read(max_size + 1)
+        if len(data) > max_size:
+            return None
+        meta, body = parse_front_matter(data.decode("utf-8-sig", "replace"))
+        draft = meta.get("draft")
+        if isinstance(draft, str) and draft:
+            draft = draft.lower() in TRUE_VALUES
+        else:
+            draft = self.draft
+        source = meta.get("source")
+        if isinstance(source, str) and source:
+            source_type = self.source_types.get(
+                str(meta.get("source_type", "")).lower(), Source.DEFAULT
+            )
+            source = (source_type, truncate(Source, "title", source))
+        else:
+            source = None
+        title = meta.get("title") or PurePosixPath(info.filename).stem
+        return {
+            "title": truncate(Note, "title", str(title)),
+            "body_raw": body.strip(),
+            "summary": truncate(Note, "summary", str(meta.get("summary", ""))),
+            "draft": draft,
+            "source": source,
+            "tags": parse_tags(meta.get("tags") or []),
+        }
+
+    def resolve_sources(self, keys: set):
+        """Put IDs of sources ({(type, title): id}) to the map, create
+        missing sources."""
+        keys -= set(self.sources)
+        if not keys:
+            return
+        for pk, type_code, title in Source.objects.filter(
+            title__in={title for _, title in keys}
+        ).values_list("pk", "type", "title"):
+            self.sources.setdefault((type_code, title), pk)
+        missing = sorted(keys - set(self.sources))
+        slugs = generate_unique_slugs(
+            Source, [title for _, title in missing], latin=True
+        )
+        sources = Source.objects.bulk_create(
+            Source(type=type_code, title=title, slug=slug)
+            for (type_code, title), slug in zip(missing, slugs)
+        )
+        for source in sources:
+            self.sources[(source.type, source.title)] = source.pk
+
+    def resolve_tags(self, names: set):
+        """Put IDs of tags ({name: id}) to the map, create missing tags."""
+        names -= set(self.tags)
+        if not names:
+            return
+        missing = names - self.load_tags(names)
+        if missing:
+            missing = sorted(missing)
+            slugs = generate_unique_slugs(Tag, missing, latin=True)
+            Tag.objects.bulk_create(
+                (
+                    Tag(name=name, slug=slug)
+                    for name, slug in zip(missing, slugs)
+                ),
+                ignore_conflicts=True,
+            )
+            self.load_tags(set(missing))
+
+    def load_tags(self, names: set) -> set:
+        """Put IDs of existing tags to the map, return found names."""
+        tags = (
+            Tag.objects.annotate(lower_name=Lower("name"))
+            .filter(lower_name__in=names)
+            .values_list("lower_name", "pk")
+        )
+        found = set()
+        for name, pk in tags:
+            self.tags.setdefault(name, pk)
+            found.add(name)
+        return found
+
+    def render(self, executor, notes: List[dict]) -> List[dict]:
+        fields = [
+            {
+                "body_raw": note["body_raw"],
+                "summary": note["summary"],
+                "source_id": note["source_id"],
+            }
+            for note in notes
+        ]
+        if executor is None:
+            return [render_body(note_fields) for note_fields in fields]
+        chunksize = max(1, len(fields) // (self.processes * 4))
+        return list(executor.map(render_body, fields, chunksize=chunksize))
+
+    def create_notes(self, executor, batch: List[dict]) -> int:
+        """Create notes of a batch with their sources and tags."""
+        self.resolve_sources({note["source"] for note in batch} - {None})
+        self.resolve_tags({tag for note in batch for tag in note["tags"]})
+        for note in batch:
+            note["source_id"] = self.sources.get(note.pop("source"))
+        rendered = self.render(executor, batch)
+        slugs = generate_unique_slugs(
+            Note, [note["title"] for note in batch], latin=True
+        )
+        body = Note._meta.get_field("body_raw")
+        notes = []
+        for fields, values, slug in zip(batch, rendered, slugs):
+            note = Note(
+                author=self.author,
+                slug=slug,
+                title=fields["title"],
+                body_raw=fields["body_raw"],
+                summary=fields["summary"],
+                draft=fields["draft"],
+                source_id=fields["source_id"],
+                **values,
+            )
+            body.set_rendered(note, values["body_html"])
+            notes.append(note)
+        with transaction.atomic():
+            notes = Note.objects.bulk_create(notes)
+            note_ct = ContentType.objects.get_for_model(Note)
+            UnicodeTaggedItem.objects.bulk_create(
+                UnicodeTaggedItem(
+                    content_type=note_ct,
+                    object_id=note.pk,
+                    tag_id=self.tags[tag],
+                )
+                for note, fields in zip(notes, batch)
+                for tag in fields["tags"]
+                if tag in self.tags
+            )
+        return len(notes)
+
+    def import_archive(
+        self, file, progress: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """Create notes from Markdown files of a zip archive.
+
+        Args:
+            file: A file object of the archive (seekable).
+            progress: A callable called with numbers of processed and all
+                files after every batch.
+
+        Returns:
+            A number of created notes.
+        """
+        created = 0
+        executor = None
+        if self.processes > 1:
+            # Workers are forked: they inherit configured Django (`spawn`,
+            # the default on macOS, starts bare interpreters), inherited
+            # cache connections are closed and opened by workers again.
+            executor = ProcessPoolExecutor(
+                self.processes,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=close_caches,
+            )
+        try:
+            with zipfile.ZipFile(file) as archive:
+                members = self.get_members(archive)
+                for start in range(0, len(members), self.batch_size):
+                    end = min(start + self.batch_size, len(members))
+                    batch = [
+                        fields
+                        for fields in (
+                            self.read_member(archive, info)
+                            for info in members[start:end]
+                        )
+                        if fields is not None and fields["body_raw"]
+                    ]
+                    if batch:
+                        created += self.create_notes(executor, batch)
+                    if progress is not None:
+                        progress(end, len(members))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        if created:
+            invalidate(Note, Source, UnicodeTaggedItem)
+        return created
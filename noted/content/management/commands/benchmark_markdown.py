@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from content.models import Note
+
+
+RENDERERS = {
+    "local": "content.markdown.LocalMarkdownRenderer",
+    "github": "content.markdown.GitHubMarkdownRenderer",
+}
+
+
+class Command(BaseCommand):
+    """Compare Markdown renderers on a corpus of notes from the database.
+
+    Usage in the terminal:
+        > python manage.py benchmark_markdown --limit 50 --renderer local
+    """
+
+    help = "Benchmark Markdown renderers on bodies of existing notes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=100,
+            help="Number of notes in the corpus.",
+        )
+        parser.add_argument(
+            "--renderer",
+            action="append",
+            choices=RENDERERS.keys(),
+            help="Renderer to benchmark (all by default).",
+        )
+
+    def handle(self, *args, **options):
+        corpus = list(
+            Note.objects.exclude(body_raw="")
+            .order_by("-created")
+            .values_list("body_raw", flat=True)[: options["limit"]]
+        )
+        if not corpus:
+            raise CommandError("There are no notes to render.")
+        self.stdout.write(
+            "Corpus: {} notes, {} chars".format(
+                len(corpus), sum(len(body) for body in corpus)
+            )
+        )
+        for name in options["renderer"] or RENDERERS.keys():
+            renderer = import_string(RENDERERS[name])()
+            timings = []
+            for body in corpus:
+                start = time.perf_counter()
+                renderer.render(body)
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                "{:<8} total: {:9.1f}ms  mean: {:7.2f}ms  "
+                "median: {:7.2f}ms  max: {:7.2f}ms".format(
+                    name,
+                    sum(timings),
+                    statistics.mean(timings),
+                    statistics.median(timings),
+                    max(timings),
+                )
+            )
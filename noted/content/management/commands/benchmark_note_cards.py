@@ -0,0 +1,96 @@
+import statistics
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+
+from content.fragments import (
+    NOTE_CARD_TEMPLATE,
+    OVERLAY,
+    apply_overlay,
+    expire_note_cards,
+    render_note_cards,
+)
+from content.models import Note
+from users.models import User
+
+
+def render_uncached(notes):
+    """Render every card by the template engine (as before the cache)."""
+    return "".join(
+        apply_overlay(
+            render_to_string(
+                NOTE_CARD_TEMPLATE, {"note": note, "overlay": OVERLAY}
+            ),
+            note,
+        )
+        for note in notes
+    )
+
+
+class Command(BaseCommand):
+    """Compare render time of a page of note cards with and without the
+    fragment cache (`content.fragments`).
+
+    The configured cache is used, run it with a real cache backend (not
+    `RedisDummyCache`).
+
+    Usage in the terminal:
+        > python manage.py benchmark_note_cards --size 100 --number 10
+    """
+
+    help = "Benchmark render time of note cards with the fragment cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=100,
+            help="Number of notes on a page.",
+        )
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=10,
+            help="Number of runs for each case.",
+        )
+
+    def measure(self, render, notes, number, before=None):
+        timings = []
+        for _ in range(number):
+            if before:
+                before()
+            start = time.perf_counter()
+            render(notes)
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        viewer = User.objects.first()
+        notes = list(
+            Note.objects.optimize()
+            .for_viewer(viewer)
+            .filter(draft=False)
+            .order_by("-created")[: options["size"]]
+        )
+        if not notes:
+            raise CommandError("There are no notes to render.")
+        versions = [(note.pk, note.modified) for note in notes]
+        number = options["number"]
+        cases = (
+            ("uncached", render_uncached, None),
+            (
+                "cold cache",
+                render_note_cards,
+                lambda: expire_note_cards(versions),
+            ),
+            ("warm cache", render_note_cards, None),
+        )
+        self.stdout.write(
+            f"Cache: {type(caches['default']).__name__}, notes: {len(notes)}"
+        )
+        self.stdout.write("{:<12} {:>10}".format("case", "time, ms"))
+        for name, render, before in cases:
+            elapsed = self.measure(render, notes, number, before)
+            self.stdout.write("{:<12} {:>10.1f}".format(name, elapsed))
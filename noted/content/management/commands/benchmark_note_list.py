@@ -0,0 +1,120 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.test.utils import CaptureQueriesContext
+
+from content.models import Note
+from users.models import User
+
+
+ORDERINGS = {
+    "relevant": ("-weight", "-created"),
+    "-datetime_created": ("-created",),
+    "views": ("-views",),
+    "likes": ("-likes_count",),
+}
+
+
+def prefetch_page(user, ordering, size):
+    """The approach used before `NoteQuerySet.optimize` and `for_viewer`."""
+    notes = list(
+        Note.objects.prefetch_related(
+            "author__profile", "source", "fork", "tags", "bookmarks", "likes"
+        )
+        .filter(draft=False)
+        .order_by(*ordering)[:size]
+    )
+    return {"notes": notes, "user_bookmarks": user.bookmarked_notes.all()}
+
+
+def projection_page(user, ordering, size):
+    notes = list(
+        Note.objects.optimize()
+        .for_viewer(user)
+        .filter(draft=False)
+        .order_by(*ordering)[:size]
+    )
+    return {"notes": notes}
+
+
+class Command(BaseCommand):
+    """Compare query count, time and memory of rendering a note list page.
+
+    A page is queried and rendered with the note card template for a viewer
+    (the user who has the most bookmarks by default).
+
+    Usage in the terminal:
+        > python manage.py benchmark_note_list --size 100
+    """
+
+    help = "Benchmark queries and memory of a note list page."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=100,
+            help="Number of notes on a page.",
+        )
+        parser.add_argument(
+            "--viewer",
+            help="Email of the viewer.",
+        )
+
+    def get_viewer(self, email):
+        if email:
+            return User.objects.get(email=email)
+        viewer = (
+            Note.bookmarks.through.objects.values("user")
+            .annotate(bookmarks=Count("*"))
+            .order_by("-bookmarks")
+            .values_list("user", flat=True)
+            .first()
+        )
+        if viewer is None:
+            viewer = User.objects.values_list("pk", flat=True).first()
+        if viewer is None:
+            raise CommandError("There are no users.")
+        return User.objects.get(pk=viewer)
+
+    def measure(self, build_page, viewer, ordering, size):
+        tracemalloc.start()
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            render_to_string(
+                "content/note_list_for_layout.html",
+                build_page(viewer, ordering, size),
+            )
+        elapsed = (time.perf_counter() - start) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return len(queries), elapsed, peak / 1024
+
+    def handle(self, *args, **options):
+        if not Note.objects.filter(draft=False).exists():
+            raise CommandError("There are no notes to list.")
+        viewer = self.get_viewer(options["viewer"])
+        size = options["size"]
+        self.stdout.write(f"Viewer: {viewer.email}, page size: {size}")
+        self.stdout.write(
+            "{:<18} {:<11} {:>8} {:>10} {:>12}".format(
+                "order", "approach", "queries", "time, ms", "memory, KiB"
+            )
+        )
+        for name, ordering in ORDERINGS.items():
+            for approach, build_page in (
+                ("prefetch", prefetch_page),
+                ("projection", projection_page),
+            ):
+                queries, elapsed, memory = self.measure(
+                    build_page, viewer, ordering, size
+                )
+                self.stdout.write(
+                    "{:<18} {:<11} {:>8} {:>10.1f} {:>12.1f}".format(
+                        name, approach, queries, elapsed, memory
+                    )
+                )
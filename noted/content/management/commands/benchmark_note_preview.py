@@ -0,0 +1,81 @@
+import timeit
+
+from bs4 import BeautifulSoup
+
+from django.core.management.base import BaseCommand
+
+from content.models import MAX_NOTE_PREVIEW_TEXT_LEN, Note
+from content.preview import parse_preview
+
+
+PARAGRAPH = (
+    "<h2>Chapter</h2><p>Lorem ipsum <b>dolor</b> sit amet, <a href='#'>"
+    "consectetur</a> adipiscing elit. Sed do eiusmod tempor incididunt "
+    "ut labore et dolore magna aliqua.</p><pre><code>x = 1</code></pre>"
+)
+IMAGE = "<p><img src='https://example.com/image.png' alt='image'></p>"
+
+
+def make_html(size: int, image_at: float) -> str:
+    """Generate HTML of `size` chars with an image at `image_at` share."""
+    paragraphs = PARAGRAPH * (size // len(PARAGRAPH) + 1)
+    position = paragraphs.find("<h2>", int(size * image_at))
+    if position < 0:
+        position = size
+    return (paragraphs[:position] + IMAGE + paragraphs[position:])[:size]
+
+
+def parse_with_soup(html: str):
+    """The two-tree BeautifulSoup approach used before `parse_preview`."""
+    text = "".join(
+        BeautifulSoup(html, features="html.parser").findAll(text=True)
+    )[:MAX_NOTE_PREVIEW_TEXT_LEN]
+    image = BeautifulSoup(html, features="html.parser").find(name="img")
+    return text, image.get("src") if image else None
+
+
+class Command(BaseCommand):
+    """Compare note preview extraction approaches on generated HTML.
+
+    Sizes go up to the `body_html` limit of :model:`content.Note`.
+
+    Usage in the terminal:
+        > python manage.py benchmark_note_preview --number 20
+    """
+
+    help = "Benchmark extraction of preview text and image from note HTML."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=20,
+            help="Number of runs for each case.",
+        )
+
+    def handle(self, *args, **options):
+        max_size = Note._meta.get_field("body_html").max_length
+        number = options["number"]
+        self.stdout.write(
+            "{:>7} {:>6} {:>14} {:>14}".format(
+                "size", "image", "soup, ms", "single, ms"
+            )
+        )
+        for size in (1000, 10000, 35000, max_size):
+            for image_at in (0.0, 0.5, 1.0):
+                html = make_html(size, image_at)
+                soup = timeit.timeit(
+                    lambda: parse_with_soup(html), number=number
+                )
+                single = timeit.timeit(
+                    lambda: parse_preview(html, MAX_NOTE_PREVIEW_TEXT_LEN),
+                    number=number,
+                )
+                self.stdout.write(
+                    "{:>7} {:>6} {:>14.3f} {:>14.3f}".format(
+                        size,
+                        f"{int(image_at * 100)}%",
+                        soup / number * 1000,
+                        single / number * 1000,
+                    )
+                )
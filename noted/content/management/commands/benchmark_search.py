@@ -0,0 +1,101 @@
+import statistics
+import time
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from content.models import Note
+
+
+QUERIES = ("database index", "search", "книга", "история науки", "missing")
+
+
+def inline_search(query: str):
+    """The query-time `SearchVector` approach used before `search_vector`."""
+    search_vector = (
+        SearchVector("title", weight="A")
+        + SearchVector("summary", weight="A")
+        + SearchVector("body_raw", weight="B")
+    )
+    return (
+        Note.objects.filter(draft=False)
+        .annotate(rank=SearchRank(search_vector, SearchQuery(query)))
+        .filter(rank__gte=0.2)
+        .order_by("-rank")
+    )
+
+
+def stored_search(query: str):
+    """Full text part of `NoteManager.search` (the stored `search_vector`)."""
+    search_query = SearchQuery(query, config="english") | SearchQuery(
+        query, config="russian"
+    )
+    return (
+        Note.objects.filter(draft=False, search_vector=search_query)
+        .annotate(rank=SearchRank(F("search_vector"), search_query))
+        .order_by("-rank")
+    )
+
+
+class Command(BaseCommand):
+    """Compare query-time and stored search vectors of notes.
+
+    Trigram similarity of `NoteManager.search` is left out, both cases
+    measure only the full text search part. Run it on a seeded database
+    (see `seed_content`).
+
+    Usage in the terminal:
+        > python manage.py benchmark_search --number 10
+    """
+
+    help = "Benchmark full text search of notes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=10,
+            help="Number of runs for each query.",
+        )
+        parser.add_argument(
+            "--query",
+            action="append",
+            help="Query to search (a set of sample queries by default).",
+        )
+
+    def handle(self, *args, **options):
+        total = Note.objects.filter(draft=False).count()
+        if not total:
+            raise CommandError("There are no notes to search.")
+        self.stdout.write(f"Public notes: {total}")
+        self.stdout.write(
+            "{:<16} {:>8} {:>13} {:>13}".format(
+                "query", "found", "inline, ms", "stored, ms"
+            )
+        )
+        number = options["number"]
+        for query in options["query"] or QUERIES:
+            results = {}
+            for name, search in (
+                ("inline", inline_search),
+                ("stored", stored_search),
+            ):
+                timings = []
+                for _ in range(number):
+                    start = time.perf_counter()
+                    found = list(search(query)[:20])
+                    timings.append((time.perf_counter() - start) * 1000)
+                results[name] = statistics.median(timings)
+            self.stdout.write(
+                "{:<16} {:>8} {:>13.2f} {:>13.2f}".format(
+                    query[:16],
+                    len(found),
+                    results["inline"],
+                    results["stored"],
+                )
+            )
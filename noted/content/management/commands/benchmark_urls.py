@@ -0,0 +1,154 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from content.models import Note, Source
+from users.models import User
+
+
+# Endpoints requested by JavaScript (with the `X-Requested-With` header).
+AJAX_ENDPOINTS = {"search sources"}
+
+
+class QueryCounter:
+    """Counts queries of a connection (unlike `CaptureQueriesContext` it
+    isn't limited by the size of the query log).
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(timings: list, percent: int) -> float:
+    """A percentile of sorted `timings` (nearest rank)."""
+    index = max(0, round(len(timings) * percent / 100) - 1)
+    return timings[index]
+
+
+class Command(BaseCommand):
+    """Load benchmark main pages of the content app.
+
+    Every endpoint is requested `--number` times by the test client, p50
+    and p95 of latency and a number of queries are reported. Pages of a
+    user are requested by the author with the most notes. The configured
+    cache is used, run it on a seeded database (see `seed_content`).
+
+    Usage in the terminal:
+        > python manage.py benchmark_urls --number 50 --endpoint home
+    """
+
+    help = "Benchmark latency and queries of content pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=20,
+            help="Number of requests to each endpoint.",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            help="A name of an endpoint to request (all by default).",
+        )
+        parser.add_argument(
+            "--query",
+            default="python",
+            help="A query of search endpoints.",
+        )
+
+    def get_endpoints(self, user, client, options) -> dict:
+        """Endpoints by names: {name: (url, authenticated)}."""
+        note = Note.objects.filter(draft=False).order_by("-weight").first()
+        source = Source.objects.annotate(n=Count("notes")).order_by("-n")[0]
+        home = reverse("content:home")
+        cursor = client.get(home, {"format": "json"}).json()["next"]
+        query = options["query"]
+        return {
+            "home": (home, True),
+            "home (json)": (f"{home}?format=json", True),
+            "home (cursor)": (f"{home}?format=json&cursor={cursor}", True),
+            "welcome": (reverse("content:welcome"), False),
+            "note": (reverse("content:note", args=[note.slug]), False),
+            "note (user)": (reverse("content:note", args=[note.slug]), True),
+            "profile notes": (user.get_absolute_url(), False),
+            "personal notes": (reverse("content:personal_notes"), True),
+            "search": (
+                f"{reverse('content:search', args=['notes'])}?query={query}",
+                False,
+            ),
+            "search sources": (
+                f"{reverse('content:search_sources_select')}?query={query}",
+                True,
+            ),
+            "source": (reverse("content:source", args=[source.slug]), False),
+            "source type": (
+                reverse("content:source_type", args=[source.type]),
+                False,
+            ),
+        }
+
+    def handle(self, *args, **options):
+        author_id = (
+            Note.objects.values("author")
+            .annotate(notes=Count("*"))
+            .order_by("-notes")
+            .values_list("author", flat=True)
+            .first()
+        )
+        if author_id is None or not Source.objects.exists():
+            raise CommandError("Seed the database with `seed_content`.")
+        user = User.objects.get(pk=author_id)
+        clients = {False: Client(), True: Client()}
+        clients[True].force_login(user)
+        endpoints = self.get_endpoints(user, clients[True], options)
+        names = options["endpoint"] or list(endpoints)
+        unknown = set(names) - set(endpoints)
+        if unknown:
+            raise CommandError(
+                "Unknown endpoints: {}. Choices: {}.".format(
+                    ", ".join(unknown), ", ".join(endpoints)
+                )
+            )
+        self.stdout.write(
+            "Notes: {}, requests: {}".format(
+                Note.objects.count(), options["number"]
+            )
+        )
+        self.stdout.write(
+            "{:<16} {:>6} {:>9} {:>9} {:>8}".format(
+                "endpoint", "status", "p50, ms", "p95, ms", "queries"
+            )
+        )
+        for name in names:
+            url, authenticated = endpoints[name]
+            client = clients[authenticated]
+            headers = {}
+            if name in AJAX_ENDPOINTS:
+                headers["HTTP_X_REQUESTED_WITH"] = "XMLHttpRequest"
+            timings = []
+            for _ in range(options["number"]):
+                queries = QueryCounter()
+                with connection.execute_wrapper(queries):
+                    start = time.perf_counter()
+                    response = client.get(url, **headers)
+                    timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                "{:<16} {:>6} {:>9.2f} {:>9.2f} {:>8}".format(
+                    name,
+                    response.status_code,
+                    statistics.median(timings),
+                    percentile(timings, 95),
+                    queries.count,
+                )
+            )
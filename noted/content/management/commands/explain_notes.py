@@ -0,0 +1,93 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+
+from common.pagination import KeysetPaginator
+from content.models import Note
+from users.models import User
+
+
+PAGE_SIZE = 20
+SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def keyset_page(queryset):
+    """A queryset of the second keyset page of `queryset`."""
+    paginator = KeysetPaginator(queryset, PAGE_SIZE)
+    cursor = paginator.page().next_cursor
+    if cursor is None:
+        return queryset
+    return queryset.filter(paginator.after(paginator.decode_cursor(cursor)))
+
+
+def get_queries(author):
+    """Main queries of note lists by a name."""
+    return {
+        "relevant": Note.objects.relevant(),
+        "relevant (cursor)": keyset_page(Note.objects.relevant()),
+        "popular": Note.objects.popular(),
+        "popular (cursor)": keyset_page(Note.objects.popular()),
+        "most liked": Note.objects.most_liked(),
+        "by created": Note.objects.by_created(),
+        "public": Note.objects.public(),
+        "profile": Note.objects.profile(author).order_by("-created"),
+        "personal": Note.objects.personal(author).order_by("-created"),
+        "pins": Note.objects.filter(author=author, pin=True),
+    }
+
+
+class Command(BaseCommand):
+    """EXPLAIN main queries of note lists and fail on sequential scans.
+
+    Plans depend on table statistics, run it on a seeded database (see
+    `seed_content`), tables are analyzed before explaining.
+
+    Usage in the terminal:
+        > python manage.py explain_notes --verbose
+    """
+
+    help = "EXPLAIN note list queries and fail on sequential scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--table",
+            action="append",
+            help="A table where a sequential scan fails the command "
+            "(`content_note` by default).",
+        )
+        parser.add_argument(
+            "--verbose",
+            action="store_true",
+            help="Print query plans.",
+        )
+
+    def handle(self, *args, **options):
+        author_id = (
+            Note.objects.values("author")
+            .annotate(notes=Count("*"))
+            .order_by("-notes")
+            .values_list("author", flat=True)
+            .first()
+        )
+        if author_id is None:
+            raise CommandError("There are no notes to explain.")
+        author = User.objects.get(pk=author_id)
+        tables = set(options["table"] or [Note._meta.db_table])
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Note._meta.db_table}")
+        failed = []
+        for name, queryset in get_queries(author).items():
+            plan = queryset[:PAGE_SIZE].explain()
+            scans = set(SEQ_SCAN.findall(plan))
+            status = "SEQ SCAN" if scans & tables else "ok"
+            self.stdout.write(f"{name:<20} {status}")
+            if options["verbose"] or scans & tables:
+                self.stdout.write(plan)
+            if scans & tables:
+                failed.append(name)
+        if failed:
+            raise CommandError(
+                "Sequential scans in queries: {}.".format(", ".join(failed))
+            )
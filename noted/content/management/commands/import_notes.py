@@ -0,0 +1,72 @@
+import os
+import time
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from content.imports import NoteImporter
+from users.models import User
+
+
+class Command(BaseCommand):
+    """Import notes of a user from a zip archive of Markdown files.
+
+    Files can have a front matter (see `content.imports`), notes are drafts
+    unless `--publish` is given or a front matter sets `draft: false`.
+
+    Usage in the terminal:
+        > python manage.py import_notes vault.zip --author user@email.com
+    """
+
+    help = "Import notes from a zip archive of Markdown files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("archive", help="A path to a zip archive.")
+        parser.add_argument(
+            "--author", required=True, help="An email of the author."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of notes created at once.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes rendering bodies.",
+        )
+        parser.add_argument(
+            "--publish",
+            action="store_true",
+            help="Make notes public by default.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(email=options["author"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['author']} doesn't exist.")
+        importer = NoteImporter(
+            author,
+            draft=not options["publish"],
+            batch_size=options["batch_size"],
+            processes=options["processes"],
+        )
+
+        def progress(done: int, total: int):
+            self.stdout.write(f"Processed {done} of {total} files.")
+
+        start = time.perf_counter()
+        try:
+            with open(options["archive"], "rb") as file:
+                created = importer.import_archive(file, progress=progress)
+        except (OSError, zipfile.BadZipFile) as error:
+            raise CommandError(f"Can't import the archive: {error}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {created} notes in "
+                f"{time.perf_counter() - start:.2f} s."
+            )
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from content.models import FeedEntry
+from users.models import User
+
+
+class Command(BaseCommand):
+    """Fill materialized home feeds of users with the latest notes.
+
+    Feeds are kept up to date by signals, the command fills feeds after
+    the first deploy and fixes them after bulk changes.
+
+    Usage in the terminal:
+        > python manage.py rebuild_feeds
+    """
+
+    help = "Rebuild following and tags feeds of all users."
+
+    def handle(self, *args, **options):
+        number = 0
+        for user_id in User.objects.values_list("pk", flat=True).iterator():
+            for reason, _ in FeedEntry.REASONS:
+                FeedEntry.objects.rebuild(user_id, reason)
+            number += 1
+        self.stdout.write(f"Rebuilt feeds of {number} users.")
@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from content.models import BOOKMARK_WEIGHT, LIKE_WEIGHT, Note
+from users.models import UserProfile
+
+
+def count_subquery(queryset, field: str) -> Coalesce:
+    """Count rows of `queryset` related to an outer note by `field`."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("*"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    """Recalculate denormalized counters of notes and user profiles.
+
+    Counters are kept in sync by signals, the command fixes a drift
+    (e.g. after raw SQL changes or bulk deletions).
+
+    Usage in the terminal:
+        > python manage.py reconcile_counters --batch-size 1000
+    """
+
+    help = "Fix likes, bookmarks, forks counters and total likes of users."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows updated by one query.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        likes = count_subquery(Note.likes.through.objects, "note_id")
+        bookmarks = count_subquery(Note.bookmarks.through.objects, "note_id")
+        forks = count_subquery(Note.objects, "fork_id")
+        drifted_notes = list(
+            Note.objects.annotate(
+                real_likes=likes, real_bookmarks=bookmarks, real_forks=forks
+            )
+            .filter(
+                ~Q(likes_count=F("real_likes"))
+                | ~Q(bookmarks_count=F("real_bookmarks"))
+                | ~Q(forks_count=F("real_forks"))
+            )
+            .values_list("pk", flat=True)
+        )
+        for start in range(0, len(drifted_notes), batch_size):
+            end = start + batch_size
+            Note.objects.filter(pk__in=drifted_notes[start:end]).update(
+                likes_count=likes,
+                bookmarks_count=bookmarks,
+                forks_count=forks,
+                weight=F("weight")
+                + LIKE_WEIGHT * (likes - F("likes_count"))
+                + BOOKMARK_WEIGHT * (bookmarks - F("bookmarks_count")),
+            )
+        self.stdout.write(f"Notes fixed: {len(drifted_notes)}")
+
+        total_likes = Coalesce(
+            Subquery(
+                Note.objects.filter(
+                    author_id=OuterRef("user_id"), draft=False, anonymous=False
+                )
+                .order_by()
+                .values("author_id")
+                .annotate(total=Sum("likes_count"))
+                .values("total")
+            ),
+            0,
+        )
+        drifted_profiles = list(
+            UserProfile.objects.annotate(real_total_likes=total_likes)
+            .exclude(total_likes=F("real_total_likes"))
+            .values_list("pk", flat=True)
+        )
+        for start in range(0, len(drifted_profiles), batch_size):
+            end = start + batch_size
+            UserProfile.objects.filter(
+                pk__in=drifted_profiles[start:end]
+            ).update(total_likes=total_likes)
+        self.stdout.write(f"Profiles fixed: {len(drifted_profiles)}")
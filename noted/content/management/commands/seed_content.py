@@ -0,0 +1,328 @@
+import random
+import time
+import uuid
+
+from taggit.models import Tag
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.text import slugify
+
+from content.markdown import pick_markdown_to_html
+from content.models import MAX_NOTE_PREVIEW_TEXT_LEN, Note, Source
+from content.preview import parse_preview
+from tags.models import UnicodeTaggedItem
+from users.models import Following, User, UserProfile
+
+
+WORDS = {
+    Note.EN: (
+        "python django database index query search vector note book "
+        "article video course reading learning summary chapter author "
+        "history science network memory cache server program language "
+        "idea theory practice example method result problem solution"
+    ).split(),
+    Note.RU: (
+        "книга статья заметка поиск индекс запрос база данных глава автор "
+        "история наука сеть память кэш сервер программа язык обучение "
+        "идея теория практика пример метод результат задача решение"
+    ).split(),
+}
+# Number of distinct bodies of each language, bodies are rendered once.
+BODIES_PER_LANG = 50
+# Spread of creation time of notes.
+CREATED_DAYS = 365
+
+SPREAD_CREATED_SQL = """
+UPDATE {table}
+SET created = now() - random() * interval '{days} days'
+WHERE id >= %s AND id <= %s
+"""
+SYNC_MODIFIED_SQL = """
+UPDATE {table} SET modified = created + random() * (now() - created)
+WHERE id >= %s AND id <= %s
+"""
+
+
+def sentence(words: list, number: int) -> str:
+    text = " ".join(random.choices(words, k=number))
+    return text[0].upper() + text[1:]
+
+
+def markdown_body(lang: str, index: int) -> str:
+    """Generate a Markdown body with headings, lists, code and images."""
+    words = WORDS[lang]
+    parts = []
+    if index % 3 == 0:
+        parts.append(
+            f"![{random.choice(words)}]"
+            f"(https://picsum.photos/seed/{lang}{index}/600/400)"
+        )
+    for section in range(random.randint(2, 5)):
+        parts.append(f"## {sentence(words, 3)}")
+        for _ in range(random.randint(1, 3)):
+            parts.append(
+                " ".join(
+                    sentence(words, random.randint(6, 14)) + "."
+                    for _ in range(random.randint(2, 6))
+                )
+            )
+        if section % 2:
+            parts.append(
+                "\n".join(f"- {sentence(words, 4)}" for _ in range(4))
+            )
+        if index % 4 == 0 and section == 1:
+            parts.append(
+                "```python\nfor note in notes:\n    print(note.title)\n```"
+            )
+    return "\n\n".join(parts)
+
+
+class Command(BaseCommand):
+    """Seed the database with synthetic users, notes and interactions.
+
+    Users, profiles, sources, tags, notes (Markdown bodies in Russian and
+    English), tags of notes and profiles, follows, likes and bookmarks are
+    inserted by `bulk_create`. Bodies are taken from a pool rendered once,
+    counters and weights are recalculated by `reconcile_counters` and home
+    feeds are filled by `rebuild_feeds`.
+
+    Usage in the terminal:
+        > python manage.py seed_content --users 10000 --notes 1000000
+    """
+
+    help = "Seed the database with synthetic content."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--notes", type=int, default=1000)
+        parser.add_argument("--sources", type=int, default=500)
+        parser.add_argument("--tags", type=int, default=200)
+        parser.add_argument(
+            "--follows",
+            type=int,
+            default=10,
+            help="Number of users followed by a user.",
+        )
+        parser.add_argument(
+            "--likes",
+            type=int,
+            default=3,
+            help="Average number of likes of a note.",
+        )
+        parser.add_argument(
+            "--bookmarks",
+            type=int,
+            default=1,
+            help="Average number of bookmarks of a note.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--random-seed", type=int, help="A seed of random data."
+        )
+        parser.add_argument(
+            "--skip-feeds",
+            action="store_true",
+            help="Don't rebuild home feeds.",
+        )
+
+    def log(self, message: str):
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(f"[{elapsed:7.1f}s] {message}")
+
+    def batches(self, number: int):
+        for start in range(0, number, self.batch_size):
+            yield range(start, min(start + self.batch_size, number))
+
+    def create_users(self, number: int) -> list:
+        password = make_password(None)
+        user_ids = []
+        for batch in self.batches(number):
+            users = User.objects.bulk_create(
+                User(
+                    email=f"seed.{self.run}.{i}@example.com",
+                    username=f"@seed.{self.run}.{i}",
+                    full_name=f"Seed User {i}",
+                    password=password,
+                )
+                for i in batch
+            )
+            UserProfile.objects.bulk_create(
+                UserProfile(user=user) for user in users
+            )
+            user_ids.extend(user.pk for user in users)
+        self.log(f"Created {len(user_ids)} users.")
+        return user_ids
+
+    def create_sources(self, number: int) -> list:
+        types = [code for code, _ in Source.TYPES]
+        sources = Source.objects.bulk_create(
+            Source(
+                title=sentence(WORDS[random.choice(list(WORDS))], 3),
+                slug=f"seed-{self.run}-{i}",
+                type=random.choice(types),
+            )
+            for i in range(number)
+        )
+        self.log(f"Created {len(sources)} sources.")
+        return [source.pk for source in sources]
+
+    def create_tags(self, number: int) -> list:
+        tags = Tag.objects.bulk_create(
+            Tag(
+                name=f"{random.choice(WORDS[Note.EN])}-{self.run}-{i}",
+                slug=f"seed-{self.run}-{i}",
+            )
+            for i in range(number)
+        )
+        self.log(f"Created {len(tags)} tags.")
+        return [tag.pk for tag in tags]
+
+    def get_bodies(self) -> dict:
+        """Render a pool of bodies: {lang: [(markdown, html, preview)]}."""
+        bodies = {}
+        for lang in WORDS:
+            bodies[lang] = []
+            for index in range(BODIES_PER_LANG):
+                markdown = markdown_body(lang, index)
+                html = pick_markdown_to_html(markdown)
+                preview = parse_preview(html, MAX_NOTE_PREVIEW_TEXT_LEN)
+                bodies[lang].append((markdown, html, preview))
+        return bodies
+
+    def build_note(self, i: int, bodies: dict, user_ids, source_ids) -> Note:
+        lang = random.choice(list(WORDS))
+        markdown, html, (preview_text, image_url) = random.choice(bodies[lang])
+        title = sentence(WORDS[lang], random.randint(3, 7))
+        note = Note(
+            title=title,
+            slug=f"{slugify(title, allow_unicode=True)[:200]}-{self.run}-{i}",
+            author_id=random.choice(user_ids),
+            source_id=(
+                random.choice(source_ids)
+                if source_ids and random.random() < 0.7
+                else None
+            ),
+            body_raw=markdown,
+            summary=(
+                sentence(WORDS[lang], 12) if random.random() < 0.5 else ""
+            ),
+            draft=random.random() < 0.05,
+            anonymous=random.random() < 0.02,
+            pin=random.random() < 0.01,
+            views=int(random.paretovariate(1.2) * 10),
+            lang=lang,
+            preview_text=preview_text,
+            image_url=image_url,
+            render_status=Note.RENDERED,
+        )
+        Note._meta.get_field("body_raw").set_rendered(note, html)
+        note._calculate_weight()
+        return note
+
+    def create_notes(self, number: int, user_ids, source_ids, tag_ids):
+        bodies = self.get_bodies()
+        note_ct = ContentType.objects.get_for_model(Note)
+        table = Note._meta.db_table
+        likes = Note.likes.through
+        bookmarks = Note.bookmarks.through
+        created = 0
+        for batch in self.batches(number):
+            notes = Note.objects.bulk_create(
+                self.build_note(i, bodies, user_ids, source_ids) for i in batch
+            )
+            note_ids = [note.pk for note in notes]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    SPREAD_CREATED_SQL.format(table=table, days=CREATED_DAYS),
+                    [note_ids[0], note_ids[-1]],
+                )
+                cursor.execute(
+                    SYNC_MODIFIED_SQL.format(table=table),
+                    [note_ids[0], note_ids[-1]],
+                )
+            if tag_ids:
+                UnicodeTaggedItem.objects.bulk_create(
+                    UnicodeTaggedItem(
+                        content_type=note_ct, object_id=note_id, tag_id=tag_id
+                    )
+                    for note_id in note_ids
+                    for tag_id in random.sample(
+                        tag_ids, min(len(tag_ids), random.randint(1, 4))
+                    )
+                )
+            for through, average in (
+                (likes, self.options["likes"]),
+                (bookmarks, self.options["bookmarks"]),
+            ):
+                through.objects.bulk_create(
+                    (
+                        through(note_id=note_id, user_id=user_id)
+                        for note_id in note_ids
+                        for user_id in set(
+                            random.choices(
+                                user_ids, k=random.randint(0, average * 2)
+                            )
+                        )
+                    ),
+                    ignore_conflicts=True,
+                )
+            created += len(notes)
+            self.log(f"Created {created} notes.")
+
+    def create_follows(self, user_ids: list, number: int):
+        follows = []
+        for follower_id in user_ids:
+            followed = set(random.sample(user_ids, min(number, len(user_ids))))
+            followed.discard(follower_id)
+            follows.extend(
+                Following(follower_id=follower_id, followed_id=followed_id)
+                for followed_id in followed
+            )
+        Following.objects.bulk_create(follows, batch_size=self.batch_size)
+        self.log(f"Created {len(follows)} follows.")
+
+    def subscribe_to_tags(self, user_ids: list, tag_ids: list):
+        profile_ct = ContentType.objects.get_for_model(UserProfile)
+        profiles = UserProfile.objects.filter(user__in=user_ids).values_list(
+            "pk", flat=True
+        )
+        UnicodeTaggedItem.objects.bulk_create(
+            (
+                UnicodeTaggedItem(
+                    content_type=profile_ct, object_id=profile_id, tag_id=tag
+                )
+                for profile_id in profiles
+                for tag in random.sample(tag_ids, min(3, len(tag_ids)))
+            ),
+            batch_size=self.batch_size,
+        )
+        self.log("Subscribed users to tags.")
+
+    def handle(self, *args, **options):
+        if options["users"] < 1:
+            raise CommandError("At least one user is required.")
+        random.seed(options["random_seed"])
+        self.options = options
+        self.batch_size = options["batch_size"]
+        self.run = uuid.uuid4().hex[:6]
+        self.started = time.perf_counter()
+        user_ids = self.create_users(options["users"])
+        source_ids = self.create_sources(options["sources"])
+        tag_ids = self.create_tags(options["tags"])
+        self.create_notes(options["notes"], user_ids, source_ids, tag_ids)
+        self.create_follows(user_ids, options["follows"])
+        if tag_ids:
+            self.subscribe_to_tags(user_ids, tag_ids)
+        call_command(
+            "reconcile_counters",
+            batch_size=self.batch_size,
+            stdout=self.stdout,
+        )
+        self.log("Reconciled counters.")
+        if not options["skip_feeds"]:
+            call_command("rebuild_feeds", stdout=self.stdout)
+            self.log("Rebuilt feeds.")
@@ -1,37 +1,191 @@
+from typing import Tuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.search import (
     SearchHeadline,
     SearchQuery,
     SearchRank,
-    SearchVector,
     TrigramSimilarity,
 )
-from django.db import models
-from django.db.models import Count, Q, QuerySet
+from django.db import connection, models, transaction
+from django.db.models import Exists, F, OuterRef, Q, QuerySet, Value
+from django.db.models.functions import Greatest, Length
 
-from users.models import User
+from tags.models import UnicodeTaggedItem
+from users.models import Following, User, UserProfile
 
 
 class SourceManager(models.Manager):
     def search(self, query: str) -> QuerySet:
-        """Search source by `title` and return results."""
-        similarity = TrigramSimilarity("title", query)
+        """Search source by `title` and return results.
+
+        Sources are matched by the trigram index of `title`, the similarity
+        threshold is set by the `TRIGRAM_SIMILARITY_THRESHOLD` setting.
+        """
         return (
-            self.annotate(similarity=similarity)
-            .filter(similarity__gte=0.1)
+            self.filter(title__trigram_similar=query)
+            .annotate(similarity=TrigramSimilarity("title", query))
             .order_by("-similarity")
         )
 
 
-class NoteManager(models.Manager):
-    def optimize(self):
-        return self.prefetch_related(
-            "author__profile",
-            "source",
-            "fork",
-            "tags",
-            "bookmarks",
-            "likes",
+# Fields of a note card in lists (`content/note_list_layout.html`).
+NOTE_CARD_FIELDS = (
+    "title",
+    "slug",
+    "anonymous",
+    "created",
+    "modified",
+    "summary",
+    "preview_text",
+    "image_url",
+    "views",
+    "weight",
+    "likes_count",
+    "author__username",
+    "author__full_name",
+    "author__profile__avatar",
+    "source__type",
+    "source__title",
+    "source__slug",
+)
+
+
+class NoteQuerySet(models.QuerySet):
+    def optimize(self) -> QuerySet:
+        """Query only fields of note cards with related authors and sources.
+
+        The body isn't loaded, its length is annotated as `body_length`
+        (for `Note.min_read`).
+        """
+        return (
+            self.select_related("author__profile", "source")
+            .prefetch_related("tags")
+            .only(*NOTE_CARD_FIELDS)
+            .annotate(body_length=Length("body_raw"))
+        )
+
+    def for_viewer(self, user: User) -> QuerySet:
+        """Annotate if `user` liked (`is_liked`) and bookmarked
+        (`is_bookmarked`) notes."""
+        if not user.is_authenticated:
+            return self.annotate(
+                is_liked=Value(False), is_bookmarked=Value(False)
+            )
+        likes = self.model.likes.through.objects.filter(
+            note=OuterRef("pk"), user=user
+        )
+        bookmarks = self.model.bookmarks.through.objects.filter(
+            note=OuterRef("pk"), user=user
+        )
+        return self.annotate(
+            is_liked=Exists(likes), is_bookmarked=Exists(bookmarks)
+        )
+
+
+# Add/remove a row of a m2m table of users and notes (likes, bookmarks),
+# update the counter of the note (and `total_likes` of the author if the note
+# is public and not anonymous) if the row changed. Returns (changed, counter).
+ADD_MARK_SQL = """
+INSERT INTO {through} (note_id, user_id) VALUES (%(note_id)s, %(user_id)s)
+ON CONFLICT DO NOTHING
+RETURNING note_id
+"""
+REMOVE_MARK_SQL = """
+DELETE FROM {through} WHERE note_id = %(note_id)s AND user_id = %(user_id)s
+RETURNING note_id
+"""
+SET_MARK_SQL = """
+WITH changed AS ({change}),
+note AS (
+    UPDATE {note}
+    SET {counter} = GREATEST({counter} + %(delta)s, 0),
+        weight = weight
+            + %(weight)s * (GREATEST({counter} + %(delta)s, 0) - {counter})
+    WHERE id IN (SELECT note_id FROM changed)
+    RETURNING author_id, draft, anonymous, {counter}
+),
+profile AS (
+    UPDATE {profile}
+    SET total_likes = GREATEST(total_likes + %(delta)s, 0)
+    WHERE %(total_likes)s AND user_id IN (
+        SELECT author_id FROM note WHERE NOT draft AND NOT anonymous
+    )
+)
+SELECT
+    EXISTS (SELECT 1 FROM changed),
+    COALESCE(
+        (SELECT {counter} FROM note),
+        (SELECT {counter} FROM {note} WHERE id = %(note_id)s)
+    )
+"""
+
+
+class NoteManager(models.Manager.from_queryset(NoteQuerySet)):
+    def change_counter(
+        self, note_ids, field: str, delta: int, weight: int = 0
+    ) -> int:
+        """Atomically add `delta` to a counter field of notes.
+
+        Args:
+            note_ids: Primary keys of notes.
+            field: A counter name (`likes_count`, `bookmarks_count`,
+                `forks_count`).
+            delta: A value added to the counter (can be negative).
+            weight: A value the note weight changes by per one count
+                (the counter doesn't go below zero, so does the weight).
+
+        Returns:
+            A number of updated notes.
+        """
+        counter = Greatest(F(field) + delta, 0)
+        values = {field: counter}
+        if weight:
+            values["weight"] = F("weight") + weight * (counter - F(field))
+        return self.filter(pk__in=note_ids).update(**values)
+
+    def set_mark(
+        self, note_id: int, user_id: int, field: str, state: bool, weight=0
+    ) -> Tuple[bool, int]:
+        """Like/bookmark a note by a user or undo it in one statement.
+
+        The row of the m2m table is inserted with `ON CONFLICT DO NOTHING`
+        or deleted with `RETURNING`, so repeated calls are idempotent and
+        counters change only once. `m2m_changed` isn't sent, the counter
+        (and `UserProfile.total_likes` for likes of public notes) is updated
+        by the query.
+
+        Args:
+            note_id: A primary key of a note.
+            user_id: A primary key of a user.
+            field: A m2m field name (`likes`, `bookmarks`).
+            state: True to add the user, False to remove.
+            weight: A value the note weight changes by per one mark.
+
+        Returns:
+            A tuple (changed, count): if the row was inserted/deleted and
+            the new value of the note counter.
+        """
+        through = self.model._meta.get_field(field).remote_field.through
+        sql = SET_MARK_SQL.format(
+            change=(ADD_MARK_SQL if state else REMOVE_MARK_SQL).format(
+                through=through._meta.db_table
+            ),
+            note=self.model._meta.db_table,
+            counter=f"{field}_count",
+            profile=UserProfile._meta.db_table,
         )
+        params = {
+            "note_id": note_id,
+            "user_id": user_id,
+            "delta": 1 if state else -1,
+            "weight": weight,
+            "total_likes": field == "likes",
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone()
 
     def personal(self, user: User) -> QuerySet:
         """Query notes for a specific user (for private list).
@@ -65,7 +219,7 @@ class NoteManager(models.Manager):
 
     def with_source_type(self, type_code: str) -> QuerySet:
         """Query public notes with a specific source type."""
-        return self.filter(draft=False, source__type=type_code)
+        return self.optimize().filter(draft=False, source__type=type_code)
 
     def popular(self) -> QuerySet:
         """Query public notes ordered by number of views."""
@@ -79,12 +233,7 @@ class NoteManager(models.Manager):
 
     def most_liked(self) -> QuerySet:
         """Query public notes ordered by number of likes."""
-        return (
-            self.optimize()
-            .filter(draft=False)
-            .annotate(count=Count("likes"))
-            .order_by("-count")
-        )
+        return self.optimize().filter(draft=False).order_by("-likes_count")
 
     def tags_in(self, tag_names: list) -> QuerySet:
         """Query public notes that have tags from `tag_names` list."""
@@ -95,23 +244,151 @@ class NoteManager(models.Manager):
         )
 
     def search(self, query: str) -> QuerySet:
-        """Search public notes by `title`, `summary`, `body_raw`."""
-        search_vector = (
-            SearchVector("title", weight="A")
-            + SearchVector("summary", weight="A")
-            + SearchVector("body_raw", weight="B")
+        """Search public notes by `title`, `summary`, `body_raw`.
+
+        Notes are matched by the stored `search_vector` (indexed with
+        the russian or english config depending on the note language),
+        so the query is parsed with both configs, or by the trigram index
+        of `title`.
+        """
+        search_query = SearchQuery(query, config="english") | SearchQuery(
+            query, config="russian"
         )
-        search_query = SearchQuery(query)
         headline = SearchHeadline(
             "title", search_query, start_sel="<mark>", stop_sel="</mark>"
         )
         return (
-            self.filter(draft=False)
+            self.optimize()
+            .filter(draft=False)
             .annotate(
-                rank=SearchRank(search_vector, search_query),
-                similarity=TrigramSimilarity("title", query),
+                rank=SearchRank(F("search_vector"), search_query),
                 headline=headline,
             )
-            .filter(Q(rank__gte=0.2) | Q(similarity__gt=0.1))
+            .filter(
+                Q(search_vector=search_query) | Q(title__trigram_similar=query)
+            )
             .order_by("-rank")
         )
+
+
+# Keeps the `FEED_LENGTH` latest entries of each feed of given users.
+TRIM_FEEDS_SQL = """
+DELETE FROM {table} WHERE id IN (
+    SELECT id FROM (
+        SELECT id, row_number() OVER (
+            PARTITION BY user_id ORDER BY created DESC, note_id DESC
+        ) AS position
+        FROM {table}
+        WHERE reason = %s AND user_id = ANY(%s)
+    ) AS ranked
+    WHERE position > %s
+)
+"""
+
+
+class FeedEntryManager(models.Manager):
+    @property
+    def note_model(self):
+        return self.model._meta.get_field("note").related_model
+
+    def notes(self, user: User, reason: str) -> QuerySet:
+        """Query notes of a feed of `user` (latest on the top)."""
+        return (
+            self.note_model.objects.optimize()
+            .filter(feed_entries__user=user, feed_entries__reason=reason)
+            .order_by("-feed_entries__created")
+        )
+
+    def trim(self, user_ids, reason: str):
+        """Delete entries beyond the `FEED_LENGTH` latest ones of feeds."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                TRIM_FEEDS_SQL.format(table=self.model._meta.db_table),
+                [reason, list(user_ids), settings.FEED_LENGTH],
+            )
+
+    def _add(self, note, user_ids, reason: str, batch_size: int = 1000):
+        self.bulk_create(
+            (
+                self.model(
+                    user_id=user_id,
+                    note_id=note.pk,
+                    reason=reason,
+                    created=note.created,
+                )
+                for user_id in user_ids
+            ),
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+
+    def update_note(self, note):
+        """Put `note` to feeds of the author followers and the tags
+        subscribers, remove it from other feeds (e.g. if it became a draft).
+        """
+        if note.draft:
+            self.filter(note=note).delete()
+            return
+        followers = Following.objects.none()
+        if not note.anonymous and note.author_id:
+            followers = Following.objects.filter(
+                followed_id=note.author_id
+            ).values_list("follower_id", flat=True)
+        tag_ids = note.tags.values_list("id", flat=True)
+        subscribers = (
+            UserProfile.objects.filter(tags__in=tag_ids)
+            .values_list("user_id", flat=True)
+            .distinct()
+        )
+        for reason, user_ids in (
+            (self.model.FOLLOWING, followers),
+            (self.model.TAGS, subscribers),
+        ):
+            self.filter(note=note, reason=reason).exclude(
+                user_id__in=user_ids
+            ).delete()
+            user_ids = list(user_ids)
+            self._add(note, user_ids, reason)
+            if user_ids:
+                self.trim(user_ids, reason)
+
+    def rebuild(self, user_id: int, reason: str):
+        """Fill a feed of a user with the `FEED_LENGTH` latest notes."""
+        notes = self.note_model.objects.filter(draft=False)
+        if reason == self.model.FOLLOWING:
+            notes = notes.filter(
+                anonymous=False, author__followers__follower_id=user_id
+            )
+        else:
+            tag_ids = UnicodeTaggedItem.objects.filter(
+                content_type=ContentType.objects.get_for_model(UserProfile),
+                object_id__in=UserProfile.objects.filter(
+                    user_id=user_id
+                ).values("pk"),
+            ).values("tag_id")
+            notes = notes.filter(tags__in=tag_ids).distinct()
+        notes = notes.order_by("-created").only("pk", "created")
+        with transaction.atomic():
+            self.filter(user_id=user_id, reason=reason).delete()
+            self.bulk_create(
+                self.model(
+                    user_id=user_id,
+                    note_id=note.pk,
+                    reason=reason,
+                    created=note.created,
+                )
+                for note in notes[: settings.FEED_LENGTH]
+            )
+
+
+class OrphanCandidateManager(models.Manager):
+    def record(self, kind: str, object_ids):
+        """Record objects of a kind as candidates for garbage collection."""
+        self.bulk_create(
+            (
+                self.model(kind=kind, object_id=object_id)
+                for object_id in object_ids
+                if object_id is not None
+            ),
+            ignore_conflicts=True,
+        )
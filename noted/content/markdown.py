@@ -1,19 +1,42 @@
 """The module provides functions for transfering Markdown to HTML.
 
+The backend used for rendering is set by the `MARKDOWN_RENDERER` setting
+(a dotted path to a :class:`MarkdownRenderer` subclass). By default notes
+are rendered in-process by :class:`LocalMarkdownRenderer`, GitHub API is
+an optional remote backend.
+
+Rendered HTML is cached by a hash of the Markdown text and the renderer
+version, an in-process LRU cache stays in front of the Django cache.
+
+**Classes**
+    MarkdownRenderer: a base class for Markdown renderers.
+    LocalMarkdownRenderer: renders GitHub-flavoured Markdown via `markdown2`.
+    GitHubMarkdownRenderer: renders Markdown via GitHub API.
+
 **Functions**
     check_remainig_api_ratelimit: log how many API requests left.
     markdown_to_html: transfers Markdown text into HTML via GitHub API.
-    pick_markdown_to_html: transfer Markdown text into HTML (2 methods).
+    get_renderer: returns the renderer set in the settings.
+    make_render_cache_key: builds a cache key for a rendered text.
+    pick_markdown_to_html: transfer Markdown text into HTML.
+    provisional_markdown_to_html: quickly transfer Markdown text into HTML.
 """
 
+import functools
+import hashlib
 import logging
+import re
 import traceback
-from typing import Tuple
+from typing import Optional, Tuple
 
 import requests
 from markdown2 import markdown
 
 from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from common.cache import LRUCache
 
 
 logger = logging.getLogger("markdown")
@@ -25,14 +48,40 @@ HEADERS = {
     "X-GitHub-Api-Version": "2022-11-28",
 }
 
+# `markdown2` extras that bring the output close to GitHub Flavored Markdown.
+GFM_EXTRAS = [
+    "code-friendly",
+    "cuddled-lists",
+    "fenced-code-blocks",
+    "link-patterns",
+    "strike",
+    "tables",
+    "task_list",
+]
+# Turns bare URLs (`https://...`, `www....`) into links. URLs of attributes
+# (`href="..."`) and texts of links of raw HTML are skipped.
+AUTOLINK_PATTERNS = [
+    (
+        re.compile(
+            r"(?<!=)(?<!=\")(?<!=')"
+            r"((?:https?://|www\.)[^\s<>()\"']+[^\s<>()\"'.,;:!?])"
+            r"(?![^<]*</a>)"
+        ),
+        lambda match: match.group(1)
+        if match.group(1).startswith("http")
+        else "http://" + match.group(1),
+    ),
+]
+
 
 def check_remainig_api_ratelimit(response):
     """Check GitHub API response on remaning requests and log it."""
     try:
         limit = int(response.headers.get("X-RateLimit-Limit"))
         remaining = int(response.headers.get("X-RateLimit-Remaining"))
-    except ValueError:
+    except (TypeError, ValueError):
         logger.warning("Bad ratelimit headers.")
+        return
     if remaining < 20:
         logger.warning("Left less that 20 requests: " + str(remaining))
     logger.info(f"Limit: {limit} | Left: {remaining}")
@@ -61,32 +110,148 @@ def markdown_to_html(text: str) -> Tuple[str, bool]:
         response = requests.post(
             API_URL, data=text_encoded, headers=HEADERS, timeout=10
         )
-        if response.status_code == 200:
-            check_remainig_api_ratelimit(response)
-            return response.text, True
-    except requests.exceptions.ConnectionError:
+    except requests.exceptions.RequestException:
         logger.error(
             "Markdown API request is failed:\n" + traceback.format_exc()
         )
+        return text, False
+    if response.status_code == 200:
+        check_remainig_api_ratelimit(response)
+        return response.text, True
     logger.warning(
         "Markdown API request is failed:\nStatus code: {code}\nHEADERS: \
-            {headers}\nJSON: {json}\nRAW: {raw}\nTEXT: {text}\n".format(
+            {headers}\nTEXT: {text}\n".format(
             code=response.status_code,
             headers=response.headers,
-            json=response.json,
-            raw=response.raw,
             text=response.text,
         )
     )
     return text, False
 
 
-def pick_markdown_to_html(text: str) -> str:
+class MarkdownRenderer:
+    """A base class for Markdown to HTML renderers.
+
+    To add a new backend subclass it, implement `render` and set a dotted
+    path to the class in the `MARKDOWN_RENDERER` setting.
+
+    Bump `version` when the output of a renderer changes, it invalidates
+    cached HTML of the renderer.
+
+    A renderer that can fail sets `fallback` and overrides `try_render`,
+    HTML of the fallback is cached under a key of the fallback.
+    """
+
+    version = "1"
+    fallback: Optional["MarkdownRenderer"] = None
+
+    def render(self, text: str) -> str:
+        """Render Markdown `text` and return HTML code."""
+        raise NotImplementedError
+
+    def try_render(self, text: str) -> Optional[str]:
+        """Render Markdown `text`, return `None` if rendering is failed."""
+        return self.render(text)
+
+
+class LocalMarkdownRenderer(MarkdownRenderer):
+    """Renders GitHub-flavoured Markdown in-process via `markdown2`.
+
+    Supports tables, fenced code blocks, task lists, strikethrough and
+    autolinks.
+    """
+
+    version = "2"
+
+    def render(self, text: str) -> str:
+        return markdown(
+            text=text, extras=GFM_EXTRAS, link_patterns=AUTOLINK_PATTERNS
+        )
+
+
+class GitHubMarkdownRenderer(MarkdownRenderer):
+    """Renders Markdown via GitHub API.
+
+    Makes a blocking HTTP request and uses up the API rate limit, falls back
+    to :class:`LocalMarkdownRenderer` if the request is failed.
+    """
+
+    fallback = LocalMarkdownRenderer()
+
+    def render(self, text: str) -> str:
+        html = self.try_render(text)
+        if html is None:
+            return self.fallback.render(text)
+        return html
+
+    def try_render(self, text: str) -> Optional[str]:
+        if settings.TEST_MODE:
+            return None
+        html, success = markdown_to_html(text)
+        return html if success else None
+
+
+@functools.lru_cache(maxsize=None)
+def _load_renderer(path: str) -> MarkdownRenderer:
+    return import_string(path)()
+
+
+def get_renderer() -> MarkdownRenderer:
+    """Return an instance of the renderer set in `MARKDOWN_RENDERER`."""
+    return _load_renderer(settings.MARKDOWN_RENDERER)
+
+
+_render_cache = LRUCache(maxsize=settings.MARKDOWN_RENDER_CACHE_SIZE)
+
+
+def make_render_cache_key(text: str, renderer: MarkdownRenderer) -> str:
+    """Build a cache key from a hash of `text` and the renderer version."""
+    renderer_class = type(renderer)
+    return "markdown:{}.{}:{}:{}".format(
+        renderer_class.__module__,
+        renderer_class.__qualname__,
+        renderer.version,
+        hashlib.sha256(text.encode("utf-8")).hexdigest(),
+    )
+
+
+def pick_markdown_to_html(
+    text: str, renderer: Optional[MarkdownRenderer] = None
+) -> str:
     """Transfer Markdown text into HTML.
 
-    The function transfers Markdown text into HTML using 2 independent
-    methods. First method via GitHub API, if it fails, the function uses
-    `markdown2` module. And returns first success result.
+    The function transfers Markdown text into HTML using the renderer
+    set in the `MARKDOWN_RENDERER` setting. Identical texts are rendered
+    only once, the result is taken from the in-process LRU cache or
+    the Django cache. If the renderer is failed, HTML of its fallback is
+    cached under a key of the fallback, so the renderer is tried again
+    next time.
+
+    Args:
+        text: The Markdown text to render in HTML.
+        renderer: A renderer (the one of the settings by default).
+
+    Returns:
+        The rendered HTML code.
+    """
+    renderer = renderer or get_renderer()
+    key = make_render_cache_key(text, renderer)
+    html = _render_cache.get(key)
+    if html is None:
+        html = cache.get(key)
+        if html is None:
+            html = renderer.try_render(text)
+            if html is None:
+                return pick_markdown_to_html(text, renderer.fallback)
+            cache.set(key, html, settings.MARKDOWN_RENDER_CACHE_TIMEOUT)
+        _render_cache.set(key, html)
+    return html
+
+
+def provisional_markdown_to_html(text: str) -> str:
+    """Quickly transfer Markdown text into HTML via plain `markdown2`.
+
+    The HTML is shown while a note is rendering in the background.
 
     Args:
         text: The Markdown text to render in HTML.
@@ -94,8 +259,4 @@ def pick_markdown_to_html(text: str) -> str:
     Returns:
         The rendered HTML code.
     """
-    if not settings.TEST_MODE:
-        html, success = markdown_to_html(text)
-        if success:
-            return html
     return markdown(text=text)
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0002_note_image_url_note_preview_text_note_weight"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="note",
+            name="render_status",
+            field=models.CharField(
+                choices=[("rendering", "Rendering"), ("rendered", "Rendered")],
+                default="rendered",
+                max_length=10,
+                verbose_name="Render status",
+            ),
+        ),
+    ]
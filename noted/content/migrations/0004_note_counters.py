@@ -0,0 +1,59 @@
+# Generated by Django 4.1.13 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+FILL_COUNTERS_SQL = """
+UPDATE content_note AS note SET
+    likes_count = (
+        SELECT COUNT(*) FROM content_note_likes WHERE note_id = note.id
+    ),
+    bookmarks_count = (
+        SELECT COUNT(*) FROM content_note_bookmarks WHERE note_id = note.id
+    ),
+    forks_count = (
+        SELECT COUNT(*) FROM content_note AS fork WHERE fork.fork_id = note.id
+    );
+UPDATE content_note SET weight = weight + 2 * likes_count + 3 * bookmarks_count;
+UPDATE users_userprofile AS profile SET total_likes = COALESCE(
+    (
+        SELECT SUM(likes_count) FROM content_note
+        WHERE author_id = profile.user_id AND NOT draft AND NOT anonymous
+    ),
+    0
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0003_note_render_status"),
+        ("users", "0003_userprofile_total_likes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="note",
+            name="bookmarks_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Bookmarks"
+            ),
+        ),
+        migrations.AddField(
+            model_name="note",
+            name="forks_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Forks"),
+        ),
+        migrations.AddField(
+            model_name="note",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Likes"),
+        ),
+        migrations.AlterField(
+            model_name="note",
+            name="weight",
+            field=models.IntegerField(default=0, verbose_name="Weight"),
+        ),
+        migrations.RunSQL(FILL_COUNTERS_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.1.13 on 2026-10-18 20:23
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Russian notes are indexed with the russian config, other ones (English
+# and undetected) with the english config. `NoteManager.search` queries
+# both configs.
+CREATE_TRIGGER_SQL = """
+CREATE FUNCTION content_note_search_vector_update() RETURNS trigger AS $$
+DECLARE
+    config regconfig;
+BEGIN
+    IF TG_OP = 'UPDATE'
+        AND NEW.title IS NOT DISTINCT FROM OLD.title
+        AND NEW.summary IS NOT DISTINCT FROM OLD.summary
+        AND NEW.body_raw IS NOT DISTINCT FROM OLD.body_raw
+        AND NEW.lang IS NOT DISTINCT FROM OLD.lang
+        AND OLD.search_vector IS NOT NULL
+    THEN
+        NEW.search_vector := OLD.search_vector;
+        RETURN NEW;
+    END IF;
+    config := CASE NEW.lang
+        WHEN 'ru' THEN 'pg_catalog.russian'
+        ELSE 'pg_catalog.english'
+    END;
+    NEW.search_vector :=
+        setweight(to_tsvector(config, coalesce(NEW.title, '')), 'A')
+        || setweight(to_tsvector(config, coalesce(NEW.summary, '')), 'A')
+        || setweight(to_tsvector(config, coalesce(NEW.body_raw, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER content_note_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, summary, body_raw, lang, search_vector
+ON content_note
+FOR EACH ROW EXECUTE FUNCTION content_note_search_vector_update();
+
+UPDATE content_note SET search_vector = NULL;
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER content_note_search_vector_trigger ON content_note;
+DROP FUNCTION content_note_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0004_note_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="note",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="content_not_search__a1728c_gin"
+            ),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+    ]
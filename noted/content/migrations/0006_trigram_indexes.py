@@ -0,0 +1,32 @@
+# Generated by Django 4.1.13 on 2026-10-18 20:31
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0005_note_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="note",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"],
+                name="content_note_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="source",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"],
+                name="content_source_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.1.13 on 2026-10-18 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0007_feedentry"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                condition=models.Q(("draft", False)),
+                fields=["-weight", "-created", "-id"],
+                name="note_public_relevant",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                condition=models.Q(("draft", False)),
+                fields=["-created", "-id"],
+                name="note_public_created",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                condition=models.Q(("draft", False)),
+                fields=["-views", "-id"],
+                name="note_public_popular",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                condition=models.Q(("draft", False)),
+                fields=["-likes_count", "-id"],
+                name="note_public_liked",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                condition=models.Q(("draft", False)),
+                fields=["author", "-created", "-id"],
+                name="note_author_public",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                fields=["author", "-created", "-id"],
+                name="note_author_created",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                condition=models.Q(("pin", True)),
+                fields=["author"],
+                name="note_author_pins",
+            ),
+        ),
+    ]
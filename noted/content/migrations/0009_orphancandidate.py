@@ -0,0 +1,45 @@
+# Generated by Django 4.1.13 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0008_note_list_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrphanCandidate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("source", "Source"), ("tag", "Tag")],
+                        max_length=10,
+                        verbose_name="Kind",
+                    ),
+                ),
+                (
+                    "object_id",
+                    models.PositiveIntegerField(verbose_name="Object ID"),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="orphancandidate",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "object_id"), name="unique_orphan_candidate"
+            ),
+        ),
+    ]
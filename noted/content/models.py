@@ -3,31 +3,66 @@
 **Models**
     Source (Model): an information source (book, acticle, video etc).
     Note (Model): a Markdown text with a list of attributes.
+    FeedEntry (Model): a note in the home feed of a user.
+    OrphanCandidate (Model): a source or a tag which may have no notes.
 
 """
 import io
+import logging
 from datetime import date
 from typing import Optional
 
 import pdfkit
-from bs4 import BeautifulSoup
+import pycld2 as cld2
 from taggit.managers import TaggableManager
 
-from django.db import models
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.db.models import Count, QuerySet
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
+from common.cache import cached
+from common.logging import LogMessage
 from common.text import generate_unique_slug
 from tags.models import UnicodeTaggedItem
 from users.models import User
 
 from .fields import MarkdownField, RenderedMarkdownField
-from .managers import NoteManager, SourceManager
+from .managers import (
+    FeedEntryManager,
+    NoteManager,
+    OrphanCandidateManager,
+    SourceManager,
+)
+from .markdown import pick_markdown_to_html, provisional_markdown_to_html
+from .preview import parse_preview
 
 
+logger = logging.getLogger("exceptions")
+
 MAX_NOTE_PREVIEW_TEXT_LEN = 300
 MAX_NOTE_IMAGE_URL_LEN = 1000
+MAX_NOTE_TAGS = 3
+MAX_TAG_LEN = 25
+# How much a like and a bookmark add to a note weight.
+LIKE_WEIGHT = 2
+BOOKMARK_WEIGHT = 3
+# Fields (attribute names) the weight of a note is calculated from.
+WEIGHT_FIELDS = {
+    "lang",
+    "source_id",
+    "image_url",
+    "summary",
+    "body_raw",
+    "pin",
+    "likes_count",
+    "bookmarks_count",
+}
+# Counters changed by queries only (a save of a loaded note skips them).
+COUNTER_FIELDS = {"likes_count", "bookmarks_count", "forks_count", "views"}
 
 
 class Source(models.Model):
@@ -76,6 +111,15 @@ class Source(models.Model):
     slug = models.SlugField(_("Slug"), max_length=254, unique=True, null=False)
     objects = SourceManager()
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["title"],
+                name="content_source_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            )
+        ]
+
     def __str__(self):
         return self.title
 
@@ -111,7 +155,7 @@ class Note(models.Model):
         source: A link to a :model:`Source`.
         body_raw: A raw Markdown text from a form.
         body_html: HTML representation of `body_raw`, it is generated
-                   based on `body_raw` via GitHub API.
+                   based on `body_raw` via `MARKDOWN_RENDERER`.
         summary: A short summary on a text of a note.
         draft: A boolean flag makes a note private (hides from other users).
         anonymous: A boolean flag hides an author of a note.
@@ -128,6 +172,15 @@ class Note(models.Model):
                 of the note.
         preview_text: First 300 chars of content (appears if summary is None).
         image_url: A URL of first image in content or None.
+        likes_count: A number of likes (kept in sync by signals and
+            `NoteManager.set_mark`).
+        bookmarks_count: A number of bookmarks (the same as `likes_count`).
+        forks_count: A number of forks (kept in sync by signals).
+        search_vector: A full text search document of `title`, `summary`,
+                       `body_raw` (maintained by a database trigger,
+                       the language config depends on `lang`).
+        render_status: `rendering` while `body_html` and fields derived from
+                       it are computed in the background, else `rendered`.
 
     """
 
@@ -139,6 +192,12 @@ class Note(models.Model):
         (RU, _("Russian")),
         (ER, _("Undetected")),
     )
+    RENDERING = "rendering"
+    RENDERED = "rendered"
+    RENDER_STATUSES = (
+        (RENDERING, _("Rendering")),
+        (RENDERED, _("Rendered")),
+    )
     title = models.CharField(
         _("Title"), max_length=100, null=False, blank=False, db_index=True
     )
@@ -215,61 +274,234 @@ class Note(models.Model):
     lang = models.CharField(
         _("Language"), max_length=2, choices=LANGS, default=ER
     )
-    weight = models.SmallIntegerField(_("Weight"), default=0)
+    weight = models.IntegerField(_("Weight"), default=0)
     preview_text = models.CharField(
         _("Preview text"), max_length=MAX_NOTE_PREVIEW_TEXT_LEN, default=""
     )
     image_url = models.URLField(
         _("Image URL"), max_length=MAX_NOTE_IMAGE_URL_LEN, null=True
     )
+    likes_count = models.PositiveIntegerField(_("Likes"), default=0)
+    bookmarks_count = models.PositiveIntegerField(_("Bookmarks"), default=0)
+    forks_count = models.PositiveIntegerField(_("Forks"), default=0)
+    render_status = models.CharField(
+        _("Render status"),
+        max_length=10,
+        choices=RENDER_STATUSES,
+        default=RENDERED,
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
     objects = NoteManager()
 
     class Meta:
         ordering = ("-created",)
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            GinIndex(
+                fields=["title"],
+                name="content_note_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+            # Orderings of public notes (the primary key is the last key
+            # of a keyset paginated ordering)
+            models.Index(
+                fields=["-weight", "-created", "-id"],
+                condition=models.Q(draft=False),
+                name="note_public_relevant",
+            ),
+            models.Index(
+                fields=["-created", "-id"],
+                condition=models.Q(draft=False),
+                name="note_public_created",
+            ),
+            models.Index(
+                fields=["-views", "-id"],
+                condition=models.Q(draft=False),
+                name="note_public_popular",
+            ),
+            models.Index(
+                fields=["-likes_count", "-id"],
+                condition=models.Q(draft=False),
+                name="note_public_liked",
+            ),
+            # Profile and personal lists
+            models.Index(
+                fields=["author", "-created", "-id"],
+                condition=models.Q(draft=False),
+                name="note_author_public",
+            ),
+            models.Index(
+                fields=["author", "-created", "-id"],
+                name="note_author_created",
+            ),
+            models.Index(
+                fields=["author"],
+                condition=models.Q(pin=True),
+                name="note_author_pins",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        loaded = getattr(self, "_loaded_values", {})
+        for name in fields or [f.attname for f in self._meta.concrete_fields]:
+            attname = self._meta.get_field(name).attname
+            if attname in self.__dict__:
+                loaded[attname] = self.__dict__[attname]
+        self._loaded_values = loaded
+
+    def _remember_loaded_values(self):
+        self._loaded_values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def get_dirty_fields(self) -> set:
+        """Return attribute names of fields changed since the note was
+        loaded or saved (all fields of a new note)."""
+        attnames = {field.attname for field in self._meta.concrete_fields}
+        loaded = getattr(self, "_loaded_values", None)
+        if self._state.adding or loaded is None:
+            return attnames
+        return {
+            name
+            for name in attnames
+            if name in self.__dict__
+            and (name not in loaded or self.__dict__[name] != loaded[name])
+        }
+
     def save(self, *args, **kwargs):
+        """Save the note and recompute fields derived from changed fields.
+
+        The body is rendered (and the language is detected) only if it was
+        changed, the weight is calculated only if its inputs were changed.
+        Derived fields are added to `update_fields` if it is given.
+        A note saved with the `rendering` status is queued for rendering
+        (again, if a previous render failed).
+
+        A save of a loaded note doesn't write `COUNTER_FIELDS` (they are
+        changed concurrently by `F()` updates and view flushes), counters
+        are refreshed from the database before the weight is calculated.
+        """
+        dirty = self.get_dirty_fields()
+        derived = set()
+        loaded = not self._state.adding and not kwargs.get("force_insert")
         if not self.slug:
             self.slug = generate_unique_slug(self, latin=True)
-        self._populate_preview_text()
-        self._populate_image_url()
-        self._calculate_weight()
-        return super().save(*args, **kwargs)
+            derived.add("slug")
+        if {"body_raw", "body_html"} & dirty:
+            body = self._meta.get_field("body_raw")
+            if self.render_status == self.RENDERING:
+                body.set_rendered(
+                    self, provisional_markdown_to_html(self.body_raw)
+                )
+            else:
+                body.render(self)
+                self._populate_preview()
+                if "body_raw" in dirty:
+                    self.detect_lang()
+            derived |= {"body_html", "preview_text", "image_url", "lang"}
+        if (dirty | derived) & WEIGHT_FIELDS:
+            if loaded:
+                self.refresh_from_db(fields=COUNTER_FIELDS)
+            self._calculate_weight()
+            derived.add("weight")
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = set(kwargs["update_fields"]) | derived
+        elif loaded:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = {
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred | COUNTER_FIELDS
+            }
+        super().save(*args, **kwargs)
+        self._remember_loaded_values()
+        if self.render_status == self.RENDERING:
+            self.queue_render()
 
     def get_absolute_url(self):
         return reverse("content:note", args=[self.slug])
 
+    def queue_render(self):
+        """Queue `render_note_task` of the note after the commit."""
+        from .tasks import render_note_task
+
+        note_id = self.pk
+        transaction.on_commit(lambda: render_note_task.delay(note_id))
+
+    def render(self):
+        """Renders the body and populates fields derived from it.
+
+        Renders `body_html` via `MARKDOWN_RENDERER`, populates `preview_text`,
+        `image_url`, `lang`, `weight` and marks the note as rendered.
+        The note isn't saved.
+        """
+        self._meta.get_field("body_raw").set_rendered(
+            self, pick_markdown_to_html(self.body_raw)
+        )
+        self._populate_preview()
+        self.detect_lang()
+        self.render_status = self.RENDERED
+        self._calculate_weight()
+
+    def detect_lang(self):
+        """Detects languange of the body text and sets it to `lang`."""
+        is_reliable, lang_code = False, None
+        try:
+            is_reliable, _bytes_found, details = cld2.detect(self.body_raw)
+            lang_code = details[0][1]
+        except Exception as error:
+            log_message = LogMessage(error, self.detect_lang, self.pk)
+            logger.error(
+                "An error occured while detecting the  language.\n"
+                + str(log_message)
+            )
+        if is_reliable and lang_code in (self.RU, self.EN):
+            self.lang = lang_code
+        else:
+            self.lang = self.ER
+            logger.warning(
+                f"Language is not detected ({lang_code})\n"
+                f"Note body:{self.body_raw}\n"
+            )
+
     def _calculate_weight(self):
         """Calculates note's weight depends on note's content."""
         self.weight = 0
         self.weight += 10 if self.lang != self.ER else 0
-        self.weight += 5 if self.source else 0
+        self.weight += 5 if self.source_id else 0
         self.weight += 5 if self.image_url else 0
         self.weight += 3 if self.summary else 0
         self.weight += 2 if 3 < self.min_read < 8 else 0
         self.weight += 1 if self.pin else 0
+        self.weight += self.likes_count * LIKE_WEIGHT
+        self.weight += self.bookmarks_count * BOOKMARK_WEIGHT
         # TODO: Find a way to implement this logic.
         # self.weight += 3 if self.tags.first() else 0
-        # self.weight += self.likes.count() * 2
-        # self.weight += self.bookmarks.count() * 3
-
-    def _populate_preview_text(self):
-        """Populates the body preview text of a note ot `preview_text`."""
-        self.preview_text = "".join(
-            BeautifulSoup(self.body_html, features="html.parser").findAll(
-                text=True
-            )
-        )[:MAX_NOTE_PREVIEW_TEXT_LEN]
 
-    def _populate_image_url(self):
-        """Populates first image `src` from the body text to `image_url`."""
-        image = BeautifulSoup(self.body_html, features="html.parser").find(
-            name="img"
+    def _populate_preview(self):
+        """Populates `preview_text` and `image_url` from the body HTML.
+
+        `preview_text` gets the first 300 chars of the body text,
+        `image_url` gets `src` of the first image in the body or None.
+        """
+        self.preview_text, image_url = parse_preview(
+            self.body_html, MAX_NOTE_PREVIEW_TEXT_LEN
         )
-        if image and len(image) < MAX_NOTE_IMAGE_URL_LEN:
-            self.image_url = image.get("src")
+        if image_url and len(image_url) <= MAX_NOTE_IMAGE_URL_LEN:
+            self.image_url = image_url
         else:
             self.image_url = None
 
@@ -402,9 +634,105 @@ class Note(models.Model):
         - Average ru word length = 7,2
         - Average en word length = 5,2
         - Average wpm reading speed = 150
-        - chars_num = `len(self.body_raw)`
+        - chars_num = `len(self.body_raw)` (or `body_length` annotated by
+          `NoteQuerySet.optimize`)
 
         min = (chars_num + 1) / ((7.2 + 5.2) / 2) / 150 =
             = (chars_num + 1) / 6.2 / 150
         """
-        return round((len(self.body_raw) + 1) / 6.2 / 150)
+        chars_num = getattr(self, "body_length", None)
+        if chars_num is None:
+            chars_num = len(self.body_raw)
+        return round((chars_num + 1) / 6.2 / 150)
+
+
+class FeedEntry(models.Model):
+    """A note in the home feed of a user.
+
+    Feeds are materialized on write: entries are added when a note is
+    published (for followers of the author and subscribers of the note
+    tags) and rebuilt when a user follows a user or subscribes to a tag.
+    A feed is trimmed to the `FEED_LENGTH` latest notes.
+
+    **Fields**
+        user: An owner of the feed.
+        note: A note in the feed.
+        reason: A feed (tab) of the note: notes of followed users or notes
+                with subscribed tags.
+        created: Creation time of the note (order of the feed).
+
+    """
+
+    FOLLOWING = "following"
+    TAGS = "tags"
+    REASONS = (
+        (FOLLOWING, _("Following")),
+        (TAGS, _("Tags")),
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    note = models.ForeignKey(
+        Note, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    reason = models.CharField(_("Reason"), max_length=10, choices=REASONS)
+    created = models.DateTimeField(_("Created"))
+    objects = FeedEntryManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "reason", "note"], name="unique_feed_entry"
+            )
+        ]
+        indexes = [models.Index(fields=["user", "reason", "-created"])]
+
+    def __str__(self):
+        return f"{self.note_id} in {self.reason} feed of {self.user_id}"
+
+
+class OrphanCandidate(models.Model):
+    """A source or a tag which may have no notes (tagged items) left.
+
+    Candidates are recorded by signals when a note or a tagged item is
+    deleted and checked by `delete_orphans_task` (see `content.orphans`).
+
+    **Fields**
+        kind: A model of the object (source, tag).
+        object_id: A primary key of the object.
+
+    """
+
+    SOURCE = "source"
+    TAG = "tag"
+    KINDS = (
+        (SOURCE, _("Source")),
+        (TAG, _("Tag")),
+    )
+    kind = models.CharField(_("Kind"), max_length=10, choices=KINDS)
+    object_id = models.PositiveIntegerField(_("Object ID"))
+    objects = OrphanCandidateManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="unique_orphan_candidate"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+@cached(
+    settings.SIDEBAR_CACHE_TIMEOUT,
+    depends_on=(Note,),
+    stale_timeout=settings.SIDEBAR_CACHE_STALE_TIMEOUT,
+)
+def get_popular_notes(number: int) -> list:
+    """Gets `number` public notes with most views (cached).
+
+    Views are flushed by raw updates, so the list is refreshed by timeout
+    only, saving or deleting a note refreshes it at once.
+    """
+    return Note.objects.popular()[:number]
@@ -0,0 +1,64 @@
+"""The module deletes sources and tags which aren't used anymore.
+
+Deleting a note (or removing a tag from a note) only records its source
+and tags as :model:`OrphanCandidate`, `delete_orphans_task` (a periodic
+task) checks candidates by batches: a source without notes and a tag
+without tagged items (of notes and of subscriptions) are deleted by one
+query per batch (`NOT EXISTS` anti-join), checked candidates are removed.
+
+**Functions**
+    get_orphans: queries orphans among candidates of a kind.
+    delete_orphans: deletes orphans of all recorded candidates.
+"""
+
+from typing import Dict, Iterable, Optional
+
+from taggit.models import Tag
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, QuerySet
+
+from tags.models import UnicodeTaggedItem
+
+from .models import Note, OrphanCandidate, Source
+
+
+def get_orphans(kind: str, object_ids: Iterable[int]) -> QuerySet:
+    """Query objects of a kind without references among `object_ids`."""
+    if kind == OrphanCandidate.SOURCE:
+        notes = Note.objects.filter(source=OuterRef("pk"))
+        return Source.objects.filter(pk__in=object_ids).filter(~Exists(notes))
+    tagged_items = UnicodeTaggedItem.objects.filter(tag=OuterRef("pk"))
+    return Tag.objects.filter(pk__in=object_ids).filter(~Exists(tagged_items))
+
+
+def delete_orphans(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Check recorded candidates and delete orphans by batches.
+
+    Args:
+        batch_size: A number of candidates checked at once
+            (`ORPHANS_BATCH_SIZE` by default).
+
+    Returns:
+        Numbers of deleted objects by kinds ({"source": 1, "tag": 2}).
+    """
+    batch_size = batch_size or settings.ORPHANS_BATCH_SIZE
+    deleted = {}
+    for kind, _ in OrphanCandidate.KINDS:
+        deleted[kind] = 0
+        while True:
+            with transaction.atomic():
+                candidates = dict(
+                    OrphanCandidate.objects.filter(kind=kind)
+                    .order_by("pk")
+                    .select_for_update(skip_locked=True)
+                    .values_list("pk", "object_id")[:batch_size]
+                )
+                if not candidates:
+                    break
+                orphans = get_orphans(kind, candidates.values())
+                label = orphans.model._meta.label
+                deleted[kind] += orphans.delete()[1].get(label, 0)
+                OrphanCandidate.objects.filter(pk__in=candidates).delete()
+    return deleted
@@ -0,0 +1,90 @@
+"""The module extracts a note preview from the rendered HTML body.
+
+**Classes**
+    NotePreviewParser: collects preview text and the first image URL.
+
+**Functions**
+    parse_preview: extracts preview text and the first image URL in one pass.
+"""
+
+from html.parser import HTMLParser
+from typing import Optional, Tuple
+
+
+# Text inside these tags isn't shown on a page.
+SKIPPED_TAGS = ("script", "style")
+
+
+class NotePreviewParser(HTMLParser):
+    """Collects preview text and the first image URL from HTML events.
+
+    Text collecting stops after `preview_len` characters, the image is
+    taken from the first `<img>` tag only. The parser is `done` when both
+    values are collected, the rest of HTML can be skipped.
+
+    Args:
+        preview_len: Maximum length of the preview text.
+    """
+
+    def __init__(self, preview_len: int):
+        super().__init__(convert_charrefs=True)
+        self.preview_len = preview_len
+        self.image_url: Optional[str] = None
+        self.image_found = False
+        self._text: list = []
+        self._text_len = 0
+        self._skipped_depth = 0
+
+    @property
+    def preview_text(self) -> str:
+        return "".join(self._text)
+
+    @property
+    def done(self) -> bool:
+        return self.image_found and self._text_len >= self.preview_len
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skipped_depth += 1
+        elif tag == "img" and not self.image_found:
+            self.image_found = True
+            self.image_url = dict(attrs).get("src")
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self._skipped_depth:
+            self._skipped_depth -= 1
+
+    def handle_data(self, data):
+        if self._skipped_depth or self._text_len >= self.preview_len:
+            return
+        data = data[: self.preview_len - self._text_len]
+        self._text.append(data)
+        self._text_len += len(data)
+
+
+def parse_preview(
+    html: str, preview_len: int, chunk_size: int = 4096
+) -> Tuple[str, Optional[str]]:
+    """Extract preview text and the first image URL from HTML in one pass.
+
+    HTML is fed to the parser by chunks, parsing stops as soon as both
+    values are collected.
+
+    Args:
+        html: HTML code to parse.
+        preview_len: Maximum length of the preview text.
+        chunk_size: Number of characters fed to the parser at once.
+
+    Returns:
+        str: the preview text.
+        str | None: `src` of the first image or None.
+    """
+    parser = NotePreviewParser(preview_len)
+    for start in range(0, len(html), chunk_size):
+        end = start + chunk_size
+        parser.feed(html[start:end])
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return parser.preview_text, parser.image_url
@@ -1,64 +1,310 @@
-import logging
+from collections import Counter, defaultdict
 
-import pycld2 as cld2
-from taggit.models import Tag
-
-from django.db.models import Count
-from django.db.models.signals import post_delete, post_save, pre_save
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
 
 from actions import base as act
 from actions.models import Action
-from common.logging import LogMessage
+from actions.tasks import notify_note_followers_task
+from tags.models import UnicodeTaggedItem
+from users.models import Following, User, UserProfile
 
-from .models import Note
+from .exports import delete_exports
+from .fragments import expire_note_cards, expire_profile_header
+from .models import (
+    BOOKMARK_WEIGHT,
+    LIKE_WEIGHT,
+    FeedEntry,
+    Note,
+    OrphanCandidate,
+    Source,
+)
+from .tasks import rebuild_feed_task, update_note_feeds_task
 
 
-logger = logging.getLogger("exceptions")
+@receiver(post_delete, sender=Note)
+def record_orphan_source(sender, instance, **kwargs):
+    """Record the source of a deleted note as an orphan candidate.
 
+    Sources without notes are deleted by `delete_orphans_task`.
+    """
+    if instance.source_id:
+        OrphanCandidate.objects.record(
+            OrphanCandidate.SOURCE, [instance.source_id]
+        )
 
-@receiver(post_delete, sender=Note)
-def free_source(sender, instance, **kwargs):
-    """Delete :model:`Source` instance from the database if it has 0 notes."""
-    if instance.source and not instance.source.notes.all():
-        instance.source.delete()
 
+@receiver(post_delete, sender=UnicodeTaggedItem)
+def record_orphan_tag(sender, instance, **kwargs):
+    """Record the tag of a deleted tagged item as an orphan candidate.
 
-@receiver(post_delete, sender=Note)
-def free_tags(sender, instance, **kwargs):
-    """Delete unused tags from the database (if it has 0 notes)."""
-    Tag.objects.annotate(ntag=Count("taggit_taggeditem_items")).filter(
-        ntag=0
-    ).delete()
+    Tags without tagged items are deleted by `delete_orphans_task`.
+    """
+    OrphanCandidate.objects.record(OrphanCandidate.TAG, [instance.tag_id])
 
 
-@receiver(pre_save, sender=Note)
-def set_lang(sender, instance, **kwargs):
-    """Detect languange of note text and set to `lang`."""
-    is_reliable = False
-    try:
-        is_reliable, _, details = cld2.detect(instance.body_raw)
-    except Exception as error:
-        log_message = LogMessage(error, set_lang, instance.pk, **kwargs)
-        logger.error(
-            "An error occured while detecting the  language.\n"
-            + str(log_message)
+@receiver(post_save, sender=Note)
+def note_created_actions(sender, instance, created, **kwargs):
+    """Create actions if a note instance was created.
+
+    Followers of the author are notified by `notify_note_followers_task`.
+    """
+    if created:
+        Action.objects.create_action(instance.author, act.CREATE, instance)
+        note_id = instance.pk
+        transaction.on_commit(
+            lambda: notify_note_followers_task.delay(note_id)
         )
-    lang_code = details[0][1]
-    if is_reliable and lang_code in (Note.RU, Note.EN):
-        instance.lang = lang_code
-    else:
-        instance.lang = Note.ER
-        logger.warning(
-            f"Language is not detected ({lang_code})\n"
-            f"Note body:{instance.body_raw}\n"
+
+
+def change_total_likes(author_likes: dict):
+    """Add likes to `total_likes` of authors ({author id: likes delta})."""
+    for author_id, delta in author_likes.items():
+        if author_id is None or not delta:
+            continue
+        UserProfile.objects.filter(user_id=author_id).update(
+            total_likes=Greatest(F("total_likes") + delta, 0)
         )
 
 
+def count_author_likes(notes) -> dict:
+    """Count likes of notes by authors ({author id: likes}).
+
+    Only likes of public notes (not drafts and not anonymous) are counted
+    in `total_likes`, it doesn't reveal authors of anonymous notes.
+    """
+    likes = Note.likes.through.objects.filter(
+        note__in=notes.filter(draft=False, anonymous=False)
+    )
+    return dict(
+        likes.values_list("note__author").annotate(Count("pk")).order_by()
+    )
+
+
+def get_m2m_changes(instance, action, reverse, pk_set, related_name) -> dict:
+    """Calculate how counters of notes change on a `m2m_changed` signal.
+
+    Returns:
+        A dict {note primary key: counter delta}.
+    """
+    if action in ("post_add", "post_remove"):
+        delta = 1 if action == "post_add" else -1
+        if reverse:
+            return {note_id: delta for note_id in pk_set}
+        return {instance.pk: delta * len(pk_set)}
+    if action == "pre_clear":
+        if reverse:
+            note_ids = getattr(instance, related_name).values_list(
+                "pk", flat=True
+            )
+            return {note_id: -1 for note_id in note_ids}
+        return {instance.pk: -getattr(instance, related_name).count()}
+    return {}
+
+
+def apply_m2m_changes(changes: dict, field: str, weight: int) -> None:
+    """Update counters of notes by deltas calculated for a m2m signal."""
+    note_ids_by_delta = defaultdict(list)
+    for note_id, delta in changes.items():
+        if delta:
+            note_ids_by_delta[delta].append(note_id)
+    for delta, note_ids in note_ids_by_delta.items():
+        Note.objects.change_counter(note_ids, field, delta, weight=weight)
+
+
+@receiver(m2m_changed, sender=Note.likes.through)
+def update_likes_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep `Note.likes_count` and `UserProfile.total_likes` in sync."""
+    related_name = "liked_notes" if reverse else "likes"
+    changes = get_m2m_changes(instance, action, reverse, pk_set, related_name)
+    if not changes:
+        return
+    apply_m2m_changes(changes, "likes_count", LIKE_WEIGHT)
+    if reverse:
+        authors = Note.objects.filter(
+            pk__in=changes.keys(), draft=False, anonymous=False
+        ).values_list("pk", "author_id")
+        author_likes = Counter()
+        for note_id, author_id in authors:
+            author_likes[author_id] += changes[note_id]
+    elif not instance.draft and not instance.anonymous:
+        author_likes = {instance.author_id: changes[instance.pk]}
+    else:
+        return
+    change_total_likes(author_likes)
+
+
+@receiver(m2m_changed, sender=Note.bookmarks.through)
+def update_bookmarks_counters(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Keep `Note.bookmarks_count` in sync."""
+    related_name = "bookmarked_notes" if reverse else "bookmarks"
+    changes = get_m2m_changes(instance, action, reverse, pk_set, related_name)
+    apply_m2m_changes(changes, "bookmarks_count", BOOKMARK_WEIGHT)
+
+
+@receiver(pre_delete, sender=User)
+def free_user_counters(sender, instance, **kwargs):
+    """Decrease counters of notes liked/bookmarked by a deleting user.
+
+    Rows of m2m tables are deleted by a cascade without `m2m_changed`.
+    """
+    update_likes_counters(
+        Note.likes.through, instance, "pre_clear", True, None
+    )
+    update_bookmarks_counters(
+        Note.bookmarks.through, instance, "pre_clear", True, None
+    )
+
+
 @receiver(post_save, sender=Note)
-def note_created_actions(sender, instance, created, **kwargs):
-    """Create actions if a note instance was created."""
-    if created:
-        Action.objects.create_action(
-            instance.author, act.CREATE, target=instance, notify=True
+def increase_forks_count(sender, instance, created, **kwargs):
+    """Increase `forks_count` of a parent note if a fork was created."""
+    if created and instance.fork_id:
+        Note.objects.change_counter([instance.fork_id], "forks_count", 1)
+
+
+@receiver(pre_save, sender=Note)
+def move_total_likes(sender, instance, update_fields=None, **kwargs):
+    """Add likes of a published note to author's `total_likes`, subtract
+    likes of a note made a draft or anonymous."""
+    if instance._state.adding or not instance.author_id:
+        return
+    fields = {"draft", "anonymous"}
+    if update_fields is not None:
+        fields &= set(update_fields)
+    if not fields & instance.get_dirty_fields():
+        return
+    public = not instance.draft and not instance.anonymous
+    note = Note.objects.filter(pk=instance.pk)
+    if public == note.filter(draft=False, anonymous=False).exists():
+        return
+    likes = Note.likes.through.objects.filter(note_id=instance.pk).count()
+    change_total_likes({instance.author_id: likes if public else -likes})
+
+
+@receiver(pre_delete, sender=Note)
+def decrease_total_likes(sender, instance, **kwargs):
+    """Decrease author's `total_likes` by likes of a deleting note."""
+    author_likes = count_author_likes(Note.objects.filter(pk=instance.pk))
+    change_total_likes(
+        {author: -likes for author, likes in author_likes.items()}
+    )
+
+
+@receiver(post_delete, sender=Note)
+def decrease_forks_count(sender, instance, **kwargs):
+    """Decrease `forks_count` of a parent note if a fork was deleted."""
+    if instance.fork_id:
+        Note.objects.change_counter([instance.fork_id], "forks_count", -1)
+
+
+def get_feed_state(note: Note) -> tuple:
+    """Return fields of a note that define feeds it is in.
+
+    Values are taken from `__dict__`, deferred fields aren't loaded.
+    """
+    return (note.__dict__.get("draft"), note.__dict__.get("anonymous"))
+
+
+@receiver(post_init, sender=Note)
+def remember_feed_state(sender, instance, **kwargs):
+    instance._feed_state = get_feed_state(instance)
+
+
+@receiver(post_save, sender=Note)
+def update_note_feeds(sender, instance, created, **kwargs):
+    """Fan a published note out to home feeds (or remove a hidden one)."""
+    state = get_feed_state(instance)
+    if created or state != instance._feed_state:
+        note_id = instance.pk
+        transaction.on_commit(lambda: update_note_feeds_task.delay(note_id))
+    instance._feed_state = state
+
+
+@receiver(post_save, sender=Following)
+@receiver(post_delete, sender=Following)
+def rebuild_following_feed(sender, instance, **kwargs):
+    """Rebuild the following feed when a user follows or unfollows."""
+    user_id = instance.follower_id
+    transaction.on_commit(
+        lambda: rebuild_feed_task.delay(user_id, FeedEntry.FOLLOWING)
+    )
+
+
+@receiver(post_save, sender=UnicodeTaggedItem)
+@receiver(post_delete, sender=UnicodeTaggedItem)
+def update_tags_feeds(sender, instance, **kwargs):
+    """Update feeds when a note is (un)tagged or a user (un)subscribes."""
+    content_type = ContentType.objects.get_for_id(instance.content_type_id)
+    if content_type.model_class() is Note:
+        note_id = instance.object_id
+        transaction.on_commit(lambda: update_note_feeds_task.delay(note_id))
+    elif content_type.model_class() is UserProfile:
+        user_id = (
+            UserProfile.objects.filter(pk=instance.object_id)
+            .values_list("user_id", flat=True)
+            .first()
+        )
+        if user_id is not None:
+            transaction.on_commit(
+                lambda: rebuild_feed_task.delay(user_id, FeedEntry.TAGS)
+            )
+
+
+@receiver(post_save, sender=UserProfile)
+def expire_author_fragments(sender, instance, **kwargs):
+    """Expire cached fragments that show a name or an avatar of a user."""
+    expire_profile_header(instance.user_id)
+    expire_note_cards(
+        Note.objects.filter(author_id=instance.user_id).values_list(
+            "pk", "modified"
+        )
+    )
+
+
+@receiver(post_save, sender=Source)
+def expire_source_note_cards(sender, instance, created, **kwargs):
+    """Expire cached cards of notes of a changed source."""
+    if not created:
+        expire_note_cards(instance.notes.values_list("pk", "modified"))
+
+
+@receiver(post_save, sender=UnicodeTaggedItem)
+@receiver(post_delete, sender=UnicodeTaggedItem)
+def expire_tagged_note_card(sender, instance, **kwargs):
+    """Expire a cached card of a note when it is (un)tagged."""
+    content_type = ContentType.objects.get_for_id(instance.content_type_id)
+    if content_type.model_class() is Note:
+        expire_note_cards(
+            Note.objects.filter(pk=instance.object_id).values_list(
+                "pk", "modified"
+            )
         )
+
+
+@receiver(post_delete, sender=Note)
+def delete_note_exports(sender, instance, **kwargs):
+    """Remove exported files of a deleted note."""
+    note_ids = [instance.pk]
+    transaction.on_commit(lambda: delete_exports(note_ids))
+
+
+@receiver(post_save, sender=Source)
+def delete_source_note_exports(sender, instance, created, **kwargs):
+    """Remove exports of notes of a changed source (they include it)."""
+    if not created:
+        note_ids = list(instance.notes.values_list("pk", flat=True))
+        transaction.on_commit(lambda: delete_exports(note_ids))
@@ -0,0 +1,156 @@
+from typing import Dict, Optional
+
+from celery import shared_task
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from users.models import User
+
+from .counters import flush_views
+from .exports import create_export
+from .fragments import expire_note_cards
+from .imports import NoteImporter
+from .models import FeedEntry, Note
+from .orphans import delete_orphans
+
+
+@shared_task(
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_kwargs={"max_retries": 5},
+)
+def render_note_task(note_id: int) -> bool:
+    """Renders a note body and populates fields derived from it.
+
+    The note is updated only if it wasn't modified while rendering,
+    otherwise a task scheduled by the later save does the work. Cached
+    cards of the note (with the provisional preview) are expired.
+    A failed render is retried with an exponential backoff, a note still
+    rendering after all retries is queued again by its next save.
+
+    Args:
+        note_id: A primary key of a rendering note.
+
+    Returns:
+        True if the note was updated, otherwise False.
+    """
+    try:
+        note = Note.objects.get(pk=note_id)
+    except Note.DoesNotExist:
+        return False
+    note.render()
+    updated = Note.objects.filter(pk=note.pk, modified=note.modified).update(
+        body_html=note.body_html,
+        preview_text=note.preview_text,
+        image_url=note.image_url,
+        lang=note.lang,
+        weight=note.weight,
+        render_status=note.render_status,
+    )
+    if updated:
+        expire_note_cards([(note.pk, note.modified)])
+    return bool(updated)
+
+
+@shared_task()
+def update_note_feeds_task(note_id: int) -> bool:
+    """Put a note to home feeds of users or remove it from them.
+
+    Args:
+        note_id: A primary key of a published (or hidden) note.
+
+    Returns:
+        False if the note doesn't exist, otherwise True.
+    """
+    try:
+        note = Note.objects.get(pk=note_id)
+    except Note.DoesNotExist:
+        return False
+    FeedEntry.objects.update_note(note)
+    return True
+
+
+@shared_task()
+def rebuild_feed_task(user_id: int, reason: str):
+    """Fill a home feed of a user with the latest notes.
+
+    Args:
+        user_id: A primary key of the feed owner.
+        reason: A feed to rebuild (`FeedEntry.FOLLOWING`, `FeedEntry.TAGS`).
+    """
+    FeedEntry.objects.rebuild(user_id, reason)
+
+
+@shared_task()
+def flush_note_views_task() -> int:
+    """Move buffered note views to the database (a periodic task).
+
+    Returns:
+        A number of updated notes.
+    """
+    return flush_views()
+
+
+@shared_task()
+def delete_orphans_task() -> Dict[str, int]:
+    """Delete sources and tags left without notes (a periodic task).
+
+    Returns:
+        Numbers of deleted objects by kinds.
+    """
+    return delete_orphans()
+
+
+@shared_task()
+def export_note_task(note_id: int, filetype: str) -> Optional[str]:
+    """Generate an export of a note (see `content.exports`).
+
+    Args:
+        note_id: A primary key of a note.
+        filetype: A format of the export (`md`, `html`, `pdf`).
+
+    Returns:
+        A storage name of the export or None if the note doesn't exist.
+    """
+    try:
+        note = Note.objects.select_related("source").get(pk=note_id)
+    except Note.DoesNotExist:
+        return None
+    return create_export(note, filetype)
+
+
+@shared_task(bind=True)
+def import_notes_task(self, name: str, author_id: int) -> int:
+    """Import notes from an uploaded zip archive (see `content.imports`).
+
+    Bodies are rendered by the worker itself (processes of a Celery pool
+    can't start a process pool). The progress is reported as the
+    `PROGRESS` state with `{"done": 10, "total": 100}`, the archive is
+    removed from the storage.
+
+    Args:
+        name: A storage name of the archive.
+        author_id: A primary key of an author of notes.
+
+    Returns:
+        A number of created notes.
+    """
+
+    def report(done: int, total: int):
+        if not self.request.is_eager:
+            self.update_state(
+                state="PROGRESS", meta={"done": done, "total": total}
+            )
+
+    try:
+        author = User.objects.filter(pk=author_id).first()
+        if author is None:
+            return 0
+        importer = NoteImporter(
+            author, max_notes=settings.NOTE_IMPORT_MAX_NOTES
+        )
+        with default_storage.open(name) as file:
+            return importer.import_archive(file, progress=report)
+    finally:
+        default_storage.delete(name)
@@ -0,0 +1,36 @@
+from typing import Iterable
+
+from django import template
+from django.utils.safestring import SafeString
+
+from ..fragments import render_note_cards
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def note_cards(notes: Iterable) -> SafeString:
+    """Render cards of notes via the fragment cache.
+
+    Example:
+        `{% note_cards notes %}`
+    """
+    return render_note_cards(notes)
+
+
+@register.filter
+def fragment_version(objects: Iterable) -> str:
+    """Build a version of a cached fragment that displays `objects`.
+
+    The version changes when the list changes or an object is modified.
+
+    Example:
+        `{% cache 600 "sidenotes" sidenotes|fragment_version %}`
+    """
+    return ",".join(
+        f"{obj.pk}:{obj.modified.timestamp()}"
+        if hasattr(obj, "modified")
+        else f"{obj.pk}:{obj}"
+        for obj in objects
+    )
@@ -1,4 +1,18 @@
+from content.tests.budgets import QueryBudgetTest
+from content.tests.counters import ViewCounterTest
+from content.tests.deletion import AccountDeletionTest
+from content.tests.exports import ExportTest
+from content.tests.feed import FeedTest
+from content.tests.fragments import NoteCardCacheTest
+from content.tests.imports import NoteImportTest
+from content.tests.markdown import (
+    MarkdownFieldTest,
+    MarkdownRenderCacheTest,
+    MarkdownRendererTest,
+)
 from content.tests.note.models import NoteModelTest
 from content.tests.note.urls import NoteUrlsTest
+from content.tests.orphans import OrphansTest
+from content.tests.preview import PreviewParserTest
 from content.tests.source.models import SourceModelTest
 from content.tests.source.urls import SourceUrlsTest
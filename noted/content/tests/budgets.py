@@ -0,0 +1,61 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from common.queries import QueryBudgetMixin
+from content.models import Note, Source
+from users.models import Following, User
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    # Budgets don't depend on numbers of notes, followers, tags and likes.
+    query_budgets = {
+        "content:home": 12,
+        "content:note": 20,
+        "content:profile_notes": 12,
+        "content:personal_notes": 14,
+        "content:source": 10,
+        "content:source_type": 10,
+        "content:search": 6,
+    }
+
+    def setUp(self):
+        self.author = User.objects.create(
+            email="author@email.qq", full_name="Some Author"
+        )
+        self.reader = User.objects.create(
+            email="reader@email.qq", full_name="Some Reader"
+        )
+        self.source = Source.objects.create(title="Book", type=Source.BOOK)
+        for number in range(5):
+            follower = User.objects.create(email=f"user{number}@email.qq")
+            Following.objects.create(follower=follower, followed=self.author)
+            Following.objects.create(follower=follower, followed=self.reader)
+            note = Note.objects.create(
+                title=f"Note {number}",
+                author=self.author,
+                source=self.source,
+                pin=number == 0,
+            )
+            note.tags.add(f"tag{number}", "python")
+            note.likes.add(follower)
+            note.bookmarks.add(self.reader)
+        self.note = note
+        self.client.force_login(self.reader)
+
+    def test_note_lists(self):
+        for url in (
+            reverse("content:home"),
+            reverse("content:profile_notes", args=[self.author.slug]),
+            reverse("content:personal_notes"),
+            reverse("content:source", args=[self.source.slug]),
+            reverse("content:source_type", args=[Source.BOOK]),
+            reverse("content:search", args=["notes"]) + "?query=note",
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertQueryBudget(response)
+
+    def test_note_details(self):
+        response = self.client.get(self.note.get_absolute_url())
+        self.assertQueryBudget(response)
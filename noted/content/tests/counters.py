@@ -0,0 +1,84 @@
+from django.test import TestCase, override_settings
+
+from content.counters import (
+    LocalViewCounter,
+    _load_view_counter,
+    flush_views,
+    get_view_counter,
+)
+from content.models import Note
+from users.models import User
+
+
+@override_settings(
+    VIEW_COUNTER="content.counters.LocalViewCounter",
+    VIEW_COUNTER_FLUSH_INTERVAL=3600,
+)
+class ViewCounterTest(TestCase):
+    def setUp(self):
+        _load_view_counter.cache_clear()
+        self.author = User.objects.create(
+            email="author@email.qq", full_name="Some Author"
+        )
+        self.reader = User.objects.create(
+            email="reader@email.qq", full_name="Some Reader"
+        )
+        self.note = Note.objects.create(title="Note", author=self.author)
+
+    def tearDown(self):
+        _load_view_counter.cache_clear()
+
+    def views(self):
+        return Note.objects.values_list("views", flat=True).get(
+            pk=self.note.pk
+        )
+
+    def test_local_counter(self):
+        counter = LocalViewCounter()
+        counter.incr(1)
+        counter.incr(1, 2)
+        counter.incr(2)
+        self.assertEqual(counter.pop(), {1: 3, 2: 1})
+        self.assertEqual(counter.pop(), {})
+
+    def test_flush_views(self):
+        other = Note.objects.create(title="Other", author=self.author)
+        counter = get_view_counter()
+        counter.incr(self.note.pk, 3)
+        counter.incr(other.pk)
+        self.assertEqual(flush_views(batch_size=1), 2)
+        self.assertEqual(self.views(), 3)
+        self.assertEqual(Note.objects.get(pk=other.pk).views, 1)
+        self.assertEqual(counter.pop(), {})
+        self.assertEqual(flush_views(), 0)
+
+    def test_views_buffered(self):
+        self.client.get(self.note.get_absolute_url())
+        self.assertEqual(self.views(), 0)
+        flush_views()
+        self.assertEqual(self.views(), 1)
+
+    def test_view_counted_once_per_session(self):
+        self.client.force_login(self.reader)
+        for _ in range(3):
+            self.client.get(self.note.get_absolute_url())
+        flush_views()
+        self.assertEqual(self.views(), 1)
+
+    @override_settings(VIEW_COUNTER_SESSION_DEDUP=False)
+    def test_view_counted_without_dedup(self):
+        for _ in range(3):
+            self.client.get(self.note.get_absolute_url())
+        flush_views()
+        self.assertEqual(self.views(), 3)
+
+    def test_author_view_not_counted(self):
+        self.client.force_login(self.author)
+        self.client.get(self.note.get_absolute_url())
+        flush_views()
+        self.assertEqual(self.views(), 0)
+
+    @override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0)
+    def test_inline_flush(self):
+        self.client.get(self.note.get_absolute_url())
+        self.assertEqual(self.views(), 1)
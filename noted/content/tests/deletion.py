@@ -0,0 +1,79 @@
+from taggit.models import Tag
+
+from django.test import TestCase
+from django.urls import reverse
+
+from content.deletion import delete_author_notes
+from content.models import FeedEntry, Note, OrphanCandidate, Source
+from tags.models import UnicodeTaggedItem
+from users.models import User
+
+
+class AccountDeletionTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(email="author@email.qq")
+        self.reader = User.objects.create(email="reader@email.qq")
+        self.source = Source.objects.create(title="Book", type=Source.BOOK)
+        self.parent = Note.objects.create(title="Parent", author=self.reader)
+        self.notes = [
+            Note.objects.create(
+                title=f"Note {number}",
+                author=self.author,
+                source=self.source,
+                fork=self.parent,
+            )
+            for number in range(3)
+        ]
+        for note in self.notes:
+            note.tags.add("python")
+            note.likes.add(self.reader)
+            note.bookmarks.add(self.reader)
+        self.fork = Note.objects.create(
+            title="Fork", author=self.reader, fork=self.notes[0]
+        )
+        self.client.force_login(self.author)
+
+    def delete_account(self, method: str):
+        return self.client.post(
+            reverse("users:delete_account"), {"delete_method": method}
+        )
+
+    def test_delete_account(self):
+        response = self.delete_account("delete")
+        self.assertContains(response, response.context["task_id"])
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+        self.assertEqual(Note.objects.count(), 2)
+        self.assertEqual(Note.objects.get(pk=self.parent.pk).forks_count, 0)
+        self.assertIsNone(Note.objects.get(pk=self.fork.pk).fork)
+        self.assertFalse(self.reader.liked_notes.exists())
+        self.assertFalse(UnicodeTaggedItem.objects.exists())
+        self.assertEqual(
+            set(OrphanCandidate.objects.values_list("kind", "object_id")),
+            {
+                (OrphanCandidate.SOURCE, self.source.pk),
+                (OrphanCandidate.TAG, Tag.objects.get(name="python").pk),
+            },
+        )
+
+    def test_delete_account_keep_notes(self):
+        self.delete_account("keep")
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        notes = Note.objects.filter(pk__in=[note.pk for note in self.notes])
+        self.assertEqual(notes.filter(anonymous=True, author=None).count(), 3)
+        self.assertFalse(
+            FeedEntry.objects.filter(reason=FeedEntry.FOLLOWING).exists()
+        )
+
+    def test_delete_author_notes_by_chunks(self):
+        progress = []
+        deleted = delete_author_notes(
+            self.author.pk,
+            chunk_size=2,
+            progress=lambda done, total: progress.append((done, total)),
+        )
+        self.assertEqual(deleted, 3)
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+        self.assertFalse(Note.objects.filter(author=self.author).exists())
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.total_likes, 0)
@@ -0,0 +1,110 @@
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from content.exports import export_name, get_export
+from content.models import Note, Source
+from content.tasks import render_note_task
+from users.models import User
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.author = User.objects.create(email="author@email.qq")
+        self.source = Source.objects.create(title="Book", type=Source.BOOK)
+        self.note = Note.objects.create(
+            title="Note", author=self.author, source=self.source, body_raw="Hi"
+        )
+        self.client.force_login(self.author)
+
+    def url(self, filetype: str) -> str:
+        return reverse(
+            "content:download_note", args=[filetype, self.note.slug]
+        )
+
+    def test_export_cached(self):
+        with patch.object(
+            Note, "generate_file", wraps=self.note.generate_file
+        ) as generate:
+            response = self.client.get(self.url("md"))
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b"# Note", b"".join(response.streaming_content))
+            self.client.get(self.url("md"))
+        generate.assert_called_once()
+        self.assertTrue(response["ETag"])
+        self.assertTrue(response["Last-Modified"])
+        self.assertIn("attachment", response["Content-Disposition"])
+
+    def test_export_not_modified(self):
+        etag = self.client.get(self.url("html"))["ETag"]
+        response = self.client.get(self.url("html"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_version_replaces_export(self):
+        self.client.get(self.url("md"))
+        old_name = export_name(self.note, "md")
+        self.note.title = "New title"
+        self.note.save()
+        response = self.client.get(self.url("md"))
+        self.assertIn(b"# New title", b"".join(response.streaming_content))
+        self.assertFalse(default_storage.exists(old_name))
+
+    @patch("content.models.pdfkit.from_string", return_value=b"%PDF-1.4")
+    def test_pdf_prepared_by_task(self, from_string):
+        response = self.client.get(self.url("pdf"))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["msg"], "preparing")
+        self.assertTrue(get_export(self.note, "pdf"))
+        response = self.client.get(
+            self.url("pdf"), HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+        self.assertEqual(response.json(), {"msg": "ready"})
+        response = self.client.get(self.url("pdf"))
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.4")
+        from_string.assert_called_once()
+
+    def test_exports_deleted(self):
+        self.client.get(self.url("md"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.source.title = "New book"
+            self.source.save()
+        self.assertIsNone(get_export(self.note, "md"))
+        self.client.get(self.url("md"))
+        name = export_name(self.note, "md")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.note.delete()
+        self.assertFalse(default_storage.exists(name))
+
+    def test_source_change_changes_etag(self):
+        etag = self.client.get(self.url("md"))["ETag"]
+        Source.objects.filter(pk=self.source.pk).update(title="New book")
+        response = self.client.get(self.url("md"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIn(b"New book", b"".join(response.streaming_content))
+
+    def test_rendering_export_replaced(self):
+        Note.objects.filter(pk=self.note.pk).update(
+            render_status=Note.RENDERING, body_html="<p>Provisional</p>"
+        )
+        response = self.client.get(self.url("html"))
+        self.assertIn(b"Provisional", b"".join(response.streaming_content))
+        render_note_task(self.note.pk)
+        response = self.client.get(self.url("html"))
+        self.assertNotIn(b"Provisional", b"".join(response.streaming_content))
+
+    def test_draft_export_forbidden(self):
+        Note.objects.filter(pk=self.note.pk).update(draft=True)
+        self.client.force_login(User.objects.create(email="user@email.qq"))
+        self.assertEqual(self.client.get(self.url("md")).status_code, 400)
+        self.assertEqual(self.client.get(self.url("txt")).status_code, 400)
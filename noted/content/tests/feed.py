@@ -0,0 +1,88 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from content.models import FeedEntry, Note
+from users.models import Following, User
+
+
+class FeedTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(
+            email="author@email.qq", full_name="Some Author"
+        )
+        self.reader = User.objects.create(
+            email="reader@email.qq", full_name="Some Reader"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Following.objects.create(
+                follower=self.reader, followed=self.author
+            )
+
+    def create_note(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Note.objects.create(
+                title="Note", author=self.author, **kwargs
+            )
+
+    def feed(self, reason=FeedEntry.FOLLOWING):
+        return list(FeedEntry.objects.notes(self.reader, reason))
+
+    def test_note_published(self):
+        note = self.create_note()
+        self.assertEqual(self.feed(), [note])
+        self.assertEqual(self.feed(FeedEntry.TAGS), [])
+
+    def test_hidden_notes(self):
+        self.create_note(draft=True)
+        anonymous = self.create_note(anonymous=True)
+        self.assertEqual(self.feed(), [])
+        note = self.create_note()
+        with self.captureOnCommitCallbacks(execute=True):
+            note.draft = True
+            note.save()
+            anonymous.anonymous = False
+            anonymous.save()
+        self.assertEqual(self.feed(), [anonymous])
+
+    def test_follow_unfollow(self):
+        note = self.create_note()
+        other = User.objects.create(email="other@email.qq")
+        with self.captureOnCommitCallbacks(execute=True):
+            Following.objects.create(follower=other, followed=self.author)
+        self.assertEqual(
+            list(FeedEntry.objects.notes(other, FeedEntry.FOLLOWING)), [note]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Following.objects.filter(follower=self.reader).delete()
+        self.assertEqual(self.feed(), [])
+
+    def test_tags_feed(self):
+        note = self.create_note(anonymous=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            note.tags.add("python")
+            self.reader.profile.tags.add("python")
+        self.assertEqual(self.feed(FeedEntry.TAGS), [note])
+        tagged_later = self.create_note()
+        with self.captureOnCommitCallbacks(execute=True):
+            tagged_later.tags.add("python")
+        self.assertEqual(self.feed(FeedEntry.TAGS), [tagged_later, note])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader.profile.tags.remove("python")
+        self.assertEqual(self.feed(FeedEntry.TAGS), [])
+
+    @override_settings(FEED_LENGTH=2)
+    def test_feed_trimmed(self):
+        notes = [self.create_note() for _ in range(3)]
+        self.assertEqual(self.feed(), notes[:0:-1])
+        with self.captureOnCommitCallbacks(execute=True):
+            Following.objects.create(
+                follower=self.reader,
+                followed=User.objects.create(email="other@email.qq"),
+            )
+        self.assertEqual(self.feed(), notes[:0:-1])
+
+    def test_home_page(self):
+        note = self.create_note()
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse("content:home"))
+        self.assertEqual(list(response.context["following_notes"]), [note])
@@ -0,0 +1,86 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from content import fragments
+from content.fragments import render_note_cards
+from content.models import Note
+from content.tasks import render_note_task
+from users.models import User
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+)
+class NoteCardCacheTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(
+            email="author@email.qq", full_name="Some Author"
+        )
+        self.reader = User.objects.create(
+            email="reader@email.qq", full_name="Some Reader"
+        )
+        self.note = Note.objects.create(
+            title="<note-overlay views>", author=self.author, views=7
+        )
+        self.note.likes.add(self.reader)
+
+    def cards(self, user):
+        notes = Note.objects.optimize().for_viewer(user).order_by("pk")
+        with patch.object(
+            fragments, "render_to_string", wraps=fragments.render_to_string
+        ) as render:
+            html = render_note_cards(notes)
+        return html, render.call_count
+
+    def test_cards_cached(self):
+        html, renders = self.cards(self.author)
+        self.assertEqual(renders, 1)
+        self.assertIn('bi-heart"', html)
+        html, renders = self.cards(self.reader)
+        self.assertEqual(renders, 0)
+        self.assertIn("bi-heart-fill", html)
+        self.assertIn("1 likes", html)
+        self.assertIn("7 views", html)
+        self.assertIn("&lt;note-overlay views&gt;", html)
+        self.assertNotIn("<note-overlay", html)
+
+    def test_modified_note_rendered(self):
+        self.cards(self.author)
+        self.note.title = "New title"
+        self.note.save()
+        html, renders = self.cards(self.author)
+        self.assertEqual(renders, 1)
+        self.assertIn("New title", html)
+
+    def test_rendered_note_expires_card(self):
+        Note.objects.filter(pk=self.note.pk).update(
+            body_raw="Rendered text",
+            preview_text="Provisional text",
+            render_status=Note.RENDERING,
+        )
+        html, _ = self.cards(self.author)
+        self.assertIn("Provisional text", html)
+        render_note_task(self.note.pk)
+        html, renders = self.cards(self.author)
+        self.assertEqual(renders, 1)
+        self.assertIn("Rendered text", html)
+        self.assertNotIn("Provisional text", html)
+
+    def test_profile_change_expires_cards(self):
+        self.cards(self.author)
+        self.author.full_name = "Other Name"
+        self.author.save()
+        self.author.profile.save()
+        html, renders = self.cards(self.author)
+        self.assertEqual(renders, 1)
+        self.assertIn("Other Name", html)
+
+    def test_tags_change_expires_card(self):
+        self.cards(self.author)
+        self.note.tags.add("python")
+        html, renders = self.cards(self.author)
+        self.assertEqual(renders, 1)
+        self.assertIn("python", html)
@@ -0,0 +1,128 @@
+import io
+import shutil
+import tempfile
+import zipfile
+
+from taggit.models import Tag
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from content.imports import NoteImporter, parse_front_matter
+from content.models import Note, Source
+from users.models import User
+
+
+NOTE_WITH_FRONT_MATTER = """---
+title: "Clean code"
+tags: [Python, "#style"]
+source: Clean Code
+source_type: book
+draft: false
+---
+# Clean code
+
+Functions should do one thing. They should do it well.
+"""
+NOTE_WITH_TAG_LIST = """---
+tags:
+  - python
+  - django
+---
+Django models are Python classes.
+"""
+
+
+def make_archive(files: dict) -> io.BytesIO:
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for name, text in files.items():
+            zip_file.writestr(name, text)
+    archive.seek(0)
+    archive.name = "vault.zip"
+    return archive
+
+
+class NoteImportTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(email="author@email.qq")
+        self.source = Source.objects.create(
+            title="Clean Code", type=Source.BOOK
+        )
+        Tag.objects.create(name="python", slug="python")
+        self.archive = make_archive(
+            {
+                "vault/clean.md": NOTE_WITH_FRONT_MATTER,
+                "vault/django/models.md": NOTE_WITH_TAG_LIST,
+                "vault/plain.md": "Just a text.",
+                "vault/empty.md": "",
+                "vault/.obsidian/app.md": "Settings",
+                "vault/image.png": "PNG",
+            }
+        )
+
+    def test_parse_front_matter(self):
+        meta, body = parse_front_matter(NOTE_WITH_TAG_LIST)
+        self.assertEqual(meta, {"tags": ["python", "django"]})
+        self.assertEqual(body, "Django models are Python classes.\n")
+        self.assertEqual(parse_front_matter("# Title"), ({}, "# Title"))
+
+    def test_import_archive(self):
+        progress = []
+        created = NoteImporter(self.author, batch_size=2).import_archive(
+            self.archive,
+            progress=lambda done, total: progress.append((done, total)),
+        )
+        self.assertEqual(created, 3)
+        self.assertEqual(progress, [(2, 4), (4, 4)])
+        note = Note.objects.get(title="Clean code")
+        self.assertFalse(note.draft)
+        self.assertEqual(note.source, self.source)
+        self.assertEqual(note.render_status, Note.RENDERED)
+        self.assertIn("<h1>Clean code</h1>", note.body_html)
+        self.assertEqual(note.lang, Note.EN)
+        self.assertTrue(note.weight)
+        self.assertEqual(
+            set(note.tags.values_list("name", flat=True)), {"python", "style"}
+        )
+        self.assertTrue(Note.objects.get(title="models").draft)
+        self.assertEqual(Note.objects.get(title="plain").author, self.author)
+        self.assertEqual(Source.objects.count(), 1)
+        self.assertEqual(Tag.objects.filter(name="python").count(), 1)
+
+    def test_import_notes_command(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = f"{directory}/vault.zip"
+        with open(path, "wb") as file:
+            file.write(self.archive.getvalue())
+        call_command(
+            "import_notes",
+            path,
+            author=self.author.email,
+            processes=2,
+            publish=True,
+            stdout=io.StringIO(),
+        )
+        self.assertEqual(Note.objects.filter(draft=False).count(), 3)
+        self.assertTrue(Note.objects.get(title="plain").body_html)
+
+    def test_import_notes_view(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.client.force_login(self.author)
+        with override_settings(MEDIA_ROOT=media_root):
+            response = self.client.post(
+                reverse("content:import_notes"), {"archive": self.archive}
+            )
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()["msg"], "started")
+            self.assertEqual(
+                Note.objects.filter(author=self.author).count(), 3
+            )
+            response = self.client.post(
+                reverse("content:import_notes"),
+                {"archive": io.BytesIO(b"not a zip")},
+            )
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,148 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from content.markdown import (
+    GitHubMarkdownRenderer,
+    LocalMarkdownRenderer,
+    _render_cache,
+    get_renderer,
+    make_render_cache_key,
+    pick_markdown_to_html,
+)
+from content.models import Note
+
+
+class MarkdownRendererTest(TestCase):
+    def setUp(self):
+        self.renderer = LocalMarkdownRenderer()
+
+    def test_default_renderer(self):
+        self.assertIsInstance(get_renderer(), LocalMarkdownRenderer)
+
+    @override_settings(
+        MARKDOWN_RENDERER="content.markdown.GitHubMarkdownRenderer"
+    )
+    def test_renderer_setting(self):
+        self.assertIsInstance(get_renderer(), GitHubMarkdownRenderer)
+
+    @patch("content.markdown.requests.post")
+    def test_no_network_by_default(self, post):
+        pick_markdown_to_html("# Hello")
+        post.assert_not_called()
+
+    def test_table(self):
+        html = self.renderer.render("| a | b |\n|---|---|\n| 1 | 2 |")
+        self.assertIn("<table>", html)
+        self.assertIn("<td>2</td>", html)
+
+    def test_fenced_code(self):
+        html = self.renderer.render("```\nx = 1\n```")
+        self.assertIn("<pre>", html)
+        self.assertIn("x = 1", html)
+
+    def test_task_list(self):
+        html = self.renderer.render("- [ ] todo\n- [x] done")
+        self.assertEqual(html.count('type="checkbox"'), 2)
+        self.assertIn("checked", html)
+
+    def test_autolink(self):
+        html = self.renderer.render("See https://example.com.")
+        self.assertIn('<a href="https://example.com">', html)
+
+    def test_autolink_www(self):
+        html = self.renderer.render("See www.example.com")
+        self.assertIn('<a href="http://www.example.com">', html)
+
+    def test_autolink_keeps_links(self):
+        html = self.renderer.render("[site](https://example.com)")
+        self.assertEqual(html.count("<a "), 1)
+
+    def test_autolink_skips_raw_link(self):
+        html = self.renderer.render('See <a href="https://example.com">x</a>')
+        self.assertIn('<a href="https://example.com">x</a>', html)
+        self.assertEqual(html.count("<a "), 1)
+
+    def test_autolink_skips_raw_link_text(self):
+        html = self.renderer.render(
+            '<a href="https://example.com">https://example.com</a>'
+        )
+        self.assertEqual(html.count("<a "), 1)
+
+    def test_autolink_skips_raw_image(self):
+        html = self.renderer.render('<img src="https://example.com/a.png">')
+        self.assertIn('<img src="https://example.com/a.png">', html)
+        self.assertNotIn("<a ", html)
+
+    def test_underscores_in_words(self):
+        html = self.renderer.render("snake_case_name")
+        self.assertNotIn("<em>", html)
+
+
+class MarkdownRenderCacheTest(TestCase):
+    def setUp(self):
+        _render_cache.clear()
+
+    def test_cache_key_depends_on_text(self):
+        renderer = LocalMarkdownRenderer()
+        self.assertNotEqual(
+            make_render_cache_key("a", renderer),
+            make_render_cache_key("b", renderer),
+        )
+
+    def test_cache_key_depends_on_version(self):
+        renderer = LocalMarkdownRenderer()
+        key = make_render_cache_key("a", renderer)
+        renderer.version = "next"
+        self.assertNotEqual(key, make_render_cache_key("a", renderer))
+
+    @patch.object(LocalMarkdownRenderer, "render", return_value="<p>a</p>")
+    def test_render_once(self, render):
+        self.assertEqual(pick_markdown_to_html("a"), "<p>a</p>")
+        self.assertEqual(pick_markdown_to_html("a"), "<p>a</p>")
+        render.assert_called_once_with("a")
+
+    @override_settings(
+        MARKDOWN_RENDERER="content.markdown.GitHubMarkdownRenderer"
+    )
+    @patch("content.markdown.cache.set")
+    def test_fallback_cached_under_fallback_key(self, cache_set):
+        renderer = get_renderer()
+        html = pick_markdown_to_html("a")
+        self.assertEqual(html, LocalMarkdownRenderer().render("a"))
+        cache_set.assert_called_once()
+        self.assertEqual(
+            cache_set.call_args[0][0],
+            make_render_cache_key("a", renderer.fallback),
+        )
+        self.assertIsNone(
+            _render_cache.get(make_render_cache_key("a", renderer))
+        )
+
+
+@patch("content.fields.pick_markdown_to_html", return_value="<p>Hi</p>")
+class MarkdownFieldTest(TestCase):
+    def test_render_on_create(self, render):
+        note = Note.objects.create(title="Note", body_raw="Hi")
+        render.assert_called_once_with("Hi")
+        self.assertEqual(note.body_html, "<p>Hi</p>")
+
+    def test_skip_unchanged_body(self, render):
+        note = Note.objects.create(title="Note", body_raw="Hi")
+        note = Note.objects.get(pk=note.pk)
+        note.pin = True
+        note.save()
+        render.assert_called_once()
+
+    def test_render_changed_body(self, render):
+        note = Note.objects.create(title="Note", body_raw="Hi")
+        note = Note.objects.get(pk=note.pk)
+        note.body_raw = "Hello"
+        note.save()
+        render.assert_called_with("Hello")
+        self.assertEqual(render.call_count, 2)
+
+    def test_fork_reuses_body(self, render):
+        note = Note.objects.create(title="Note", body_raw="Hi")
+        note.get_fork().save()
+        render.assert_called_once()
@@ -1,11 +1,19 @@
 import datetime
+import io
 import unittest
+from unittest.mock import patch
 
+from django.contrib.postgres.search import SearchQuery
+from django.core.management import call_command
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from content.models import Note, Source
-from users.models import User
+from content.counters import flush_views, get_view_counter
+from content.models import LIKE_WEIGHT, Note, Source
+from content.tasks import render_note_task
+from users.models import User, UserProfile
 
 
 class NoteModelTest(TestCase):
@@ -96,6 +104,7 @@ class NoteModelTest(TestCase):
 
     def test_views(self):
         Client().get(reverse("content:note", args=[self.note.slug]))
+        flush_views()
         note = Note.objects.get(pk=self.note.pk)
         self.assertEqual(note.views, 1)
 
@@ -120,11 +129,122 @@ class NoteModelTest(TestCase):
     def test_image_url_none(self):
         self.assertIsNone(self.note.image_url)
 
+    def test_image_url_too_long(self):
+        src = "a" * 1001
+        self.note_only_title.body_html = f'<img src="{src}" />'
+        self.note_only_title.save()
+        self.assertIsNone(self.note_only_title.image_url)
+
     def test_image_url(self):
         self.note_only_title.body_html = '<img src="image_url" />'
         self.note_only_title.save()
         self.assertEqual(self.note_only_title.image_url, "image_url")
 
+    def test_render_provisional(self):
+        note = Note.objects.create(
+            title="note",
+            body_raw="Hello, world! This is an english note.",
+            render_status=Note.RENDERING,
+        )
+        self.assertIn("Hello", note.body_html)
+        self.assertEqual(note.lang, Note.ER)
+        self.assertEqual(note.preview_text, "")
+
+    def test_render_note_task(self):
+        note = Note.objects.create(
+            title="note",
+            body_raw="Hello, world! This is a simple english note.",
+            render_status=Note.RENDERING,
+        )
+        self.assertTrue(render_note_task(note.pk))
+        note.refresh_from_db()
+        self.assertEqual(note.render_status, Note.RENDERED)
+        self.assertEqual(note.lang, Note.EN)
+        self.assertTrue(note.preview_text.startswith("Hello"))
+
+    def test_render_note_task_retried(self):
+        note = Note.objects.create(
+            title="note", body_raw="Hello", render_status=Note.RENDERING
+        )
+        with patch.object(
+            Note, "render", side_effect=[ValueError("failed"), None]
+        ) as render:
+            result = render_note_task.apply(args=[note.pk])
+        self.assertEqual(render.call_count, 2)
+        self.assertTrue(result.get())
+
+    @patch("content.tasks.render_note_task")
+    def test_rendering_note_queued_on_save(self, task):
+        note = Note.objects.create(
+            title="note", body_raw="Hello", render_status=Note.RENDERING
+        )
+        note = Note.objects.get(pk=note.pk)
+        note.title = "New title"
+        with self.captureOnCommitCallbacks(execute=True):
+            note.save()
+        task.delay.assert_called_once_with(note.pk)
+
+    def test_render_note_task_modified(self):
+        note = Note.objects.create(
+            title="note", body_raw="Hello", render_status=Note.RENDERING
+        )
+
+        def edit_note():
+            Note.objects.filter(pk=note.pk).update(
+                modified=note.modified + datetime.timedelta(seconds=1)
+            )
+
+        with patch.object(Note, "render", side_effect=edit_note):
+            self.assertFalse(render_note_task(note.pk))
+
+    def test_dirty_fields(self):
+        note = Note.objects.get(pk=self.note.pk)
+        self.assertEqual(note.get_dirty_fields(), set())
+        note.title = "New title"
+        note.pin = True
+        self.assertEqual(note.get_dirty_fields(), {"title", "pin"})
+        note.save()
+        self.assertEqual(note.get_dirty_fields(), set())
+        Note.objects.filter(pk=note.pk).update(summary="New summary")
+        note.refresh_from_db(fields=["summary"])
+        self.assertEqual(note.get_dirty_fields(), set())
+
+    @patch.object(Note, "detect_lang")
+    @patch("content.models.parse_preview")
+    @patch("content.fields.pick_markdown_to_html")
+    def test_pin_toggle_skips_derived_fields(self, render, preview, detect):
+        client = Client(HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        client.force_login(self.author)
+        weight = self.note.weight
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(
+                reverse("content:pin_note", args=[self.note.slug])
+            )
+        self.assertTrue(response.json()["pin"])
+        render.assert_not_called()
+        preview.assert_not_called()
+        detect.assert_not_called()
+        update = next(
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "content_note"')
+        )
+        self.assertNotIn("body_html", update)
+        self.assertIn('"weight"', update)
+        self.assertEqual(Note.objects.get(pk=self.note.pk).weight, weight + 1)
+
+    def test_body_change_renders(self):
+        note = Note.objects.get(pk=self.note.pk)
+        note.body_raw = "Hello, world! This is a simple english note."
+        note.save()
+        note.refresh_from_db()
+        self.assertIn("<p>Hello", note.body_html)
+        self.assertTrue(note.preview_text.startswith("Hello"))
+        self.assertEqual(note.lang, Note.EN)
+
+    def test_render_note_task_deleted(self):
+        self.assertFalse(render_note_task(0))
+
     def test_md_file(self):
         file = self.note.generate_md_file()
         rows = file.read().decode().split("\n")
@@ -253,6 +373,162 @@ class NoteModelTest(TestCase):
         self.assertNotIn(self.note_draft, most_liked)
         self.assertIn(self.note, most_liked)
 
+    def test_likes_count(self):
+        self.assertEqual(Note.objects.get(pk=self.note_pin.pk).likes_count, 1)
+        self.note_pin.likes.remove(self.author)
+        self.assertEqual(Note.objects.get(pk=self.note_pin.pk).likes_count, 0)
+
+    def test_likes_count_reverse(self):
+        self.author2.liked_notes.add(self.note, self.note_pin)
+        self.assertEqual(Note.objects.get(pk=self.note.pk).likes_count, 1)
+        self.assertEqual(Note.objects.get(pk=self.note_pin.pk).likes_count, 2)
+        self.author.liked_notes.clear()
+        self.assertEqual(Note.objects.get(pk=self.note_pin.pk).likes_count, 1)
+        self.assertEqual(
+            Note.objects.get(pk=self.note_most_liked.pk).likes_count, 1
+        )
+
+    def test_likes_count_clear(self):
+        self.note_most_liked.likes.clear()
+        note = Note.objects.get(pk=self.note_most_liked.pk)
+        self.assertEqual(note.likes_count, 0)
+
+    def test_likes_weight(self):
+        weight = Note.objects.get(pk=self.note.pk).weight
+        self.note.likes.add(self.author2)
+        self.note.bookmarks.add(self.author2)
+        self.assertEqual(Note.objects.get(pk=self.note.pk).weight, weight + 5)
+
+    def test_bookmarks_count(self):
+        self.note.bookmarks.add(self.author, self.author2)
+        note = Note.objects.get(pk=self.note.pk)
+        self.assertEqual(note.bookmarks_count, 2)
+        self.author.delete()
+        note = Note.objects.get(pk=self.note.pk)
+        self.assertEqual(note.bookmarks_count, 1)
+
+    def test_total_likes(self):
+        self.note.likes.add(self.author2)
+        self.note_anon.likes.add(self.author2)
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.total_likes, 1)
+        self.note_anon.delete()
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.total_likes, 1)
+        self.note.delete()
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.total_likes, 0)
+
+    def test_total_likes_on_visibility_change(self):
+        self.note.likes.add(self.author, self.author2)
+        Note.objects.set_mark(self.note_anon.pk, self.author2.pk, "likes", 1)
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.total_likes, 2)
+        self.note.anonymous = True
+        self.note.save()
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.total_likes, 0)
+        self.note_anon.anonymous = False
+        self.note_anon.save(update_fields=["anonymous"])
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.total_likes, 1)
+        self.note_anon.draft = True
+        self.note_anon.save()
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.total_likes, 0)
+
+    def test_save_keeps_counters(self):
+        note = Note.objects.get(pk=self.note.pk)
+        self.note.likes.add(self.author2)
+        self.note.bookmarks.add(self.author2)
+        note.title = "Changed"
+        note.save()
+        note = Note.objects.get(pk=self.note.pk)
+        self.assertEqual((note.likes_count, note.bookmarks_count), (1, 1))
+
+    def test_save_keeps_flushed_views(self):
+        note = Note.objects.get(pk=self.note.pk)
+        views = note.views
+        get_view_counter().incr(note.pk, 3)
+        flush_views()
+        note.title = "Changed"
+        note.save()
+        self.assertEqual(Note.objects.get(pk=note.pk).views, views + 3)
+
+    def test_weight_with_fresh_counters(self):
+        note = Note.objects.get(pk=self.note.pk)
+        weight = note.weight
+        self.note.likes.add(self.author2)
+        note.pin = not note.pin
+        note.save()
+        note = Note.objects.get(pk=self.note.pk)
+        self.assertEqual(note.likes_count, 1)
+        self.assertEqual(abs(note.weight - weight - LIKE_WEIGHT), 1)
+
+    def test_change_counter_clamps_weight(self):
+        weight = Note.objects.get(pk=self.note.pk).weight
+        Note.objects.change_counter([self.note.pk], "likes_count", -1, 2)
+        note = Note.objects.get(pk=self.note.pk)
+        self.assertEqual((note.likes_count, note.weight), (0, weight))
+
+    def test_forks_count(self):
+        fork = self.note.get_fork()
+        fork.save()
+        self.assertEqual(Note.objects.get(pk=self.note.pk).forks_count, 1)
+        fork.delete()
+        self.assertEqual(Note.objects.get(pk=self.note.pk).forks_count, 0)
+
+    def test_reconcile_counters(self):
+        Note.objects.update(likes_count=0, bookmarks_count=7, forks_count=3)
+        call_command("reconcile_counters", stdout=io.StringIO())
+        note = Note.objects.get(pk=self.note_most_liked.pk)
+        self.assertEqual(note.likes_count, 2)
+        self.assertEqual(note.bookmarks_count, 0)
+        self.assertEqual(note.forks_count, 0)
+        self.author2.profile.refresh_from_db()
+        self.assertEqual(self.author2.profile.total_likes, 1)
+        self.note_anon.likes.add(self.author2)
+        UserProfile.objects.update(total_likes=5)
+        call_command("reconcile_counters", stdout=io.StringIO())
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.total_likes, 0)
+
+    def test_seed_content(self):
+        notes = Note.objects.count()
+        with patch("content.fields.pick_markdown_to_html") as render:
+            call_command(
+                "seed_content",
+                users=5,
+                notes=30,
+                sources=3,
+                tags=4,
+                batch_size=10,
+                stdout=io.StringIO(),
+            )
+        render.assert_not_called()
+        self.assertEqual(Note.objects.count(), notes + 30)
+        note = Note.objects.filter(author__email__startswith="seed.").first()
+        self.assertTrue(note.body_html.startswith("<"))
+        self.assertTrue(note.tags.exists())
+        self.assertEqual(note.likes_count, note.likes.count())
+        self.assertTrue(User.objects.get(pk=note.author_id).profile)
+
+    def test_manager_optimize_for_viewer(self):
+        self.note.likes.add(self.author2)
+        self.note.bookmarks.add(self.author2)
+        notes = {
+            note.pk: note
+            for note in Note.objects.optimize().for_viewer(self.author2)
+        }
+        self.assertTrue(notes[self.note.pk].is_liked)
+        self.assertTrue(notes[self.note.pk].is_bookmarked)
+        self.assertFalse(notes[self.note_pin.pk].is_liked)
+        self.assertFalse(notes[self.note_pin.pk].is_bookmarked)
+        with self.assertNumQueries(0):
+            note = notes[self.note.pk]
+            self.assertEqual(note.min_read, self.note.min_read)
+            self.assertTrue(note.author.profile.avatar.url)
+
     def test_manager_tags_in(self):
         tagged = Note.objects.tags_in(["money", "dev"])
         self.assertIn(self.note_pin, tagged)
@@ -265,5 +541,43 @@ class NoteModelTest(TestCase):
         self.assertEqual(len(Note.objects.tags_in(["tag1", "tag2"])), 1)
 
     def test_manager_search(self):
-        # PostrgreSQL extension problem
-        pass
+        note = Note.objects.create(title="Databases", body_raw="Indexes")
+        draft = Note.objects.create(
+            title="Databases", body_raw="Indexes", draft=True
+        )
+        found = Note.objects.search("index")
+        self.assertIn(note, found)
+        self.assertNotIn(draft, found)
+        self.assertIn(note, Note.objects.search("databse"))
+        self.assertNotIn(note, Note.objects.search("xyz"))
+
+    def test_search_vector(self):
+        note = Note.objects.create(
+            title="Running fast", summary="", body_raw="About databases"
+        )
+        english = Note.objects.filter(
+            search_vector=SearchQuery("database", config="english")
+        )
+        self.assertIn(note, english)
+        Note.objects.filter(pk=note.pk).update(body_raw="Про книги")
+        self.assertNotIn(note, english.all())
+        russian = Note.objects.filter(
+            search_vector=SearchQuery("книга", config="russian")
+        )
+        self.assertNotIn(note, russian)
+        Note.objects.filter(pk=note.pk).update(lang=Note.RU)
+        self.assertIn(note, russian.all())
+
+    def test_search_vector_kept_on_unrelated_update(self):
+        note = Note.objects.create(title="Running fast")
+        vector = Note.objects.values_list("search_vector", flat=True).get(
+            pk=note.pk
+        )
+        note.pin = True
+        note.save()
+        self.assertEqual(
+            Note.objects.values_list("search_vector", flat=True).get(
+                pk=note.pk
+            ),
+            vector,
+        )
@@ -1,5 +1,157 @@
-from django.test import TestCase
+import re
+from html import unescape
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from content.models import Note, Source
+from content.views import PublicNoteList
+from users.models import User
 
 
 class NoteUrlsTest(TestCase):
-    pass
+    def setUp(self):
+        self.author = User.objects.create(
+            email="user@email.qq", full_name="Some User"
+        )
+        self.client.force_login(self.author)
+        self.data = {
+            "title": "Note",
+            "source_type": Source.DEFAULT,
+            "body_raw": "Hello, world! This is a simple english note.",
+        }
+
+    def test_create_note(self):
+        self.client.post(reverse("content:create_note"), self.data)
+        note = Note.objects.get(author=self.author)
+        self.assertEqual(note.render_status, Note.RENDERED)
+        self.assertEqual(note.lang, Note.EN)
+
+    def test_create_draft(self):
+        self.client.post(
+            reverse("content:create_note"), dict(self.data, savedraft="")
+        )
+        self.assertTrue(Note.objects.get(author=self.author).draft)
+
+    @override_settings(NOTE_RENDER_ASYNC=True)
+    @patch("content.tasks.render_note_task")
+    def test_create_note_async(self, task):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("content:create_note"), self.data)
+        note = Note.objects.get(author=self.author)
+        self.assertEqual(note.render_status, Note.RENDERING)
+        task.delay.assert_called_once_with(note.pk)
+
+    @override_settings(NOTE_RENDER_ASYNC=True)
+    @patch("content.tasks.render_note_task")
+    def test_update_note_async_body_unchanged(self, task):
+        note = Note.objects.create(
+            title="Note", author=self.author, body_raw=self.data["body_raw"]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("content:edit_note", args=[note.slug]),
+                dict(self.data, title="New title"),
+            )
+        note.refresh_from_db()
+        self.assertEqual(note.title, "New title")
+        self.assertEqual(note.render_status, Note.RENDERED)
+        task.delay.assert_not_called()
+
+    @patch.object(PublicNoteList, "paginate_by", 2)
+    def test_note_list_cursor_pages(self):
+        titles = [f"Note {number}" for number in range(5)]
+        for number, title in enumerate(titles):
+            Note.objects.create(
+                title=title, author=self.author, views=number % 2
+            )
+        for order in PublicNoteList.SORTING_FUNCS_MAPPING:
+            response = self.client.get(
+                reverse("content:home"), {"order": order}
+            )
+            found = [note.title for note in response.context["notes"]]
+            url = response.context["next_page_url"]
+            while url:
+                html = self.client.get(url).json()["html"]
+                found.extend(re.findall(r"Note \d", html))
+                match = re.search(r'data-url="([^"]+)"', html)
+                url = match and unescape(match.group(1))
+            self.assertEqual(sorted(found), titles)
+
+    def test_note_list_queries(self):
+        def create_notes():
+            for number in range(3):
+                note = Note.objects.create(
+                    title="Note", author=self.author, source=source
+                )
+                note.likes.add(self.author)
+                note.tags.add(f"tag{number}")
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse("content:home"))
+            return len(queries)
+
+        source = Source.objects.create(title="Book")
+        create_notes()
+        queries = count_queries()
+        create_notes()
+        self.assertEqual(count_queries(), queries)
+
+    def test_note_list_invalid_cursor(self):
+        response = self.client.get(reverse("content:home"), {"cursor": "bad"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_like_note_idempotent(self):
+        note = Note.objects.create(title="Note", author=self.author)
+        url = reverse("content:like_note", args=[note.slug])
+        headers = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+        for _ in range(2):
+            response = self.client.post(url, {"state": "true"}, **headers)
+            self.assertEqual(
+                response.json(), {"liked": True, "likes_count": 1}
+            )
+        self.assertEqual(self.author.profile.total_likes, 0)
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.total_likes, 1)
+        note.refresh_from_db()
+        self.assertEqual(note.weight, 2)
+        self.assertTrue(note.likes.filter(pk=self.author.pk).exists())
+        for _ in range(2):
+            response = self.client.post(url, {"state": "false"}, **headers)
+            self.assertEqual(
+                response.json(), {"liked": False, "likes_count": 0}
+            )
+        self.assertEqual(Note.objects.get(pk=note.pk).weight, 0)
+        self.assertEqual(self.client.get(url, **headers).status_code, 405)
+
+    def test_bookmark_note_toggle(self):
+        note = Note.objects.create(title="Note", author=self.author)
+        url = reverse("content:bookmark_note", args=[note.slug])
+        headers = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+        response = self.client.post(url, **headers)
+        self.assertEqual(
+            response.json(), {"bookmarked": True, "bookmarks_count": 1}
+        )
+        response = self.client.post(url, **headers)
+        self.assertEqual(
+            response.json(), {"bookmarked": False, "bookmarks_count": 0}
+        )
+        self.assertFalse(note.bookmarks.exists())
+
+    def test_like_note_queries(self):
+        note = Note.objects.create(title="Note", author=self.author)
+        url = reverse("content:like_note", args=[note.slug])
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(url, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+            return len(queries)
+
+        queries = count_queries()
+        for number in range(5):
+            note.likes.add(User.objects.create(email=f"{number}@email.qq"))
+        self.assertEqual(count_queries(), queries)
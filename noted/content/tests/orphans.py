@@ -0,0 +1,50 @@
+from taggit.models import Tag
+
+from django.test import TestCase
+
+from content.models import Note, OrphanCandidate, Source
+from content.orphans import delete_orphans
+from users.models import User
+
+
+class OrphansTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(email="author@email.qq")
+        self.source = Source.objects.create(title="Book", type=Source.BOOK)
+        self.note = Note.objects.create(
+            title="Note", author=self.author, source=self.source
+        )
+        self.note.tags.add("python", "django")
+        self.other = Note.objects.create(title="Other", author=self.author)
+        self.other.tags.add("python")
+
+    def test_candidates_recorded(self):
+        self.note.delete()
+        self.assertTrue(Source.objects.filter(pk=self.source.pk).exists())
+        self.assertEqual(
+            OrphanCandidate.objects.filter(kind=OrphanCandidate.TAG).count(),
+            2,
+        )
+        self.assertTrue(
+            OrphanCandidate.objects.filter(
+                kind=OrphanCandidate.SOURCE, object_id=self.source.pk
+            ).exists()
+        )
+
+    def test_delete_orphans(self):
+        self.note.delete()
+        self.assertEqual(delete_orphans(batch_size=1), {"source": 1, "tag": 1})
+        self.assertFalse(Source.objects.filter(pk=self.source.pk).exists())
+        self.assertEqual(
+            list(Tag.objects.values_list("name", flat=True)), ["python"]
+        )
+        self.assertFalse(OrphanCandidate.objects.exists())
+
+    def test_used_candidates_kept(self):
+        self.author.profile.tags.add("django")
+        self.note.tags.remove("django")
+        Note.objects.create(title="New", source=self.source)
+        self.note.delete()
+        self.assertEqual(delete_orphans(), {"source": 0, "tag": 0})
+        self.assertEqual(Source.objects.count(), 1)
+        self.assertEqual(Tag.objects.count(), 2)
@@ -0,0 +1,42 @@
+from django.test import SimpleTestCase
+
+from content.preview import parse_preview
+
+
+class PreviewParserTest(SimpleTestCase):
+    def test_text(self):
+        text, image_url = parse_preview(
+            "<h1>Hello</h1><p>world &amp; co</p>", 300
+        )
+        self.assertEqual(text, "Helloworld & co")
+        self.assertIsNone(image_url)
+
+    def test_text_limit(self):
+        text, _ = parse_preview("<p>" + "a" * 500 + "</p><p>b</p>", 300)
+        self.assertEqual(text, "a" * 300)
+
+    def test_skips_scripts_and_comments(self):
+        text, _ = parse_preview(
+            "<p>a</p><!-- b --><script>c</script><style>d</style><p>e</p>",
+            300,
+        )
+        self.assertEqual(text, "ae")
+
+    def test_first_image(self):
+        _, image_url = parse_preview(
+            '<p>a</p><img src="first"><img src="second" />', 300
+        )
+        self.assertEqual(image_url, "first")
+
+    def test_image_after_text_limit(self):
+        html = "<p>" + "a" * 10000 + '</p><img src="url">'
+        text, image_url = parse_preview(html, 300, chunk_size=100)
+        self.assertEqual(len(text), 300)
+        self.assertEqual(image_url, "url")
+
+    def test_image_without_src(self):
+        _, image_url = parse_preview('<img alt="a"><img src="b">', 300)
+        self.assertIsNone(image_url)
+
+    def test_empty(self):
+        self.assertEqual(parse_preview("", 300), ("", None))
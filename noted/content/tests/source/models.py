@@ -54,5 +54,9 @@ class SourceModelTest(TestCase):
         self.assertIsNotNone(reverse("content:source_type", args=["1"]))
 
     def test_search(self):
-        # PostgreSQL extenstion problem.
-        pass
+        found = Source.objects.search("war and pece")
+        self.assertEqual(list(found), [self.source])
+        self.assertGreater(found[0].similarity, 0.1)
+
+    def test_search_no_results(self):
+        self.assertFalse(Source.objects.search("xyz").exists())
@@ -1,4 +1,4 @@
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from content.models import Source
@@ -20,8 +20,22 @@ class SourceUrlsTest(TestCase):
         return super().setUp()
 
     def test_search_source_ajax(self):
-        # PostgreSQL extenstion problem.
-        pass
+        url = reverse("content:search_sources_select")
+        response = self.ajax_client.get(url, {"query": "war peace"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]["id"], self.source.pk)
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+    @override_settings(SOURCE_AUTOCOMPLETE_LIMIT=2)
+    def test_search_source_ajax_limit(self):
+        for number in range(3):
+            Source.objects.create(title=f"War and Peace {number}")
+        response = self.ajax_client.get(
+            reverse("content:search_sources_select"), {"query": "war peace"}
+        )
+        self.assertEqual(len(response.json()["data"]), 2)
 
     def test_source_details(self):
         response = self.client.get(
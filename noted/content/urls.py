@@ -7,6 +7,7 @@ urlpatterns = [
     path("", views.PublicNoteList.as_view(), name="home"),
     path("welcome/", views.WelcomeNoteList.as_view(), name="welcome"),
     path("note/add/", views.NoteCreateView.as_view(), name="create_note"),
+    path("note/import/", views.import_notes, name="import_notes"),
     path(
         "note/edit/<str:slug>/",
         views.NoteUpdateView.as_view(),
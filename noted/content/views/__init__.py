@@ -12,6 +12,7 @@ from content.views.note import (
     WelcomeNoteList,
     bookmark_note,
     download_note,
+    import_notes,
     like_note,
     pin_note,
 )
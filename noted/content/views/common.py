@@ -1,12 +1,12 @@
 import logging
 
-from taggit.models import Tag
-
-from django.contrib.postgres.search import SearchVector, TrigramSimilarity
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
 from django.shortcuts import render
 from django.views.decorators.cache import cache_page
 
 from content.models import Note, Source
+from tags.models import UnicodeTag
 from users.models import User
 
 
@@ -22,20 +22,16 @@ def search(request, type: str):
     """
     query = request.GET.get("query")
     context = {"query": query, "type": type}
+    limit = settings.SEARCH_RESULTS_LIMIT
 
     if type == "notes":
-        context["notes"] = Note.objects.search(query)
+        context["notes"] = Note.objects.search(query)[:limit]
 
     elif type == "sources":
-        context["sources"] = Source.objects.search(query)
+        context["sources"] = Source.objects.search(query)[:limit]
 
     elif type == "tags":
-        similarity = TrigramSimilarity("name", query)
-        context["tags"] = (
-            Tag.objects.annotate(similarity=similarity)
-            .filter(similarity__gte=0.1)
-            .order_by("-similarity")
-        )
+        context["tags"] = UnicodeTag.objects.search(query)[:limit]
 
     elif type == "people":
         vector = SearchVector("full_name", "username")
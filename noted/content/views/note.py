@@ -15,41 +15,59 @@
     NoteUpdateView: handles editing of a note.
     NoteDeleteView: handles deletion of a note.
     pin_note: pin/unpin a note.
-    like_note: like/unlike a note.
+    like_note: like/unlike a note (idempotent with a desired state).
     bookmark_note: add/delete a note to/from user's bookmarks.
+    import_notes: import notes from a zip archive of Markdown files.
     download_note: download a note as a file.
 
 """
 import logging
-from wsgiref.util import FileWrapper
+import uuid
 
 from taggit.models import Tag
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import F, QuerySet
+from django.core.files.storage import default_storage
+from django.db.models import QuerySet
 from django.http import (
-    HttpResponse,
+    FileResponse,
+    Http404,
     HttpResponseBadRequest,
     HttpResponseRedirect,
     JsonResponse,
 )
 from django.shortcuts import get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response
 from django.utils.decorators import method_decorator
+from django.utils.functional import cached_property
+from django.utils.http import http_date
 from django.views import View
 from django.views.decorators.cache import cache_page
-from django.views.decorators.http import require_GET
+from django.views.decorators.http import require_GET, require_POST
 from django.views.generic import CreateView, DetailView, ListView, UpdateView
 from django.views.generic.edit import DeleteView
 
 from actions import base as act
 from actions.models import Action
-from common.cache import cache_queryset
 from common.decorators import ajax_required
 from common.logging import LogMessage
-from content.forms import NoteForm
-from content.models import Note, Source
+from common.pagination import InvalidCursor, KeysetPaginator
+from content import exports
+from content.counters import count_view
+from content.forms import NoteForm, NoteImportForm
+from content.models import (
+    BOOKMARK_WEIGHT,
+    LIKE_WEIGHT,
+    FeedEntry,
+    Note,
+    Source,
+    get_popular_notes,
+)
+from content.tasks import import_notes_task
 from tags.models import get_top_tags
 from users.models import Following, User
 
@@ -68,10 +86,16 @@ class NoteList(ListView):
         `views`: From the most viewed to the least.
         `likes`: From the most liked to the least.
 
+    Notes are paginated by a cursor (a GET param `cursor`) of the last note
+    on the previous page. With a GET param `format=json` a view returns
+    the next page for infinite scroll: `html` of the notes and `next`
+    cursor.
+
     **Context**
         notes: A queryset of :model:`notes.Note` instances.
         paginator: A paginator for notes list.
         page_obj: A pagination navigator.
+        next_page_url: An URL of the next page in JSON (if it exists).
 
     """
 
@@ -87,6 +111,12 @@ class NoteList(ListView):
     model = Note
     context_object_name = "notes"
     paginate_by = 100
+    page_kwarg = "cursor"
+
+    def get(self, request, *args, **kwargs):
+        if self.paginate_by and request.GET.get("format") == "json":
+            return self.get_json_page()
+        return super().get(request, *args, **kwargs)
 
     def get_ordering(self) -> str:
         """Gets a `order` option from GET params and returns it."""
@@ -94,16 +124,47 @@ class NoteList(ListView):
 
     def get_ordered_queryset(self) -> QuerySet:
         """Orders a queryset by a order option."""
-        return self.SORTING_FUNCS_MAPPING[self.get_ordering()]()
+        queryset = self.SORTING_FUNCS_MAPPING[self.get_ordering()]()
+        return queryset.for_viewer(self.request.user)
+
+    def paginate_queryset(self, queryset, page_size):
+        """Paginate the queryset by a cursor (without COUNT and OFFSET)."""
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.page_kwarg))
+        except InvalidCursor:
+            raise Http404("Invalid cursor.")
+        return paginator, page, page.object_list, page.has_next
+
+    def get_page_context(self, page) -> dict:
+        """Return the context of a page (an URL of the next page)."""
+        context = {}
+        if page is not None and page.has_next:
+            params = self.request.GET.copy()
+            params[self.page_kwarg] = page.next_cursor
+            params["format"] = "json"
+            context[
+                "next_page_url"
+            ] = f"{self.request.path}?{params.urlencode()}"
+        return context
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        if self.request.user.is_authenticated:
-            context[
-                "user_bookmarks"
-            ] = self.request.user.bookmarked_notes.all()
+        context.update(self.get_page_context(context.get("page_obj")))
         return context
 
+    def get_json_page(self) -> JsonResponse:
+        """Render notes of a page for infinite scroll."""
+        self.object_list = self.get_queryset()
+        _, page, notes, _ = self.paginate_queryset(
+            self.object_list, self.get_paginate_by(self.object_list)
+        )
+        context = {"notes": notes, **self.get_page_context(page)}
+        html = render_to_string(
+            "content/note_list_for_layout.html", context, self.request
+        )
+        return JsonResponse({"html": html, "next": page.next_cursor})
+
 
 @method_decorator(cache_page(60 * 60), name="dispatch")
 class WelcomeNoteList(NoteList):
@@ -133,10 +194,10 @@ class WelcomeNoteList(NoteList):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["source_types"] = dict(Source.TYPES)
-        trends = cache_queryset(259200)(Note.objects.popular)()
+        trends = get_popular_notes(6)
         for i, trend in enumerate(trends):
             context[f"trend_{i+1}"] = trend
-        context["tags"] = cache_queryset(259200)(get_top_tags)(12)
+        context["tags"] = get_top_tags(12)
         return context
 
 
@@ -168,19 +229,16 @@ class PublicNoteList(LoginRequiredMixin, NoteList):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["source_types"] = dict(Source.TYPES)
-        context["sidenotes"] = cache_queryset(259200)(Note.objects.popular)()[
-            :5
-        ]
-        context["tags"] = cache_queryset(259200)(get_top_tags)(7)
+        context["sidenotes"] = get_popular_notes(5)
+        context["tags"] = get_top_tags(7)
         if self.request.user.is_authenticated:
-            context["following_notes"] = Note.objects.optimize().filter(
-                author__in=Following.objects.get_following(self.request.user),
-                draft=False,
-                anonymous=False,
-            )
-            context["tags_notes"] = Note.objects.tags_in(
-                self.request.user.profile.tags.names()
-            )
+            user = self.request.user
+            context["following_notes"] = FeedEntry.objects.notes(
+                user, FeedEntry.FOLLOWING
+            ).for_viewer(user)[: self.paginate_by]
+            context["tags_notes"] = FeedEntry.objects.notes(
+                user, FeedEntry.TAGS
+            ).for_viewer(user)[: self.paginate_by]
         return context
 
 
@@ -208,30 +266,31 @@ class ProfileNoteList(NoteList):
             return redirect("content:personal_notes", *args, **kwargs)
         return super().get(request, slug, *args, **kwargs)
 
-    def get_queryset(self):
+    @cached_property
+    def author(self) -> User:
         username = User.unslugify(self.kwargs.get("slug"))
-        user = get_object_or_404(User, username=username)
+        return get_object_or_404(
+            User.objects.select_related("profile"), username=username
+        )
+
+    def get_queryset(self):
         return (
-            super().get_ordered_queryset().filter(author=user, anonymous=False)
+            super()
+            .get_ordered_queryset()
+            .filter(author=self.author, anonymous=False)
         )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        username = User.unslugify(self.kwargs.get("slug"))
-        user = get_object_or_404(User, username=username)
+        user = self.author
         context["user"] = user
         context["pins"] = self.get_queryset().filter(pin=True)
-        context["sidenotes"] = cache_queryset(259200)(Note.objects.popular)()[
-            :5
-        ]
+        context["sidenotes"] = get_popular_notes(5)
         context["followers_count"] = user.followers.count()
-        context["followers"] = [
-            contact.follower
-            for contact in Following.objects.filter(followed=user)
-        ]
-        context["total_user_likes"] = sum(
-            [note.likes.all().count() for note in self.get_queryset()]
+        context["followers"] = Following.objects.get_followers(
+            user, self.request.user
         )
+        context["total_user_likes"] = user.profile.total_likes
         return context
 
 
@@ -251,6 +310,8 @@ class PersonalNotesView(LoginRequiredMixin, NoteList):
     """
 
     template_name = "content/note_list_personal.html"
+    # All notes are shown in tabs (published, pins, drafts).
+    paginate_by = None
 
     def get_queryset(self):
         return super().get_ordered_queryset().filter(author=self.request.user)
@@ -268,17 +329,16 @@ class PersonalNotesView(LoginRequiredMixin, NoteList):
                 "notes": qs.filter(draft=False),
                 "pins": qs.filter(pin=True),
                 "drafts": qs.filter(draft=True),
-                "bookmarks": self.request.user.bookmarked_notes.all(),
-                "sidenotes": cache_queryset(259200)(Note.objects.popular)()[
-                    :5
-                ],
-                "followers_count": self.request.user.followers.count(),
-                "followers": [
-                    contact.follower
-                    for contact in Following.objects.filter(
-                        followed=self.request.user
+                "bookmarks": (
+                    self.request.user.bookmarked_notes.optimize().for_viewer(
+                        self.request.user
                     )
-                ],
+                ),
+                "sidenotes": get_popular_notes(5),
+                "followers_count": self.request.user.followers.count(),
+                "followers": Following.objects.get_followers(
+                    self.request.user, self.request.user
+                ),
             }
         )
         return context
@@ -301,10 +361,17 @@ class NoteDraftMixin:
 
 
 class NoteSaveMixin:
-    """A mixin for calling a post save note method."""
+    """A mixin for calling a post save note method.
+
+    If `NOTE_RENDER_ASYNC` is set and the body was changed, the note is saved
+    with a provisional HTML body and rendered by `render_note_task` (queued
+    by `Note.save`).
+    """
 
     def form_valid(self, form):
         form.instance.author = self.request.user
+        if settings.NOTE_RENDER_ASYNC and "body_raw" in form.changed_data:
+            form.instance.render_status = Note.RENDERING
         self.object = form.save()
         return HttpResponseRedirect(self.get_success_url())
 
@@ -350,11 +417,6 @@ class NoteCreateView(NoteDraftMixin, NoteSaveMixin, CreateView):
             initial = self.add_initial_tag(tag_slug, initial)
         return initial
 
-    def form_valid(self, form):
-        form.instance.author = self.request.user
-        self.object = form.save()
-        return HttpResponseRedirect(self.get_success_url())
-
 
 @method_decorator(login_required, name="dispatch")
 class NoteForkView(NoteCreateView):
@@ -401,22 +463,22 @@ class NoteDetailsView(DetailView):
     model = Note
     template_name = "content/note_display.html"
 
+    def get_queryset(self) -> QuerySet:
+        return Note.objects.for_viewer(self.request.user)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["sidenotes"] = cache_queryset(259200)(Note.objects.popular)()[
-            :5
-        ]
+        context["sidenotes"] = get_popular_notes(5)
         return context
 
     def get_object(self):
         note = super().get_object()
         if note and self.request.user != note.author:
-            Note.objects.filter(pk=note.pk).update(views=F("views") + 1)
+            count_view(self.request, note)
         self.extra_context = {"followers_count": note.author.followers.count()}
-        self.extra_context["followers"] = [
-            contact.follower
-            for contact in Following.objects.filter(followed=note.author)
-        ]
+        self.extra_context["followers"] = Following.objects.get_followers(
+            note.author, self.request.user
+        )
         return note
 
 
@@ -441,38 +503,83 @@ def pin_note(request, slug):
     if note.author != request.user:
         return HttpResponseBadRequest()
     note.pin = not note.pin
-    note.save()
+    note.save(update_fields=["pin"])
     return JsonResponse({"pin": note.pin})
 
 
-@require_GET
+def set_note_mark(request, slug: str, field: str, weight: int) -> tuple:
+    """Set a like/bookmark (`field`) of a note by the request user.
+
+    The desired state is a `state` POST parameter ("true"/"false"), without
+    it the current state is switched.
+
+    Returns:
+        A tuple (note, state, changed, count).
+    """
+    note = get_object_or_404(Note.objects.only("id", "author"), slug=slug)
+    state = request.POST.get("state")
+    if state is None:
+        marks = getattr(note, field).filter(pk=request.user.pk)
+        state = not marks.exists()
+    else:
+        state = state.lower() in ("true", "1")
+    changed, count = Note.objects.set_mark(
+        note.pk, request.user.pk, field, state, weight=weight
+    )
+    return note, state, changed, count
+
+
+@require_POST
 @login_required(login_url=reverse_lazy("account_login"))
 @ajax_required()
 def like_note(request, slug):
-    """Adds/removes a like to/from a note."""
-    note = get_object_or_404(Note, slug=slug)
-    if request.user in note.likes.all():
-        note.likes.remove(request.user)
-        return JsonResponse({"liked": False})
-    else:
-        note.likes.add(request.user)
+    """Adds/removes a like to/from a note.
+
+    A repeated request with the same `state` doesn't change anything.
+    """
+    note, liked, changed, count = set_note_mark(
+        request, slug, "likes", LIKE_WEIGHT
+    )
+    if liked and changed:
         Action.objects.create_action(request.user, act.LIKE, note, notify=True)
-        return JsonResponse({"liked": True})
+    return JsonResponse({"liked": liked, "likes_count": count})
 
 
-@require_GET
+@require_POST
 @login_required(login_url=reverse_lazy("account_login"))
 @ajax_required()
 def bookmark_note(request, slug):
-    """Adds/removes a note to/from user's bookmarks."""
-    note = get_object_or_404(Note, slug=slug)
-    if request.user in note.bookmarks.all():
-        note.bookmarks.remove(request.user)
-        return JsonResponse({"bookmarked": False})
-    else:
-        note.bookmarks.add(request.user)
+    """Adds/removes a note to/from user's bookmarks.
+
+    A repeated request with the same `state` doesn't change anything.
+    """
+    note, bookmarked, changed, count = set_note_mark(
+        request, slug, "bookmarks", BOOKMARK_WEIGHT
+    )
+    if bookmarked and changed:
         Action.objects.create_action(request.user, act.BOOKMARK, note)
-        return JsonResponse({"bookmarked": True})
+    return JsonResponse({"bookmarked": bookmarked, "bookmarks_count": count})
+
+
+@require_POST
+@login_required(login_url=reverse_lazy("account_login"))
+def import_notes(request):
+    """Queue an import of a zip archive of Markdown files (`archive`).
+
+    The archive is saved to the storage and imported by a task, the
+    response is 202 with `task_id` (for `users:task_status`).
+    """
+    form = NoteImportForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse(
+            {"msg": "invalid", "errors": form.errors}, status=400
+        )
+    name = default_storage.save(
+        f"imports/{request.user.pk}/{uuid.uuid4().hex}.zip",
+        form.cleaned_data["archive"],
+    )
+    task = import_notes_task.delay(name, request.user.pk)
+    return JsonResponse({"msg": "started", "task_id": task.id}, status=202)
 
 
 @require_GET
@@ -480,24 +587,50 @@ def bookmark_note(request, slug):
 def download_note(request, filetype: str, slug: str):
     """Download a note as a file.
 
+    Exports are generated once for a version of a note and served from the
+    storage. A PDF export is generated by a task: the response is 202 with
+    `task_id` (for `users:task_status`) until it is ready, an AJAX request
+    of a ready PDF gets `{"msg": "ready"}` instead of the file.
+
     Attrs:
         filetype: an extension of a required file (md, html, pdf).
         slug: a slug of a note.
     """
-    note = get_object_or_404(Note, slug=slug)
-    file = note.generate_file_to_response(filetype=filetype)
-    if not file or (note.draft and request.user != note.author):
+    note = get_object_or_404(Note.objects.select_related("source"), slug=slug)
+    if filetype not in exports.CONTENT_TYPES or (
+        note.draft and request.user != note.author
+    ):
         logger.error(
             LogMessage(
                 "Can't generate a file.", download_note, request=request
             )
         )
         return HttpResponseBadRequest()
-    response = HttpResponse(
-        FileWrapper(file["file"]), content_type=file["content_type"]
+    etag = exports.export_etag(note, filetype)
+    last_modified = int(note.modified.timestamp())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        return response
+    name = exports.get_export(note, filetype)
+    if filetype in exports.ASYNC_FORMATS:
+        if name is None:
+            task_id = exports.start_export(note, filetype)
+            return JsonResponse(
+                {"msg": "preparing", "task_id": task_id}, status=202
+            )
+        if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+            return JsonResponse({"msg": "ready"})
+    elif name is None:
+        name = exports.create_export(note, filetype)
+    response = FileResponse(
+        default_storage.open(name),
+        as_attachment=True,
+        filename=f"{note.slug[:20]}.{filetype}",
+        content_type=exports.CONTENT_TYPES[filetype],
     )
-    response[
-        "Content-Disposition"
-    ] = f'attachment; filename="{file["filename"]}"'.encode(encoding="utf-8")
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
     Action.objects.create_action(request.user, act.DOWNLOAD, note)
     return response
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.http import HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render
 from django.views import View
@@ -25,11 +26,15 @@ class SourceDetailsView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["notes"] = self.get_object().notes.filter(draft=False)
+        context["notes"] = (
+            Note.objects.optimize()
+            .for_viewer(self.request.user)
+            .filter(source=self.object, draft=False)
+        )
         context["source_types"] = dict(Source.TYPES)
-        context["sidenotes"] = Note.objects.with_source_type(
-            self.get_object().type
-        )[:5]
+        context["sidenotes"] = Note.objects.with_source_type(self.object.type)[
+            :5
+        ]
         return context
 
 
@@ -57,7 +62,9 @@ class SourceTypeDetailsView(View):
         context = {
             "type_code": type[0],
             "type": type[1],
-            "notes": Note.objects.with_source_type(type[0]),
+            "notes": Note.objects.with_source_type(type[0]).for_viewer(
+                request.user
+            ),
             "sources": Source.objects.filter(type=type[0]),
             "source_types": dict(Source.TYPES),
             "sidenotes": Note.objects.public()[:5],
@@ -72,7 +79,7 @@ def search_sources_select(request):
     TODO: reduce given data and handle it in the template.
     """
     query = request.GET.get("query", "")
-    data = Source.objects.search(query)
+    data = Source.objects.search(query)[: settings.SOURCE_AUTOCOMPLETE_LIMIT]
     data = [
         {
             "id": source.pk,
@@ -59,6 +59,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "django.contrib.sites",
     "django.contrib.sitemaps",
+    "django.contrib.postgres",
     "allauth",
     "allauth.account",
     "allauth.socialaccount",
@@ -78,6 +79,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "common.queries.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
@@ -388,3 +390,63 @@ TAGGIT_TAGS_FROM_STRING = "tags.utils.custom_tag_string"
 # Profile settings
 LIGHT_THEME_PATH = "css/light_theme.css"
 DARK_THEME_PATH = "css/dark_theme.css"
+
+# Markdown rendering backend (a `content.markdown.MarkdownRenderer` subclass)
+# Use "content.markdown.GitHubMarkdownRenderer" to render via GitHub API.
+MARKDOWN_RENDERER = "content.markdown.LocalMarkdownRenderer"
+# Rendered HTML is cached in-process (number of items) and in the Django cache
+MARKDOWN_RENDER_CACHE_SIZE = 256
+MARKDOWN_RENDER_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+# Render note bodies via Celery (`content.tasks.render_note_task`)
+NOTE_RENDER_ASYNC = False
+
+# Trigram search of notes, sources and tags (`pg_trgm.similarity_threshold`)
+TRIGRAM_SIMILARITY_THRESHOLD = 0.1
+# Maximum number of results of the search page and of sources autocomplete
+SEARCH_RESULTS_LIMIT = 50
+SOURCE_AUTOCOMPLETE_LIMIT = 10
+# Number of notes in a materialized home feed (`content.models.FeedEntry`)
+FEED_LENGTH = 500
+# Buffer of note views (a subclass of `content.counters.ViewCounter`),
+# buffered views are flushed by `content.tasks.flush_note_views_task`
+VIEW_COUNTER = "content.counters.LocalViewCounter"
+# Seconds between flushes of the process-local buffer
+VIEW_COUNTER_FLUSH_INTERVAL = 60
+# Count a view of a note once per session
+VIEW_COUNTER_SESSION_DEDUP = True
+# Timeout of cached sidebars (popular notes, top tags), saving or deleting
+# instances of models they depend on invalidates them earlier
+SIDEBAR_CACHE_TIMEOUT = 60 * 60 * 24 * 3
+# An expired sidebar is served while one worker recomputes it
+SIDEBAR_CACHE_STALE_TIMEOUT = 60 * 60 * 24
+# Timeout of cached note cards (`content.fragments`)
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+# Number of notifications inserted at once by `notify_note_followers_task`
+NOTIFICATION_BATCH_SIZE = 1000
+# Similar actions of a user aren't recorded within the window (seconds)
+ACTION_DEDUP_WINDOW = 60
+# Buffer of actions (a subclass of `actions.buffer.ActionBuffer`),
+# buffered actions are inserted by `actions.tasks.flush_actions_task`
+ACTION_BUFFER = "actions.buffer.LocalActionBuffer"
+# Seconds between flushes of the process-local buffer (0 - on every action,
+# actions buffered after the last flush are lost when the process exits)
+ACTION_BUFFER_FLUSH_INTERVAL = 0
+# Maximum number of SQL queries of a view (`common.queries`), requests over
+# the budget are logged to the SQL log
+QUERY_BUDGET = 50
+# Budgets of views by names (`app:url_name`)
+QUERY_BUDGETS = {}
+# Log requests which repeat a statement this number of times (N+1 queries)
+QUERY_DUPLICATES_THRESHOLD = 10
+# Seconds a generating export of a note isn't queued again (`content.exports`)
+EXPORT_TASK_TIMEOUT = 60 * 5
+# Number of orphan candidates (sources, tags) checked at once by
+# `content.tasks.delete_orphans_task`
+ORPHANS_BATCH_SIZE = 1000
+# Number of notes deleted (anonymized) at once by
+# `users.tasks.delete_account_task`
+ACCOUNT_DELETION_CHUNK_SIZE = 500
+# Limits of archives of Markdown files imported by users (`content.imports`)
+NOTE_IMPORT_MAX_SIZE = 50 * 1024 * 1024
+NOTE_IMPORT_MAX_FILE_SIZE = 256 * 1024
+NOTE_IMPORT_MAX_NOTES = 5000
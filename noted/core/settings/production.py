@@ -38,9 +38,26 @@ CACHES = {
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
 
+NOTE_RENDER_ASYNC = True
+
 CELERY_BROKER_URL = get_env_variable("REDIS_LOCATION")
 CELERY_RESULT_BACKEND = get_env_variable("REDIS_LOCATION")
+VIEW_COUNTER = "content.counters.RedisViewCounter"
+ACTION_BUFFER = "actions.buffer.RedisActionBuffer"
+
 CELERY_BEAT_SCHEDULE = {
+    "flush_actions_task": {
+        "task": "actions.tasks.flush_actions_task",
+        "schedule": 10.0,
+    },
+    "flush_note_views_task": {
+        "task": "content.tasks.flush_note_views_task",
+        "schedule": 60.0,
+    },
+    "delete_orphans_task": {
+        "task": "content.tasks.delete_orphans_task",
+        "schedule": 600.0,
+    },
     "telegram_report_task": {
         "task": "common.tasks.telegram_report_task",
         "schedule": crontab(minute=45, hour=21 - 3),
@@ -16,3 +16,5 @@ CACHES = {
 }
 
 EMAIL_BACKEND = "django.core.mail.backends.dummy.EmailBackend"
+
+CELERY_TASK_ALWAYS_EAGER = True
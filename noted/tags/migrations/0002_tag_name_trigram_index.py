@@ -0,0 +1,22 @@
+# Generated by Django 4.1.13 on 2026-10-18 20:31
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("taggit", "0005_auto_20220424_2025"),
+        ("tags", "0001_initial"),
+        ("content", "0006_trigram_indexes"),
+    ]
+
+    # `taggit_tag` belongs to the third-party app, so the index is
+    # created by SQL (`pg_trgm` is installed by the content migration).
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX taggit_tag_name_trgm "
+            "ON taggit_tag USING gin (name gin_trgm_ops);",
+            "DROP INDEX taggit_tag_name_trgm;",
+        ),
+    ]
@@ -2,11 +2,15 @@ import uuid
 
 from taggit.models import Tag, TaggedItem
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import TrigramSimilarity
 from django.db import models
 from django.db.models import Count, Q, QuerySet
 from django.utils.text import slugify
 
+from common.cache import cached
 from common.text import transcript_ru2en
 
 
@@ -19,6 +23,14 @@ class TagManager(models.Manager):
             slug += str(uuid.uuid4())[:8]
         return slug
 
+    def search(self, query: str) -> QuerySet:
+        """Search tags by `name` (via the trigram index of `taggit_tag`)."""
+        return (
+            self.filter(name__trigram_similar=query)
+            .annotate(similarity=TrigramSimilarity("name", query))
+            .order_by("-similarity")
+        )
+
 
 class UnicodeTag(Tag):
     objects = TagManager()
@@ -39,23 +51,39 @@ class UnicodeTaggedItem(TaggedItem):
         return UnicodeTag
 
 
-def get_top_tags(top_num: int = 7) -> QuerySet:
-    """Gets tags with most number of notes.
-
-    TODO: Try to put it in a Manager.
-
-    Attrs:
-        top_num: a slice size from the top.
+@cached(
+    settings.SIDEBAR_CACHE_TIMEOUT,
+    depends_on=(
+        "taggit.Tag",
+        "tags.UnicodeTag",
+        "tags.UnicodeTaggedItem",
+        "content.Note",
+    ),
+    stale_timeout=settings.SIDEBAR_CACHE_STALE_TIMEOUT,
+)
+def get_tag_counts() -> list:
+    """Gets tags of public notes with number of notes `num_times` (cached).
+
+    Tags are ordered by number of notes.
     """
     return (
         UnicodeTag.objects.annotate(
             num_times=Count("notes", filter=Q(notes__draft=False))
         )
         .filter(num_times__gt=0)
-        .order_by("-num_times")[:top_num]
+        .order_by("-num_times", "name")
     )
 
 
+def get_top_tags(top_num: int = 7) -> list:
+    """Gets tags with most number of notes.
+
+    Attrs:
+        top_num: a slice size from the top.
+    """
+    return get_tag_counts()[:top_num]
+
+
 def get_tag_followers(tag: Tag) -> list:
     """Gets a list of users who follow the given tag
 
@@ -67,4 +95,6 @@ def get_tag_followers(tag: Tag) -> list:
     """
     profile_ct = ContentType.objects.get(model="userprofile")
     items = UnicodeTaggedItem.objects.filter(tag=tag, content_type=profile_ct)
-    return list([item.content_object.user for item in items])
+    return list(
+        get_user_model().objects.filter(profile__in=items.values("object_id"))
+    )
@@ -1,8 +1,8 @@
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
-from actions import base as act
-from actions.notifications import create_notification
+from actions.tasks import notify_note_followers_task
 from content.models import Note
 
 from .models import UnicodeTaggedItem
@@ -10,6 +10,9 @@ from .models import UnicodeTaggedItem
 
 @receiver(post_save, sender=UnicodeTaggedItem)
 def tagged_note_created_action(sender, instance, created, **kwargs):
-    """Create an action (:model:`Action`) if a tagged note was created."""
-    if created and isinstance(instance.content_object, Note):
-        create_notification(instance.tag, act.CREATE, instance.content_object)
+    """Notify tag followers (asynchronously) if a note was tagged."""
+    if created and instance.content_type.model_class() is Note:
+        note_id = instance.object_id
+        transaction.on_commit(
+            lambda: notify_note_followers_task.delay(note_id)
+        )
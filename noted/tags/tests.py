@@ -1,5 +1,10 @@
 from django.test import TestCase
+from django.urls import reverse
 
+from content.models import Note
+from users.models import User
+
+from .models import UnicodeTag
 from .utils import custom_tag_string
 
 
@@ -23,3 +28,24 @@ class CustomTagStringTest(TestCase):
     def test_mixed_separator(self):
         result = custom_tag_string("python,django unit test")
         self.assertEqual(result, ["python", "django-unit-test"])
+
+
+class TagSearchTest(TestCase):
+    def test_search(self):
+        tag = UnicodeTag.objects.create(name="programming")
+        UnicodeTag.objects.create(name="music")
+        self.assertEqual(list(UnicodeTag.objects.search("programing")), [tag])
+
+
+class TagListTest(TestCase):
+    def test_tag_counts(self):
+        author = User.objects.create(email="author@email.qq")
+        Note.objects.create(title="A", author=author).tags.add("py", "go")
+        Note.objects.create(title="B", author=author).tags.add("py")
+        Note.objects.create(title="C", author=author, draft=True).tags.add(
+            "rust"
+        )
+        response = self.client.get(reverse("tags:tags"))
+        self.assertEqual(response.status_code, 200)
+        tags = [(tag.name, tag.num_times) for tag in response.context["tags"]]
+        self.assertEqual(tags, [("py", 2), ("go", 1)])
@@ -1,7 +1,6 @@
 from taggit.models import Tag
 
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
@@ -11,7 +10,9 @@ from django.views.generic import DetailView, ListView
 from actions import base as act
 from actions.models import Action
 from common.decorators import ajax_required
-from content.models import Note
+from content.models import Note, get_popular_notes
+
+from .models import get_tag_counts
 
 
 class TagList(ListView):
@@ -20,7 +21,8 @@ class TagList(ListView):
     It displays tags, each tag has a number of its' notes.
 
     **Context**
-        tags: A queryset of all :model:`taggit.Tag` instances.
+        tags: A list of :model:`taggit.Tag` instances of public notes.
+        sidenotes: Suggested notes on a sidebar.
 
     **Template**
         :template:`frontend/templates/tags/list.html`
@@ -32,10 +34,12 @@ class TagList(ListView):
     template_name = "tags/list.html"
 
     def get_queryset(self):
-        queryset = Tag.objects.annotate(
-            num_times=Count("notes", filter=Q(notes__private=False))
-        ).filter(num_times__gt=0)
-        return queryset
+        return get_tag_counts()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["sidenotes"] = get_popular_notes(5)
+        return context
 
 
 class TagDetails(DetailView):
@@ -58,7 +62,7 @@ class TagDetails(DetailView):
         context["notes"] = Note.objects.public().filter(
             tags__name__in=[self.get_object().name]
         )
-        context["sidenotes"] = Note.objects.public()[:5]
+        context["sidenotes"] = get_popular_notes(5)
         return context
 
 
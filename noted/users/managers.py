@@ -1,6 +1,7 @@
 from django.contrib.auth.models import BaseUserManager
 
 from django.db import models
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 
 from common.text import is_latin, transcript_ru2en
@@ -86,3 +87,29 @@ class FollowingManager(models.Manager):
             user: A required user.
         """
         return [following.follower for following in self.filter(followed=user)]
+
+    def get_followers(self, user: "User", viewer: "User") -> list:
+        """Return followers of a user with profiles in two queries.
+
+        Followers are marked if `viewer` follows them (`is_followed`).
+
+        Args:
+            user: A required user.
+            viewer: A user who views the list.
+        """
+        followings = self.filter(followed=user).select_related(
+            "follower__profile"
+        )
+        if viewer.is_authenticated:
+            followings = followings.annotate(
+                is_followed=Exists(
+                    self.filter(follower=viewer, followed=OuterRef("follower"))
+                )
+            )
+        followers = []
+        for following in followings:
+            following.follower.is_followed = getattr(
+                following, "is_followed", False
+            )
+            followers.append(following.follower)
+        return followers
@@ -0,0 +1,20 @@
+# Generated by Django 4.1.13 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_userprofile_settings"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="total_likes",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Total likes"
+            ),
+        ),
+    ]
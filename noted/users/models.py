@@ -131,6 +131,8 @@ class UserProfile(models.Model):
         socials: JSON with links to user's social media
             ({"social_name":"link"})
         settings: JSON with profile+user settings.
+        total_likes: A number of likes of user's public not anonymous notes
+            (kept in sync by signals of the `content` app).
     """
 
     user = models.OneToOneField(
@@ -159,6 +161,7 @@ class UserProfile(models.Model):
         related_name="users",
         verbose_name=_("Tag subscriptions"),
     )
+    total_likes = models.PositiveIntegerField(_("Total likes"), default=0)
 
     def __str__(self):
         return f"Profile: {self.user.username}"
@@ -1,6 +1,11 @@
 from celery import shared_task
 
+from django.db.transaction import atomic
+
+from content.deletion import delete_author_notes
+
 from .auth import send_changeemail_email, send_signup_email
+from .models import User
 
 
 @shared_task()
@@ -27,3 +32,31 @@ def send_changeemail_email_task(email: str) -> bool:
         True if the email was sent successfully, otherwise False.
     """
     return send_changeemail_email(email)
+
+
+@shared_task(bind=True)
+def delete_account_task(self, user_id: int, keep_notes: bool) -> bool:
+    """Asynchronously deletes a user account with notes of the user.
+
+    Notes are deleted (or anonymized) by chunks, the progress is reported
+    as the `PROGRESS` state with `{"done": 10, "total": 100}` (available
+    via `TaskStatusView`).
+
+    Args:
+        user_id: A primary key of the user.
+        keep_notes: Keep notes as anonymous instead of deleting.
+
+    Returns:
+        True if the account was deleted, False if it doesn't exist.
+    """
+
+    def report(done: int, total: int):
+        if not self.request.is_eager:
+            self.update_state(
+                state="PROGRESS", meta={"done": done, "total": total}
+            )
+
+    delete_author_notes(user_id, keep_notes=keep_notes, progress=report)
+    with atomic():
+        deleted, _ = User.objects.filter(pk=user_id).delete()
+    return bool(deleted)
@@ -8,7 +8,7 @@ from celery.result import AsyncResult
 
 from django.conf import settings
 from django.contrib import messages as msg
-from django.contrib.auth import authenticate, login
+from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email as _validate_email
@@ -23,7 +23,6 @@ from django.views.generic import FormView
 
 from common.decorators import ajax_required
 from common.logging import LoggerDecorator as logit
-from content.models import Note
 
 from .auth import MESSAGES, StringToken, TokenData, get_token, unsign_email
 from .forms import (
@@ -34,7 +33,11 @@ from .forms import (
     validate_username,
 )
 from .models import AuthToken, Following, TokenType, UITheme, User
-from .tasks import send_changeemail_email_task, send_signup_email_task
+from .tasks import (
+    delete_account_task,
+    send_changeemail_email_task,
+    send_signup_email_task,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -260,15 +263,22 @@ class DeleteUserView(LoginRequiredMixin, FormView):
     success_redirect_name = "content:welcome"
 
     def form_valid(self, form: DeleteUserForm):
-        user_notes = Note.objects.filter(author=self.request.user)
+        """Deactivate and log out the user, delete the account by a task.
+
+        The page polls the progress of the task (`TaskStatusView`).
+        """
+        user = self.request.user
         method = form.cleaned_data.get("delete_method")
-        with atomic():
-            if method == DeleteUserForm.KEEP_NOTES:
-                user_notes.update(anonymous=True)
-            else:
-                user_notes.delete()
-            self.request.user.delete()
-        return redirect(self.success_redirect_name)
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        logout(self.request)
+        task = delete_account_task.delay(
+            user.pk, keep_notes=method == DeleteUserForm.KEEP_NOTES
+        )
+        return render(
+            self.request,
+            "users/account_deleting.html",
+            {"task_id": task.id, "next": reverse(self.success_redirect_name)},
+        )
 
 
 @method_decorator(logit(__name__), name="dispatch")